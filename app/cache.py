@@ -1,37 +1,305 @@
 import json
 import hashlib
 import os
-import redis
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import redis.asyncio as aioredis
+
+from app.flight_services.utils.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger("cache")
 
 # Use environment variables or defaults for Redis connection details.
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB = int(os.getenv("REDIS_DB", 0))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.5))
+
+# "redis" (default) or "memory" to run without a Redis server.
+SEARCH_CACHE_BACKEND = os.getenv("SEARCH_CACHE_BACKEND", "redis").lower()
+# Hard TTL: entries expire from Redis after this many seconds and a search blocks on the providers.
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", 300))
+# Soft TTL: older entries are still served, but trigger a background refresh.
+SEARCH_CACHE_SOFT_TTL = int(os.getenv("SEARCH_CACHE_SOFT_TTL", 120))
+# Per-route overrides as "ORIGIN-DEST=soft:hard" pairs, comma-separated,
+# e.g. "DAC-CXB=60:600,DAC-CGP=60:600". Matched on the first leg.
+SEARCH_CACHE_ROUTE_TTLS = os.getenv("SEARCH_CACHE_ROUTE_TTLS", "")
+SEARCH_CACHE_LRU_SIZE = int(os.getenv("SEARCH_CACHE_LRU_SIZE", 256))
+# The local tier holds entries for a shorter time so workers do not outlive Redis expiry by much.
+SEARCH_CACHE_LOCAL_TTL = int(os.getenv("SEARCH_CACHE_LOCAL_TTL", 30))
+# After a Redis error, skip Redis for this many seconds instead of paying a timeout per request.
+REDIS_RETRY_AFTER = float(os.getenv("REDIS_RETRY_AFTER", 10))
+
+# v2 entries carry their store time and soft TTL
+SEARCH_CACHE_PREFIX = "search:v2:"
+
+
+class LRUCache:
+    """Small in-process LRU with a per-entry expiry."""
+
+    def __init__(self, maxsize: int = SEARCH_CACHE_LRU_SIZE):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class InMemoryRedis:
+    """
+    Local stand-in for the subset of the async Redis API used by SearchCache.
+    Used when SEARCH_CACHE_BACKEND=memory and in tests.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ex: Optional[int] = None):
+        self._data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    async def aclose(self):
+        self._data.clear()
+
+
+def create_redis_client():
+    """Create the pooled async Redis client, or the in-memory stand-in."""
+    if SEARCH_CACHE_BACKEND == "memory":
+        return InMemoryRedis()
+    pool = aioredis.ConnectionPool(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        db=REDIS_DB,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+        decode_responses=True,
+    )
+    return aioredis.Redis(connection_pool=pool)
+
+
+def normalize_search_request(source: str, point_of_sale: str, request_data: dict, page: int, size: int) -> dict:
+    """
+    Reduce a combined search request to the fields that determine its results.
+    Passenger IDs and key order do not matter; passenger mix does.
+    """
+    criteria = request_data.get("shoppingCriteria") or {}
+    preferences = criteria.get("travelPreferences") or {}
+    pax_mix: Dict[str, int] = {}
+    for pax in request_data.get("pax") or []:
+        ptc = (pax.get("ptc") or "").upper()
+        pax_mix[ptc] = pax_mix.get(ptc, 0) + 1
 
-# Initialize the Redis client
-redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
+    return {
+        "source": (source or "").lower(),
+        "pointOfSale": (point_of_sale or "").upper(),
+        "tripType": (criteria.get("tripType") or "").lower(),
+        "route": [
+            [
+                ((segment.get("originDepRequest") or {}).get("iatA_LocationCode") or "").upper(),
+                ((segment.get("destArrivalRequest") or {}).get("iatA_LocationCode") or "").upper(),
+                (segment.get("originDepRequest") or {}).get("date") or "",
+            ]
+            for segment in request_data.get("originDest") or []
+        ],
+        "pax": pax_mix,
+        "cabin": (preferences.get("cabinCode") or "").lower(),
+        "vendorPref": sorted(preferences.get("vendorPref") or []),
+        "returnUPSellInfo": bool(criteria.get("returnUPSellInfo")),
+        "page": page,
+        "size": size,
+    }
 
-def get_cache_key(raw_results: dict) -> str:
+
+def parse_route_ttls(spec: str) -> Dict[str, Tuple[int, int]]:
+    """Parse SEARCH_CACHE_ROUTE_TTLS into {"DAC-CXB": (soft, hard)}; malformed pairs are skipped."""
+    ttls = {}
+    for item in spec.split(","):
+        route, _, values = item.strip().partition("=")
+        soft, _, hard = values.partition(":")
+        try:
+            soft_ttl, hard_ttl = int(soft), int(hard or SEARCH_CACHE_TTL)
+        except ValueError:
+            if item.strip():
+                logger.warning(f"Ignoring malformed search cache TTL override: {item.strip()!r}")
+            continue
+        ttls[route.strip().upper()] = (min(soft_ttl, hard_ttl), hard_ttl)
+    return ttls
+
+
+ROUTE_TTLS = parse_route_ttls(SEARCH_CACHE_ROUTE_TTLS)
+
+
+def get_search_ttls(normalized_request: dict) -> Tuple[int, int]:
+    """(soft, hard) TTL in seconds for a normalized search request."""
+    route = normalized_request.get("route") or []
+    if route:
+        override = ROUTE_TTLS.get(f"{route[0][0]}-{route[0][1]}")
+        if override is not None:
+            return override
+    return min(SEARCH_CACHE_SOFT_TTL, SEARCH_CACHE_TTL), SEARCH_CACHE_TTL
+
+
+def get_search_cache_key(normalized_request: dict) -> str:
     """
-    Generate a cache key based on the raw_results content.
-    The raw_results dict is converted to a sorted JSON string and then hashed.
+    Generate a cache key from a normalized search request.
+    The dict is converted to a sorted JSON string and then hashed.
     """
-    raw_str = json.dumps(raw_results, sort_keys=True)
+    raw_str = json.dumps(normalized_request, sort_keys=True, separators=(",", ":"))
     key_hash = hashlib.sha256(raw_str.encode('utf-8')).hexdigest()
-    return f"formatted_flights:{key_hash}"
-
-def get_formatted_flights(raw_results: dict, format_function) -> dict:
-    """
-    Return formatted flight data using Redis as a cache.
-    If the data exists in the cache, return it.
-    Otherwise, call format_function(raw_results) to format the data,
-    store it in Redis with a TTL (e.g., 300 seconds), and return it.
-    """
-    key = get_cache_key(raw_results)
-    cached = redis_client.get(key)
-    if cached:
-        return json.loads(cached)
-    
-    formatted = format_function(raw_results)
-    redis_client.set(key, json.dumps(formatted), ex=300)
-    return formatted
+    return f"{SEARCH_CACHE_PREFIX}{key_hash}"
+
+
+class CacheEntry:
+    """A cached value with the wall-clock time it was stored and its soft TTL."""
+    __slots__ = ("value", "stored_at", "soft_ttl")
+
+    def __init__(self, value: Any, stored_at: float, soft_ttl: float):
+        self.value = value
+        self.stored_at = stored_at
+        self.soft_ttl = soft_ttl
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    @property
+    def is_stale(self) -> bool:
+        return self.age >= self.soft_ttl
+
+
+class SearchCache:
+    """
+    Two-tier cache for formatted search results: an in-process LRU in front of
+    Redis. Redis errors are logged and treated as misses so a cache outage
+    never fails a search. Cached values are shared and must not be mutated.
+
+    Entries have a soft and a hard TTL. Redis expires them at the hard TTL;
+    get_entry() reports entries past the soft TTL as stale so callers can
+    serve them while refreshing in the background.
+
+    Lookups are counted per tier in the cache_lookups_total metric under `name`.
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        ttl: int = SEARCH_CACHE_TTL,
+        lru_size: int = SEARCH_CACHE_LRU_SIZE,
+        local_ttl: int = SEARCH_CACHE_LOCAL_TTL,
+        soft_ttl: int = SEARCH_CACHE_SOFT_TTL,
+        name: str = "search",
+    ):
+        self.name = name
+        self.redis = redis_client
+        self.ttl = ttl
+        self.soft_ttl = min(soft_ttl, ttl)
+        self.local_ttl = local_ttl
+        self.local = LRUCache(lru_size)
+        self._redis_down_until = 0.0
+
+    def _redis_available(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, action: str, key: str, error: Exception):
+        logger.warning(f"Search cache {action} failed for {key}: {error}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+
+    async def get_entry(self, key: str) -> Optional[CacheEntry]:
+        if self.local.maxsize > 0:
+            entry = self.local.get(key)
+            CACHE_LOOKUPS.labels(self.name, "local", "miss" if entry is None else "hit").inc()
+            if entry is not None:
+                return entry
+        if not self._redis_available():
+            return None
+        try:
+            cached = await self.redis.get(key)
+        except Exception as e:
+            self._redis_failed("read", key, e)
+            CACHE_LOOKUPS.labels(self.name, "redis", "error").inc()
+            return None
+        CACHE_LOOKUPS.labels(self.name, "redis", "hit" if cached else "miss").inc()
+        if not cached:
+            return None
+        envelope = json.loads(cached)
+        entry = CacheEntry(envelope["value"], envelope["storedAt"], envelope["softTtl"])
+        self.local.set(key, entry, min(self.local_ttl, self.ttl))
+        return entry
+
+    async def get(self, key: str) -> Optional[dict]:
+        """The cached value, fresh or stale."""
+        entry = await self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    async def set(self, key: str, value: dict, ttl: Optional[int] = None, soft_ttl: Optional[int] = None):
+        ttl = ttl or self.ttl
+        entry = CacheEntry(value, time.time(), min(self.soft_ttl if soft_ttl is None else soft_ttl, ttl))
+        self.local.set(key, entry, min(self.local_ttl, ttl))
+        if not self._redis_available():
+            return
+        envelope = {"value": value, "storedAt": entry.stored_at, "softTtl": entry.soft_ttl}
+        try:
+            await self.redis.set(key, json.dumps(envelope), ex=ttl)
+        except Exception as e:
+            self._redis_failed("write", key, e)
+
+    async def delete(self, key: str):
+        self.local.delete(key)
+        if not self._redis_available():
+            return
+        try:
+            await self.redis.delete(key)
+        except Exception as e:
+            self._redis_failed("delete", key, e)
+
+    async def close(self):
+        if self.redis is not None:
+            # redis-py >= 5 renamed close() to aclose()
+            closer = getattr(self.redis, "aclose", None) or self.redis.close
+            await closer()
+
+
+search_cache = SearchCache(create_redis_client())
@@ -3,6 +3,8 @@
 import logging
 from typing import Dict, List, Any, Optional, TypedDict
 
+from app.flight_services.adapters.airrules_penalties import AdaptedPenalties, penalty_index
+
 logger = logging.getLogger(__name__)
 
 # --- Define TypedDicts for the adapted (output) structure ---
@@ -16,6 +18,7 @@ class AdaptedPaxFareRules(TypedDict):
     pax_type: str           # e.g., "Adult"
     fare_basis_code: str    # e.g., "EDOMO"
     rule_details: List[AdaptedRuleDetail] # List of rule categories and their text
+    penalties: Optional[AdaptedPenalties] # Parsed from the Penalties category; None if absent
 
 class AdaptedRouteFareRules(TypedDict):
     """Represents fare rules for a specific route, containing rules for various passenger types."""
@@ -149,7 +152,9 @@ def adapt_bdfare_fare_rules(bdfare_rules_response: Dict[str, Any]) -> List[Adapt
                     current_route_pax_rules.append({
                         "pax_type": pax_type,
                         "fare_basis_code": fare_basis_code,
-                        "rule_details": current_pax_rule_details
+                        "rule_details": current_pax_rule_details,
+                        # Parsed once per fare basis; see airrules_penalties
+                        "penalties": penalty_index.get_or_parse(route_str, pax_type, fare_basis_code, current_pax_rule_details),
                     })
         
         if current_route_pax_rules: # Only add route if it has any processed passenger-specific rules
@@ -0,0 +1,210 @@
+# app/flight_services/adapters/airrules_penalties.py
+"""
+Structured penalties parsed from free-text fare rules.
+
+The PENALTIES category of a fare rule is ATPCO-style text such as
+
+    CHANGES
+      BEFORE DEPARTURE
+        PER TICKET CHARGE BDT 1200 FOR REISSUE.
+      AFTER DEPARTURE
+        CHANGES NOT PERMITTED.
+    CANCELLATIONS
+      PER TICKET CHARGE BDT 1500 FOR REFUND.
+      CHARGE BDT 3000 FOR NO-SHOW.
+
+parse_penalties turns that into change / cancel / no-show fees with their
+currency and departure condition. The text only depends on the fare basis,
+so penalty_index parses each (route, paxType, fareBasisCode) once per worker.
+"""
+import logging
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, TypedDict
+
+logger = logging.getLogger(__name__)
+
+PENALTY_INDEX_SIZE = 4096
+
+ANY_TIME = "any_time"
+BEFORE_DEPARTURE = "before_departure"
+AFTER_DEPARTURE = "after_departure"
+
+
+class PenaltyCharge(TypedDict):
+    """One fee; either an amount in a currency or a percentage of the fare."""
+    amount: Optional[float]
+    currency: Optional[str]
+    percent: Optional[float]
+    applies: str  # ANY_TIME, BEFORE_DEPARTURE or AFTER_DEPARTURE
+
+
+class AdaptedPenalties(TypedDict):
+    change_permitted: Optional[bool]  # None when the text does not say
+    cancel_permitted: Optional[bool]
+    change_fees: List[PenaltyCharge]
+    cancel_fees: List[PenaltyCharge]
+    no_show_fees: List[PenaltyCharge]
+    currency: Optional[str]
+
+
+# --- Precompiled patterns, shared by every parse ---
+_CHANGE_RE = re.compile(r"\b(?:CHANGES?|REISSUE|REBOOK(?:ING)?|REVALIDATION|DATE CHANGE)\b")
+_CANCEL_RE = re.compile(r"\b(?:CANCELL?ATIONS?|CANCEL|REFUNDS?)\b")
+_BEFORE_RE = re.compile(r"\b(?:BEFORE|PRIOR TO)\s+(?:DEPARTURE|DEP)\b")
+_AFTER_RE = re.compile(r"\bAFTER\s+(?:DEPARTURE|DEP)\b")
+_ANY_TIME_RE = re.compile(r"\bANY\s*TIME\b")
+_NO_SHOW_RE = re.compile(r"\bNO[\s-]?SHOW\b")
+_NON_REFUNDABLE_RE = re.compile(r"\bNON[\s-]?REF(?:UNDABLE)?\b")
+_NON_CHANGEABLE_RE = re.compile(r"\bNON[\s-]?CHANGEABLE\b")
+_NOT_PERMITTED_RE = re.compile(r"\bNOT\s+(?:PERMITTED|ALLOWED)\b|\bNON[\s-]?(?:REF(?:UNDABLE)?|CHANGEABLE)\b")
+_FREE_RE = re.compile(r"\b(?:FREE OF CHARGE|WITHOUT CHARGE|NO CHARGE|WAIVED)\b")
+_AMOUNT_RE = re.compile(r"\bCHARGE\s+([A-Z]{3})\s*(\d[\d,]*(?:\.\d+)?)")
+_PERCENT_RE = re.compile(r"\bCHARGE\s+(\d+(?:\.\d+)?)\s*(?:PERCENT|PCT|%)")
+_FOR_CHANGE_RE = re.compile(r"\bFOR\s+(?:REISSUE|REBOOKING|REVALIDATION|CHANGES?)\b")
+_FOR_CANCEL_RE = re.compile(r"\bFOR\s+(?:REFUND|CANCELL?ATION)\b")
+
+
+def _empty_penalties() -> AdaptedPenalties:
+    return {
+        "change_permitted": None,
+        "cancel_permitted": None,
+        "change_fees": [],
+        "cancel_fees": [],
+        "no_show_fees": [],
+        "currency": None,
+    }
+
+
+def _charge(line: str, applies: str) -> Optional[PenaltyCharge]:
+    match = _AMOUNT_RE.search(line)
+    if match:
+        return {"amount": float(match.group(2).replace(",", "")), "currency": match.group(1), "percent": None, "applies": applies}
+    match = _PERCENT_RE.search(line)
+    if match:
+        return {"amount": None, "currency": None, "percent": float(match.group(1)), "applies": applies}
+    if _FREE_RE.search(line):
+        return {"amount": 0.0, "currency": None, "percent": None, "applies": applies}
+    return None
+
+
+def _phase(line: str) -> Optional[str]:
+    """The departure condition a line names, if any."""
+    if _BEFORE_RE.search(line):
+        return BEFORE_DEPARTURE
+    if _AFTER_RE.search(line):
+        return AFTER_DEPARTURE
+    if _ANY_TIME_RE.search(line):
+        return ANY_TIME
+    return None
+
+
+def parse_penalties(text: str) -> AdaptedPenalties:
+    """
+    Parse a PENALTIES rule text line by line. Section headers (CHANGES,
+    CANCELLATIONS) and departure-condition headers (BEFORE / AFTER DEPARTURE,
+    ANY TIME) carry over to the lines below them; a new section starts over at
+    any time. A condition named in a fee or "NOT PERMITTED" clause applies to
+    that clause only. A "FOR REISSUE" / "FOR REFUND" on a charge line, or a
+    line naming only one of the two, overrides the section. A fee marks its
+    section as permitted; "NOT PERMITTED" only marks it forbidden if no fee
+    was seen.
+    """
+    penalties = _empty_penalties()
+    section: Optional[str] = None
+    applies = ANY_TIME
+
+    for raw_line in text.upper().splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        charge = _charge(line, applies)
+        mentions_cancel = bool(_CANCEL_RE.search(line))
+        mentions_change = bool(_CHANGE_RE.search(line))
+        mentioned = None
+        if mentions_cancel != mentions_change:
+            mentioned = "cancel" if mentions_cancel else "change"
+        not_permitted = bool(_NOT_PERMITTED_RE.search(line))
+        phase = _phase(line)
+        if mentioned and charge is None:
+            # Header lines open a section; its departure condition starts over
+            section, applies = mentioned, ANY_TIME
+        if charge is not None:
+            charge["applies"] = phase or applies
+        elif phase is not None and not not_permitted:
+            applies = phase
+
+        line_section = mentioned or section
+        if _NON_REFUNDABLE_RE.search(line) or _FOR_CANCEL_RE.search(line):
+            line_section = "cancel"
+        elif _NON_CHANGEABLE_RE.search(line) or _FOR_CHANGE_RE.search(line):
+            line_section = "change"
+
+        if not_permitted:
+            # Changes not permitted after departure still leaves a fee before it
+            if line_section is not None and not penalties[f"{line_section}_fees"]:
+                penalties[f"{line_section}_permitted"] = False
+            continue
+        if charge is None:
+            continue
+        if _NO_SHOW_RE.search(line):
+            penalties["no_show_fees"].append(charge)
+        elif line_section is not None:
+            penalties[f"{line_section}_fees"].append(charge)
+            penalties[f"{line_section}_permitted"] = True
+        if charge["currency"] and not penalties["currency"]:
+            penalties["currency"] = charge["currency"]
+
+    return penalties
+
+
+def penalties_from_rule_details(rule_details: List[Dict[str, str]]) -> Optional[AdaptedPenalties]:
+    """Parse the Penalties category of adapted rule details; None if there is none."""
+    texts = [detail["rules_text"] for detail in rule_details if "PENALT" in detail["category_name"].upper()]
+    if not texts:
+        return None
+    return parse_penalties("\n".join(texts))
+
+
+class PenaltyIndex:
+    """
+    Parsed penalties per (route, paxType, fareBasisCode), bounded LRU.
+    Rule texts for a fare basis are identical across offers and searches, so
+    each multi-kilobyte text is parsed once per worker.
+    """
+
+    def __init__(self, maxsize: int = PENALTY_INDEX_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[str, str, str], Optional[AdaptedPenalties]]" = OrderedDict()
+        self.hits = 0
+        self.parses = 0
+
+    def get(self, route: str, pax_type: str, fare_basis_code: str) -> Tuple[bool, Optional[AdaptedPenalties]]:
+        key = (route, pax_type, fare_basis_code)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, self._entries[key]
+        return False, None
+
+    def put(self, route: str, pax_type: str, fare_basis_code: str, penalties: Optional[AdaptedPenalties]):
+        key = (route, pax_type, fare_basis_code)
+        self._entries[key] = penalties
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get_or_parse(self, route: str, pax_type: str, fare_basis_code: str, rule_details: List[Dict[str, str]]) -> Optional[AdaptedPenalties]:
+        found, penalties = self.get(route, pax_type, fare_basis_code)
+        if found:
+            return penalties
+        penalties = penalties_from_rule_details(rule_details)
+        self.parses += 1
+        self.put(route, pax_type, fare_basis_code, penalties)
+        return penalties
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "parses": self.parses}
+
+
+penalty_index = PenaltyIndex()
@@ -200,10 +200,24 @@
 
 #adapters/combined_search.py
 
-import pandas as pd
-import json
 import logging
-from app.flight_services.services.ailineLogoService import get_airline_by_id
+from typing import Dict, List, Optional, Tuple
+from app.flight_services.services.ailineLogoService import airline_registry
+from app.flight_services.services.airport_index import get_airport
+from app.flight_services.models.combined.itinerary import (
+    BDFARE,
+    FLYHUB,
+    Baggage,
+    Endpoint,
+    Fare,
+    Itinerary,
+    Segment,
+    bdfare_total_price,
+    merge_duplicates,
+    to_float,
+)
+from app.flight_services.utils.metrics import FLIGHT_FORMAT_SECONDS, observe_seconds
+from app.flight_services.utils.tracing import span
 
 # ------------------------------------------------------------------------------
 # Configure logging
@@ -215,374 +229,367 @@ formatter = logging.Formatter("[%(asctime)s] %(levelname)s: %(message)s")
 handler.setFormatter(formatter)
 logger.addHandler(handler)
 
+UNKNOWN_CITY = "Unknown City"
+UNKNOWN_AIRPORT = "Unknown Airport"
+
 # ------------------------------------------------------------------------------
-# Load airport data from JSON file into a DataFrame
+# Helper function: get city by IATA code (O(1) lookup in the airport index)
 # ------------------------------------------------------------------------------
-with open('app/flight_services/data/airports.json', 'r', encoding='utf-8') as file:
-    airport_data = json.load(file)
-
-airports_df = pd.json_normalize(airport_data)
-airports_df.rename(columns={
-    'IATA': 'iata_code',
-    'Airport name': 'airport_name',
-    'City': 'city',
-    'Country': 'country'
-}, inplace=True)
-airports_df.dropna(subset=['iata_code'], inplace=True)
-
 def get_city_by_code(iata_code):
-    logger.info(f"Fetching city for IATA code: {iata_code}")
-    if airports_df is not None:
-        result = airports_df.loc[airports_df['iata_code'].str.upper() == iata_code.upper(), 'city']
-        if not result.empty:
-            city = result.values[0]
-            logger.info(f"Found city: {city} for IATA code: {iata_code}")
-            return city
-    logger.warning(f"City not found for IATA code: {iata_code}")
-    return "Unknown City"
+    airport = get_airport(iata_code)
+    if airport is None:
+        logger.debug(f"City not found for IATA code: {iata_code}")
+        return UNKNOWN_CITY
+    return airport.city
 
 # ------------------------------------------------------------------------------
-# Helper function: get airport name by IATA code
+# Helper function: get airport name by IATA code (O(1) lookup in the airport index)
 # ------------------------------------------------------------------------------
 def get_airport_name_by_code(iata_code):
-    logger.info(f"Fetching airport name for IATA code: {iata_code}")
-    if airports_df is not None:
-        result = airports_df.loc[airports_df['iata_code'].str.upper() == iata_code.upper(), 'airport_name']
-        if not result.empty:
-            airport_name = result.values[0]
-            logger.info(f"Found airport name: {airport_name} for IATA code: {iata_code}")
-            return airport_name
-    logger.warning(f"Airport name not found for IATA code: {iata_code}")
-    return "Unknown Airport"
+    airport = get_airport(iata_code)
+    if airport is None:
+        logger.debug(f"Airport name not found for IATA code: {iata_code}")
+        return UNKNOWN_AIRPORT
+    return airport.name
+
+# ------------------------------------------------------------------------------
+# Per-call lookup memo
+# ------------------------------------------------------------------------------
+class FormatLookups:
+    """
+    Memoizes airport and airline lookups for one formatting pass.
+    A response repeats the same few airports and carriers across hundreds of
+    segments. The memo is local to the call, so formatting stays pure and can
+    run in a thread or process pool.
+    """
+    __slots__ = ("_airports", "_logos")
+
+    def __init__(self):
+        self._airports: Dict[Optional[str], Tuple[str, str]] = {}
+        self._logos: Dict[Optional[str], str] = {}
+
+    def airport(self, iata_code: Optional[str]) -> Tuple[str, str]:
+        """Return (airport name, city name) for an IATA code."""
+        value = self._airports.get(iata_code)
+        if value is None:
+            airport = get_airport(iata_code)
+            value = (airport.name, airport.city) if airport else (UNKNOWN_AIRPORT, UNKNOWN_CITY)
+            self._airports[iata_code] = value
+        return value
+
+    def logo(self, carrier_code: Optional[str]) -> str:
+        value = self._logos.get(carrier_code)
+        if value is None:
+            value = self._logos[carrier_code] = airline_registry.get_logo(carrier_code)
+        return value
+
+# ------------------------------------------------------------------------------
+# Helper function: fix bdfare's misspelt "curreny" key without mutating the input
+# ------------------------------------------------------------------------------
+def _fix_currency(value):
+    if isinstance(value, dict) and "curreny" in value:
+        fixed = {key: item for key, item in value.items() if key != "curreny"}
+        fixed["currency"] = value["curreny"]
+        return fixed
+    return value
 
 # ------------------------------------------------------------------------------
-# Helper function: process a single bdfare offer (all fields except IDs)
+# Helper function: process a single bdfare segment
 # ------------------------------------------------------------------------------
-def process_bdfare_offer(offer):
+def _process_bdfare_segment(seg, lookups):
+    departure = seg.get("departure") or {}
+    arrival = seg.get("arrival") or {}
+    dep_code = departure.get("iatA_LocationCode")
+    arr_code = arrival.get("iatA_LocationCode")
+    dep_airport_name, dep_city = lookups.airport(dep_code)
+    arr_airport_name, arr_city = lookups.airport(arr_code)
+    marketing = seg.get("marketingCarrierInfo", {})
+    carrier = (marketing or {}).get("carrierDesigCode")
+    return Segment(
+        BDFARE,
+        Endpoint(dep_code, departure.get("terminalName"), departure.get("aircraftScheduledDateTime"), dep_airport_name, dep_city),
+        Endpoint(arr_code, arrival.get("terminalName"), arrival.get("aircraftScheduledDateTime"), arr_airport_name, arr_city),
+        carrier=carrier,
+        carrier_name=(marketing or {}).get("carrierName"),
+        flight_number=seg.get("flightNumber"),
+        marketing=marketing,
+        operating=seg.get("operatingCarrierInfo", {}),
+        logo=lookups.logo(carrier),
+        aircraft=(seg.get("iatA_AircraftType") or {}).get("iatA_AircraftTypeCode"),
+        booking_class=seg.get("rbd"),
+        cabin=seg.get("cabinType"),
+        duration=seg.get("duration", "0"),
+        segment_group=seg.get("segmentGroup"),
+        return_journey=seg.get("returnJourney"),
+        airline_pnr=seg.get("airlinePNR"),
+        technical_stop_over=seg.get("technicalStopOver"),
+    )
+
+# ------------------------------------------------------------------------------
+# Helper function: process a single bdfare offer
+# ------------------------------------------------------------------------------
+def process_bdfare_offer(offer, trace_id=None, meta=None, lookups=None):
     """
-    Returns a dictionary containing all data from a bdfare offer,
-    with unified key names. Now also includes the offerId.
+    Returns a one-way Itinerary holding all data from a bdfare offer.
+    The offer is read once and never modified.
     """
-    result = {}
-    # Capture offerId
-    result["OfferId"] = offer.get("offerId")
-    # Include twoOnewayIndex if present
-    if "twoOnewayIndex" in offer:
-        result["TwoOnewayIndex"] = offer.get("twoOnewayIndex")
-    result["ValidatingCarrier"] = offer.get("validatingCarrier")
-    result["Refundable"] = offer.get("refundable")
-    result["FareType"] = offer.get("fareType")
-    
+    lookups = lookups or FormatLookups()
+
     # --- Price breakdown (raw "price" object) ---
-    if "price" in offer:
-        price_raw = offer["price"]
-        def fix_currency(obj):
-            if isinstance(obj, dict) and "curreny" in obj:
-                obj["currency"] = obj.pop("curreny")
-            return obj
-        result["PriceBreakdown"] = { key: fix_currency(value) for key, value in price_raw.items() }
-    else:
-        result["PriceBreakdown"] = {}
-    
+    price_breakdown = {key: _fix_currency(value) for key, value in offer["price"].items()} if "price" in offer else {}
+    total_payable = price_breakdown.get("totalPayable")
+
     # --- Fare details (from fareDetailList) ---
-    fare_details = []
+    fares = []
     for item in offer.get("fareDetailList", []):
-        fare = item.get("fareDetail", {})
-        fare_details.append({
-            "BaseFare": fare.get("baseFare"),
-            "Tax": fare.get("tax"),
-            "OtherFee": fare.get("otherFee"),
-            "Discount": fare.get("discount"),
-            "VAT": fare.get("vat"),
-            "Currency": fare.get("currency"),
-            "PaxType": fare.get("paxType"),
-            "PaxCount": fare.get("paxCount"),
-            "SubTotal": fare.get("subTotal")
-        })
-    result["FareDetails"] = fare_details
-
-    # --- Process segments from paxSegmentList ---
-    segments = []
-    for seg_item in offer.get("paxSegmentList", []):
-        seg = seg_item.get("paxSegment", {})
-        departure = seg.get("departure", {})
-        arrival = seg.get("arrival", {})
-        # Add Logo field using marketingCarrierInfo's carrierDesigCode
-        logo = get_airline_by_id(seg.get("marketingCarrierInfo", {}).get("carrierDesigCode", "Unknown")).get("logo", "Logo not available")
-        segment_obj = {
-            "Departure": {
-                "IATACode": departure.get("iatA_LocationCode"),
-                "Terminal": departure.get("terminalName"),
-                "ScheduledTime": departure.get("aircraftScheduledDateTime"),
-                "AirportName": get_airport_name_by_code(departure.get("iatA_LocationCode")),
-                 "CityName": get_city_by_code(departure.get("iatA_LocationCode"))
-            },
-            "Arrival": {
-                "IATACode": arrival.get("iatA_LocationCode"),
-                "Terminal": arrival.get("terminalName"),
-                "ScheduledTime": arrival.get("aircraftScheduledDateTime"),
-                "AirportName": get_airport_name_by_code(arrival.get("iatA_LocationCode")),
-                  "CityName": get_city_by_code(arrival.get("iatA_LocationCode"))
-            },
-            "MarketingCarrier": seg.get("marketingCarrierInfo", {}),
-            "OperatingCarrier": seg.get("operatingCarrierInfo", {}),
-            "Logo": logo,   # <-- Added airline logo here
-            "AircraftType": seg.get("iatA_AircraftType", {}).get("iatA_AircraftTypeCode"),
-            "RBD": seg.get("rbd"),
-            "FlightNumber": seg.get("flightNumber"),
-            "SegmentGroup": seg.get("segmentGroup"),
-            "ReturnJourney": seg.get("returnJourney"),
-            "AirlinePNR": seg.get("airlinePNR"),
-            "TechnicalStopOver": seg.get("technicalStopOver"),
-            "Duration": f"{seg.get('duration', '0')} minutes",
-            "CabinType": seg.get("cabinType")
-        }
-        segments.append(segment_obj)
-    result["Segments"] = segments
+        fare = item.get("fareDetail") or {}
+        fares.append(Fare(
+            BDFARE,
+            base_fare=fare.get("baseFare"),
+            tax=fare.get("tax"),
+            other=fare.get("otherFee"),
+            discount=fare.get("discount"),
+            vat=fare.get("vat"),
+            currency=fare.get("currency"),
+            pax_type=fare.get("paxType"),
+            pax_count=fare.get("paxCount"),
+            subtotal=fare.get("subTotal"),
+        ))
 
     # --- Process baggage allowances ---
-    baggage_list = []
+    baggage = []
     for bag_item in offer.get("baggageAllowanceList", []):
-        bag = bag_item.get("baggageAllowance", {})
-        baggage_list.append({
-            "Departure": bag.get("departure"),
-            "Arrival": bag.get("arrival"),
-            "CheckIn": bag.get("checkIn"),
-            "Cabin": bag.get("cabin")
-        })
-    result["BaggageAllowance"] = baggage_list
-
-    # --- Include upSellBrandList (if any) and seatsRemaining (as integer) ---
-    result["UpSellBrandList"] = offer.get("upSellBrandList")
+        bag = bag_item.get("baggageAllowance") or {}
+        baggage.append(Baggage(bag.get("departure"), bag.get("arrival"), bag.get("checkIn"), bag.get("cabin")))
+
+    # --- seatsRemaining (as integer) ---
     try:
-        result["SeatsRemaining"] = int(offer.get("seatsRemaining", 0))
-    except Exception as e:
-        result["SeatsRemaining"] = 0
+        seats_remaining = int(offer.get("seatsRemaining", 0))
+    except Exception:
+        seats_remaining = 0
+
+    return Itinerary(
+        BDFARE,
+        trace_id=trace_id,
+        offer_id=offer.get("offerId"),
+        validating_carrier=offer.get("validatingCarrier"),
+        refundable=offer.get("refundable"),
+        fare_type=offer.get("fareType"),
+        price=bdfare_total_price(price_breakdown),
+        currency=total_payable.get("currency") if isinstance(total_payable, dict) else None,
+        # --- Process segments from paxSegmentList ---
+        outbound=[
+            _process_bdfare_segment(seg_item.get("paxSegment") or {}, lookups)
+            for seg_item in offer.get("paxSegmentList", [])
+        ],
+        fares=fares,
+        price_breakdown=price_breakdown,
+        baggage=baggage,
+        upsell_brands=offer.get("upSellBrandList"),
+        seats_remaining=seats_remaining,
+        meta=meta,
+    )
 
-    return result
+# ------------------------------------------------------------------------------
+# Helper function: process a single flyhub segment
+# ------------------------------------------------------------------------------
+def _process_flyhub_segment(seg, lookups):
+    origin = seg.get("Origin") or {}
+    destination = seg.get("Destination") or {}
+    origin_airport = origin.get("Airport") or {}
+    destination_airport = destination.get("Airport") or {}
+    airline = seg.get("Airline") or {}
+    origin_code = origin_airport.get("AirportCode")
+    destination_code = destination_airport.get("AirportCode")
+    airline_code = airline.get("AirlineCode")
+    baggage = seg.get("baggageDetails")
+    return Segment(
+        FLYHUB,
+        Endpoint(origin_code, origin_airport.get("Terminal"), origin.get("DepTime"),
+                 origin_airport.get("AirportName"), lookups.airport(origin_code)[1]),
+        Endpoint(destination_code, destination_airport.get("Terminal"), destination.get("ArrTime"),
+                 destination_airport.get("AirportName"), lookups.airport(destination_code)[1]),
+        carrier=airline_code,
+        carrier_name=airline.get("AirlineName"),
+        flight_number=airline.get("FlightNumber"),
+        operating=airline.get("OperatingCarrier"),
+        logo=lookups.logo(airline_code),
+        aircraft=seg.get("Equipment"),
+        booking_class=airline.get("BookingClass"),
+        cabin=airline.get("CabinClass"),
+        duration=seg.get("JourneyDuration", "0"),
+        stops=seg.get("StopQuantity"),
+        baggage=baggage[0].get("Checkin") if baggage else None,
+        segment_group=seg.get("SegmentGroup"),
+    )
 
 # ------------------------------------------------------------------------------
-# Helper function: process a single flyhub result (all fields except IDs)
+# Helper function: process a single flyhub result
 # ------------------------------------------------------------------------------
-def process_flyhub_result(result):
+def process_flyhub_result(result, search_id=None, lookups=None):
     """
-    Returns a dictionary containing all data from a flyhub result,
-    with unified key names. (Omitted: SearchId and ResultID will be added in main.)
+    Returns an Itinerary holding all data from a flyhub result.
+    The result is read once and never modified.
     """
-    flight = {}
-    flight["Source"] = "flyhub"
-    flight["IsRefundable"] = result.get("IsRefundable")
-    flight["FareType"] = result.get("FareType")
-    flight["Discount"] = result.get("Discount")
-    flight["ValidatingCarrier"] = result.get("Validatingcarrier")
-    flight["LastTicketDate"] = result.get("LastTicketDate")
-    # --- Pricing: Process each fare in Fares ---
-    fares = result.get("Fares", [])
-    pricing = []
-    for fare in fares:
-        pricing.append({
-            "BaseFare": fare.get("BaseFare"),
-            "Tax": fare.get("Tax"),
-            "Currency": fare.get("Currency"),
-            "OtherCharges": fare.get("OtherCharges"),
-            "Discount": fare.get("Discount"),
-            "AgentMarkUp": fare.get("AgentMarkUp"),
-            "PaxType": fare.get("PaxType"),
-            "PassengerCount": fare.get("PassengerCount"),
-            "ServiceFee": fare.get("ServiceFee")
-        })
-    flight["Pricing"] = pricing
-
-    # --- Extra flyhub fields ---
-    flight["TotalFare"] = result.get("TotalFare")
-    flight["TotalFareWithAgentMarkup"] = result.get("TotalFareWithAgentMarkup")
-    flight["Currency"] = result.get("Currency")
-    flight["Availabilty"] = result.get("Availabilty")
-    flight["isMiniRulesAvailable"] = result.get("isMiniRulesAvailable")
-    flight["HoldAllowed"] = result.get("HoldAllowed")
-
+    lookups = lookups or FormatLookups()
     # --- Process segments: group by TripIndicator into Outbound and Inbound ---
     outbound_segments = []
     inbound_segments = []
     for seg in result.get("segments", []):
-        seg_obj = {
-            "Departure": {
-                "IATACode": seg.get("Origin", {}).get("Airport", {}).get("AirportCode"),
-                "AirportName": seg.get("Origin", {}).get("Airport", {}).get("AirportName"),
-                "Terminal": seg.get("Origin", {}).get("Airport", {}).get("Terminal"),
-                "ScheduledTime": seg.get("Origin", {}).get("DepTime"),
-                 "CityName": get_city_by_code(seg.get("Origin", {}).get("Airport", {}).get("AirportCode"))
-            },
-            "Arrival": {
-                "IATACode": seg.get("Destination", {}).get("Airport", {}).get("AirportCode"),
-                "AirportName": seg.get("Destination", {}).get("Airport", {}).get("AirportName"),
-                "Terminal": seg.get("Destination", {}).get("Airport", {}).get("Terminal"),
-                "ScheduledTime": seg.get("Destination", {}).get("ArrTime"),
-                 "CityName": get_city_by_code(seg.get("Destination", {}).get("Airport", {}).get("AirportCode"))
-            },
-            "Airline": {
-                "Code": seg.get("Airline", {}).get("AirlineCode"),
-                "Name": seg.get("Airline", {}).get("AirlineName"),
-                "FlightNumber": seg.get("Airline", {}).get("FlightNumber"),
-                "BookingClass": seg.get("Airline", {}).get("BookingClass"),
-                "CabinClass": seg.get("Airline", {}).get("CabinClass"),
-                "OperatingCarrier": seg.get("Airline", {}).get("OperatingCarrier"),
-                "Logo": get_airline_by_id(seg.get("Airline", {}).get("AirlineCode", "Unknown")).get("logo", "Logo not available")
-            },
-            "JourneyDuration": f"{seg.get('JourneyDuration', '0')} minutes",
-            "StopQuantity": seg.get("StopQuantity"),
-            "Equipment": seg.get("Equipment"),
-            "Baggage": seg.get("baggageDetails", [{}])[0].get("Checkin") if seg.get("baggageDetails") else None,
-            "SegmentGroup": seg.get("SegmentGroup")
-        }
-        if seg.get("TripIndicator") == "OutBound":
-            outbound_segments.append(seg_obj)
-        elif seg.get("TripIndicator") == "InBound":
+        seg_obj = _process_flyhub_segment(seg, lookups)
+        if seg.get("TripIndicator") == "InBound":
             inbound_segments.append(seg_obj)
         else:
-            outbound_segments.append(seg_obj)  # fallback
-    flight["OutboundSegments"] = outbound_segments
-    flight["InboundSegments"] = inbound_segments
+            outbound_segments.append(seg_obj)  # "OutBound", or fallback
+
+    return Itinerary(
+        FLYHUB,
+        itinerary_type=None,
+        search_id=search_id,
+        result_id=result.get("ResultID"),
+        validating_carrier=result.get("Validatingcarrier"),
+        refundable=result.get("IsRefundable"),
+        fare_type=result.get("FareType"),
+        price=to_float(result.get("TotalFare")),
+        currency=result.get("Currency"),
+        outbound=outbound_segments,
+        inbound=inbound_segments,
+        # --- Pricing: Process each fare in Fares ---
+        fares=[
+            Fare(
+                FLYHUB,
+                base_fare=fare.get("BaseFare"),
+                tax=fare.get("Tax"),
+                currency=fare.get("Currency"),
+                other=fare.get("OtherCharges"),
+                discount=fare.get("Discount"),
+                agent_markup=fare.get("AgentMarkUp"),
+                pax_type=fare.get("PaxType"),
+                pax_count=fare.get("PassengerCount"),
+                service_fee=fare.get("ServiceFee"),
+            )
+            for fare in result.get("Fares", [])
+        ],
+        discount=result.get("Discount"),
+        last_ticket_date=result.get("LastTicketDate"),
+        total_fare=result.get("TotalFare"),
+        total_fare_with_markup=result.get("TotalFareWithAgentMarkup"),
+        availability=result.get("Availabilty"),
+        mini_rules_available=result.get("isMiniRulesAvailable"),
+        hold_allowed=result.get("HoldAllowed"),
+    )
 
-    return flight
+# ------------------------------------------------------------------------------
+# Helper functions: normalize each provider's response
+# ------------------------------------------------------------------------------
+def _normalize_bdfare(bdfare_data, lookups):
+    itineraries = []
+    response = bdfare_data.get("response") or {}
+    # Include the overall TraceId from the bdfare response
+    trace_id = response.get("traceId")
+    # Create a metadata dictionary from the top-level bdfare data
+    bdfare_meta = {
+        "Message": bdfare_data.get("message"),
+        "RequestedOn": bdfare_data.get("requestedOn"),
+        "RespondedOn": bdfare_data.get("respondedOn"),
+        "StatusCode": bdfare_data.get("statusCode"),
+        "Success": bdfare_data.get("success"),
+        "Error": bdfare_data.get("error"),
+        "Info": bdfare_data.get("info"),
+        "SpecialReturn": response.get("specialReturn"),
+        "MoreOffersAvailableAirline": response.get("moreOffersAvailableAirline"),
+        "TraceId": trace_id
+    }
+    special_group = response.get("specialReturnOffersGroup")
+    # Process return flight offers from specialReturnOffersGroup
+    if response.get("specialReturn") or special_group:
+        special_group = special_group or {}
+        outbound_offers = []
+        inbound_offers = []
+        # Process offers from "ob" and assign them based on route
+        origin = None
+        destination = None
+        for o in special_group.get("ob", []):
+            processed = process_bdfare_offer(o.get("offer") or {}, trace_id, bdfare_meta, lookups)
+            if not processed.outbound:
+                continue
+            first_seg = processed.outbound[0]
+            first_dep = first_seg.departure.iata
+            first_arr = first_seg.arrival.iata
+            # For the very first offer, assume it is outbound and record its route.
+            if origin is None and destination is None:
+                origin, destination = first_dep, first_arr
+                outbound_offers.append(processed)
+            # If the offer's first segment appears inverted, treat it as inbound.
+            elif first_dep == destination and first_arr == origin:
+                inbound_offers.append(processed)
+            else:
+                outbound_offers.append(processed)
+        # Also process offers from "ib" (or fallback "inb")
+        ib_offers = special_group.get("ib", []) or special_group.get("inb") or []
+        for o in ib_offers:
+            inbound_offers.append(process_bdfare_offer(o.get("offer") or {}, trace_id, bdfare_meta, lookups))
+        # Pair outbound and inbound offers by index
+        for ob, ib in zip(outbound_offers, inbound_offers):
+            itineraries.append(Itinerary.pair(ob, ib))
+    # Process one-way (or multi-city one-way) offers if available in offersGroup
+    elif response.get("offersGroup"):
+        offers_group = response["offersGroup"]
+        if isinstance(offers_group, dict):
+            offers = offers_group.get("ob", [])
+        elif isinstance(offers_group, list):
+            offers = offers_group
+        else:
+            offers = []
+        for item in offers:
+            itineraries.append(process_bdfare_offer(item.get("offer") or {}, trace_id, bdfare_meta, lookups))
+    else:
+        logger.info("bdfare data received does not contain recognized offersGroup or specialReturnOffersGroup.")
+    return itineraries
+
+
+def _normalize_flyhub(flyhub_data, lookups):
+    search_id = flyhub_data.get("SearchId")
+    return [process_flyhub_result(res, search_id, lookups) for res in flyhub_data.get("Results", [])]
 
 # ------------------------------------------------------------------------------
-# Main function: format_flight_data_with_ids
+# Main functions: normalize_flight_data and format_flight_data_with_ids
 # ------------------------------------------------------------------------------
-def format_flight_data_with_ids(data):
+def normalize_flight_data(data) -> List[Itinerary]:
     """
-    Processes raw flight response data from bdfare and flyhub and returns
-    a unified structure that includes every piece of data (with the same naming)
-    including IDs:
+    Normalizes raw flight response data from bdfare and flyhub into typed
+    Itinerary objects, bdfare first. IDs are kept on each itinerary:
       - For bdfare: TraceId (once for the response) and each flight's OfferId.
       - For flyhub: SearchId (once for the response) and each flight's ResultID.
     For bdfare return flights, outbound and inbound offers are paired by index.
+
+    The function is pure: provider responses are walked once and never
+    modified, and lookups are memoized per call, so large responses can be
+    normalized in a thread or process pool.
     """
-    flights = []
+    lookups = FormatLookups()
+    itineraries = []
 
     # --- Process bdfare data ---
-    if "bdfare" in data and data["bdfare"].get("response"):
-        bdfare_data = data["bdfare"]
-        response = bdfare_data.get("response", {})
-        # Include the overall TraceId from the bdfare response
-        trace_id = response.get("traceId")
-        # Create a metadata dictionary from the top-level bdfare data
-        bdfare_meta = {
-            "Message": bdfare_data.get("message"),
-            "RequestedOn": bdfare_data.get("requestedOn"),
-            "RespondedOn": bdfare_data.get("respondedOn"),
-            "StatusCode": bdfare_data.get("statusCode"),
-            "Success": bdfare_data.get("success"),
-            "Error": bdfare_data.get("error"),
-            "Info": bdfare_data.get("info"),
-            "SpecialReturn": response.get("specialReturn"),
-            "MoreOffersAvailableAirline": response.get("moreOffersAvailableAirline"),
-            "TraceId": trace_id
-        }
-        # Process return flight offers from specialReturnOffersGroup
-        if response.get("specialReturn") or response.get("specialReturnOffersGroup"):
-            special_group = response.get("specialReturnOffersGroup", {})
-            outbound_offers = []
-            inbound_offers = []
-            # Process offers from "ob" and assign them based on route
-            ob_offers = special_group.get("ob", [])
-            origin = None
-            destination = None
-            for idx, o in enumerate(ob_offers):
-                processed = process_bdfare_offer(o.get("offer", {}))
-                if processed["Segments"]:
-                    first_seg = processed["Segments"][0]
-                    # For the very first offer, assume it is outbound and record its route.
-                    if origin is None and destination is None:
-                        origin = first_seg["Departure"]["IATACode"]
-                        destination = first_seg["Arrival"]["IATACode"]
-                        outbound_offers.append(processed)
-                    else:
-                        # If the offer's first segment appears inverted, treat it as inbound.
-                        if (first_seg["Departure"]["IATACode"] == destination and
-                            first_seg["Arrival"]["IATACode"] == origin):
-                            inbound_offers.append(processed)
-                        else:
-                            outbound_offers.append(processed)
-            # Also process offers from "ib" (or fallback "inb")
-            ib_offers = special_group.get("ib", [])
-            if not ib_offers and special_group.get("inb"):
-                ib_offers = special_group.get("inb", [])
-            for o in ib_offers:
-                processed = process_bdfare_offer(o.get("offer", {}))
-                inbound_offers.append(processed)
-            # Pair outbound and inbound offers by index
-            num_pairs = min(len(outbound_offers), len(inbound_offers))
-            for i in range(num_pairs):
-                ob = outbound_offers[i]
-                ib = inbound_offers[i]
-                flight_obj = {
-                    "Source": "bdfare",
-                    "TraceId": trace_id,
-                    "OfferIdOutbound": ob.get("OfferId"),
-                    "OfferIdInbound": ib.get("OfferId"),
-                    "ValidatingCarrier": ob.get("ValidatingCarrier") or ib.get("ValidatingCarrier"),
-                    "Refundable": ob.get("Refundable") and ib.get("Refundable"),
-                    "FareType": ob.get("FareType"),
-                    "Pricing": {
-                        "FareDetails": {"Outbound": ob.get("FareDetails"), "Inbound": ib.get("FareDetails")},
-                        "PriceBreakdown": {"Outbound": ob.get("PriceBreakdown"), "Inbound": ib.get("PriceBreakdown")}
-                    },
-                    "OutboundSegments": ob.get("Segments"),
-                    "InboundSegments": ib.get("Segments"),
-                    "Baggage": {"Outbound": ob.get("BaggageAllowance"), "Inbound": ib.get("BaggageAllowance")},
-                    "UpSellBrandList": ob.get("UpSellBrandList") if ob.get("UpSellBrandList") is not None else ib.get("UpSellBrandList"),
-                    "SeatsRemaining": min(ob.get("SeatsRemaining", 0), ib.get("SeatsRemaining", 0)),
-                    "Extra": bdfare_meta,
-                    "ItineraryType": "return"
-                }
-                flights.append(flight_obj)
-        # Process one-way (or multi-city one-way) offers if available in offersGroup
-        elif response.get("offersGroup"):
-            offers_group = response.get("offersGroup")
-            if isinstance(offers_group, dict):
-                offers = offers_group.get("ob", [])
-            elif isinstance(offers_group, list):
-                offers = offers_group
-            else:
-                offers = []
-            for item in offers:
-                offer = process_bdfare_offer(item.get("offer", {}))
-                flight_obj = {
-                    "Source": "bdfare",
-                    "TraceId": trace_id,
-                    "OfferId": offer.get("OfferId"),
-                    "ValidatingCarrier": offer.get("ValidatingCarrier"),
-                    "Refundable": offer.get("Refundable"),
-                    "FareType": offer.get("FareType"),
-                    "Pricing": offer.get("PriceBreakdown"),
-                    "FareDetails": offer.get("FareDetails"),
-                    "Penalty": offer.get("Penalty"),
-                    "OutboundSegments": offer.get("Segments"),
-                    "InboundSegments": [],
-                    "Baggage": offer.get("BaggageAllowance"),
-                    "UpSellBrandList": offer.get("UpSellBrandList"),
-                    "SeatsRemaining": offer.get("SeatsRemaining"),
-                    "Extra": bdfare_meta,
-                    "ItineraryType": "oneway"
-                }
-                flights.append(flight_obj)
-        else:
-            logger.info("bdfare data received does not contain recognized offersGroup or specialReturnOffersGroup.")
+    # A provider that failed in a combined search is present with a None value
+    bdfare_data = data.get("bdfare")
+    if bdfare_data and bdfare_data.get("response"):
+        itineraries.extend(_normalize_bdfare(bdfare_data, lookups))
 
     # --- Process flyhub data ---
-    if "flyhub" in data:
-        flyhub_data = data["flyhub"]
-        search_id = flyhub_data.get("SearchId")
-        results = flyhub_data.get("Results", [])
-        for res in results:
-            flight_obj = process_flyhub_result(res)
-            # Add flyhub IDs:
-            flight_obj["SearchId"] = search_id
-            flight_obj["ResultID"] = res.get("ResultID")
-            flight_obj["Source"] = "flyhub"
-            flights.append(flight_obj)
-
-    return {"Flights": flights}
-
-#updated
\ No newline at end of file
+    flyhub_data = data.get("flyhub")
+    if flyhub_data:
+        itineraries.extend(_normalize_flyhub(flyhub_data, lookups))
+
+    return itineraries
+
+
+def format_flight_data_with_ids(data):
+    """
+    Returns {"Flights": [...]} in the combined search JSON shape; see
+    normalize_flight_data for how the raw responses are read. Flights offered
+    by both providers appear once, at the cheaper fare, with the other offer
+    under "AlternativeOffers" (see merge_duplicates).
+    """
+    with span("adapter.format_flight_data_with_ids"), observe_seconds(FLIGHT_FORMAT_SECONDS, "combined"):
+        return {"Flights": [itinerary.to_dict() for itinerary in merge_duplicates(normalize_flight_data(data))]}
@@ -2,8 +2,6 @@
 from typing import List
 import httpx
 import json
-import requests
-import asyncio
 from typing import Dict, Any
 from fastapi import HTTPException
 import os
@@ -11,6 +9,7 @@ import logging
 from dotenv import load_dotenv  # Import dotenv
 from app.flight_services.adapters.airprebook_bdfare import adapt_to_bdfare_airprebook_request
 from app.flight_services.adapters.bdfare_adapter import convert_to_bdfare_request
+from app.flight_services.clients.http_pool import provider_pool
 logger = logging.getLogger("bdfare_client")
 # Load environment variables from .env file
 load_dotenv()
@@ -30,9 +29,6 @@ BDFARE_API_KEY = "T0I1U0RWam5NVHlQWSV5ZmlDTms4ZlZFM0heQ1prOHNfWXdaQnB6dyN1MXJHIV
 if not BDFARE_BASE_URL or not BDFARE_API_KEY:
     raise ValueError("Missing required BDFARE environment variables.")
 
-# Example usage
-print(f"BDFARE_BASE_URL: {BDFARE_BASE_URL}")
-print(f"BDFARE_API_KEY: {BDFARE_API_KEY}")
 
 
 
@@ -45,13 +41,10 @@ async def fetch_bdfare_ticket_cancel(payload: dict) -> dict:
     headers = {"X-API-KEY": BDFARE_API_KEY, "Content-Type": "application/json"}
 
     logger.info(f"Sending Ticket Cancel request to BDFare: {url}")
-    logger.debug(f"Payload: {payload}")
 
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
+        response = await provider_pool.post("bdfare", "OrderCancel", url, json=payload, headers=headers)
         logger.info(f"BDFare Ticket Cancel Response Status: {response.status_code}")
-        logger.debug(f"BDFare Ticket Cancel Response Body: {response.text}")
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -66,13 +59,10 @@ async def fetch_bdfare_ticket_issue(payload: dict) -> dict:
     headers = {"X-API-KEY": BDFARE_API_KEY, "Content-Type": "application/json"}
 
     logger.info(f"Sending Ticket Issue request to BDFare: {url}")
-    logger.debug(f"Payload: {payload}")
 
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
+        response = await provider_pool.post("bdfare", "OrderChange", url, json=payload, headers=headers)
         logger.info(f"BDFare Ticket Issue Response Status: {response.status_code}")
-        logger.debug(f"BDFare Ticket Issue Response Body: {response.text}")
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -96,15 +86,12 @@ async def fetch_bdfare_airretrieve(payload: dict) -> dict:
     headers = {"X-API-KEY": BDFARE_API_KEY, "Content-Type": "application/json"}
 
     logger.info(f"Sending AirRetrieve request to BDFare: {url}")
-    logger.debug(f"Payload: {payload}")
 
     try:
         # Make the POST request to BDFare API
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
+        response = await provider_pool.post("bdfare", "OrderRetrieve", url, json=payload, headers=headers)
 
         logger.info(f"BDFare AirRetrieve Response Status: {response.status_code}")
-        logger.debug(f"BDFare AirRetrieve Response Body: {response.text}")
 
         # Raise for HTTP errors
         response.raise_for_status()
@@ -148,18 +135,13 @@ async def fetch_bdfare_airbook(trace_id: str, offer_ids: List[str], request: dic
     }
 
     logger.info(f"Sending BDFare AirBook request to {url}")
-    logger.debug(f"Headers: {headers}")
-    logger.debug(f"Payload: {payload}")
 
     try:
         # Send the POST request to the BDFare API
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
+        response = await provider_pool.post("bdfare", "OrderCreate", url, json=payload, headers=headers)
 
-        # Log the response status and body
+        # Log the response status
         logger.info(f"BDFare AirBook Response Status: {response.status_code}")
-        logger.debug(f"Response Headers: {response.headers}")
-        logger.debug(f"Response Body: {response.text}")
 
         # Raise an exception if the response status is an HTTP error
         response.raise_for_status()
@@ -196,14 +178,11 @@ async def fetch_bdfare_airprebook(trace_id: str, offer_ids: List[str], request:
     }
 
     logger.info(f"Sending BDFare AirPrebook request to {url}")
-    logger.info(f"Request Payload: {payload}")
 
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
+        response = await provider_pool.post("bdfare", "OrderSell", url, json=payload, headers=headers)
         
         logger.info(f"BDFare Response Status: {response.status_code}")
-        logger.debug(f"BDFare Response Body: {response.text}")
 
         response.raise_for_status()
         return response.json()
@@ -229,15 +208,11 @@ async def fetch_bdfare_airprice(trace_id: str, offer_ids: list) -> dict:
     payload = {"traceId": trace_id, "offerId": offer_ids}
 
     logger.info(f"Sending request to BDFare API. URL: {url}")
-    logger.info(f"Headers: {headers}")
-    logger.info(f"Payload: {payload}")
 
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:  # Increased timeout to 60 seconds
-            response = await client.post(url, json=payload, headers=headers)
+        response = await provider_pool.post("bdfare", "OfferPrice", url, json=payload, headers=headers)
 
         logger.info(f"Response Status Code: {response.status_code}")
-        logger.info(f"Response Body: {response.text}")
 
         response.raise_for_status()  # Raise exception for 4xx/5xx errors
         return response.json()
@@ -259,7 +234,8 @@ async def fetch_bdfare_airprice(trace_id: str, offer_ids: list) -> dict:
     #clients/bdfare_client.py
 async def fetch_bdfare_flights(payload: dict, page: int = 1, size: int = 50) -> dict:
     """
-    Fetch flights from BDFare API with pagination support and a fallback to a synchronous call wrapped in an executor.
+    Fetch flights from BDFare API with pagination support.
+    Transient failures are retried by the provider pool; 4xx responses are not re-sent.
     """
     # Transform the payload and add pagination
     transformed_payload = convert_to_bdfare_request(payload)
@@ -273,62 +249,19 @@ async def fetch_bdfare_flights(payload: dict, page: int = 1, size: int = 50) ->
     }
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(url, json=transformed_payload, headers=headers)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"BDFare API Error: {response.text}"
-            )
-    except Exception:
-        # If httpx fails, fallback to the synchronous request using run_in_executor
-        return await fallback_to_requests_async(url, transformed_payload, page, size)
-
-
-async def fallback_to_requests_async(url: str, payload: dict, page: int = 1, size: int = 50) -> dict:
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, lambda: fallback_to_requests(url, payload, page, size))
-
-
-def fallback_to_requests(url: str, payload: dict, page: int = 1, size: int = 50) -> dict:
-    """
-    Fallback using the requests library if httpx fails.
-    """
-    payload["PageNumber"] = page
-    payload["PageSize"] = size
-
-    headers = {
-        "X-API-KEY": BDFARE_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    try:
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()  # Raise an HTTPError for bad status codes
-        return response.json()
-    except requests.exceptions.HTTPError:
-        raise HTTPException(
-            status_code=response.status_code,
-            detail=f"HTTP request failed: {response.text}"
-        )
-    except requests.exceptions.RequestException as req_err:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Network or request error during API call: {str(req_err)}"
-        )
-    except json.JSONDecodeError as json_err:
-        raise HTTPException(
-            status_code=500,
-            detail=f"JSON decoding failed: {str(json_err)}"
-        )
-    except Exception as e:
+        response = await provider_pool.post("bdfare", "AirShopping", url, json=transformed_payload, headers=headers)
+    except httpx.RequestError as exc:
         raise HTTPException(
-            status_code=500,
-            detail=f"An unexpected error occurred: {str(e)}"
+            status_code=503,
+            detail=f"Network or request error during BDFare AirShopping: {str(exc)}"
         )
-    
+    if response.status_code == 200:
+        return response.json()
+    raise HTTPException(
+        status_code=response.status_code,
+        detail=f"BDFare API Error: {response.text}"
+    )
+
 
 # START OF NEW FUNCTION
 async def fetch_bdfare_farerules(trace_id: str, offer_id: str) -> dict:
@@ -345,19 +278,10 @@ async def fetch_bdfare_farerules(trace_id: str, offer_id: str) -> dict:
     }
 
     logger.info(f"Sending FareRules request to BDFare API. URL: {url}")
-    logger.debug(f"Headers: {headers}")
     try:
-        # Log the exact payload being sent for verification
-        logger.debug(f"Payload being sent to BDFare for FareRules: {json.dumps(payload)}")
-    except Exception:
-        logger.debug(f"Payload for FareRules (raw, could not json.dumps): {payload}")
-
-    try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
+        response = await provider_pool.post("bdfare", "FareRules", url, json=payload, headers=headers)
 
         logger.info(f"BDFare FareRules Response Status Code: {response.status_code}")
-        logger.debug(f"BDFare FareRules Response Body: {response.text}")
 
         response.raise_for_status() # Will raise an exception for 4xx/5xx responses
         return response.json()
@@ -382,6 +306,43 @@ async def fetch_bdfare_farerules(trace_id: str, offer_id: str) -> dict:
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred during FareRules request: {str(e)}")
 
 
+async def fetch_bdfare_minirule(trace_id: str, offer_id: str) -> dict:
+    """
+    Fetch the mini rule (change / refund penalties) from BDFare API for a single offer.
+    """
+    url = f"{BDFARE_BASE_URL}/MiniRule"
+    headers = {"X-API-KEY": BDFARE_API_KEY, "Content-Type": "application/json"}
+    payload = {"traceId": trace_id, "offerId": offer_id}
+
+    logger.info(f"Sending MiniRule request to BDFare API. URL: {url}")
+
+    try:
+        response = await provider_pool.post("bdfare", "MiniRule", url, json=payload, headers=headers)
+
+        logger.info(f"BDFare MiniRule Response Status Code: {response.status_code}")
+
+        response.raise_for_status()
+        return response.json()
+
+    except httpx.ReadTimeout as exc:
+        logger.error(f"BDFare API MiniRule request timed out: {exc}")
+        raise HTTPException(status_code=504, detail="The BDFare API MiniRule request timed out.")
+
+    except httpx.RequestError as exc:
+        logger.error(f"Request error while contacting BDFare API for MiniRule: {exc}")
+        raise HTTPException(status_code=503, detail=f"An error occurred while contacting BDFare API for MiniRule: {str(exc)}")
+
+    except httpx.HTTPStatusError as exc:
+        logger.error(f"BDFare API MiniRule error. Status Code: {exc.response.status_code}, Detail: {exc.response.text}")
+        raise HTTPException(
+            status_code=exc.response.status_code,
+            detail=f"BDFare API MiniRule Error: {exc.response.text}"
+        )
+    except Exception as e:
+        logger.exception("Unexpected error during BDFare MiniRule request.")
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred during MiniRule request: {str(e)}")
+
+
 # Dummy convert_to_bdfare_request for completeness (replace with your actual implementation)
 def convert_to_bdfare_request(payload: dict) -> dict:
     return payload
\ No newline at end of file
@@ -0,0 +1,150 @@
+#app\flight_services\clients\flyhub_auth.py
+import asyncio
+import os
+import time
+import logging
+from typing import Optional
+
+import httpx
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from app.flight_services.clients.http_pool import provider_pool
+from app.flight_services.utils.metrics import TOKEN_REFRESHES
+
+load_dotenv()
+
+logger = logging.getLogger("flyhub_auth")
+
+# Assume token validity is 1 hour (3600 seconds); refresh 5 minutes early.
+TOKEN_TTL_SECONDS = float(os.getenv("FLYHUB_TOKEN_TTL", 3600))
+TOKEN_REFRESH_MARGIN_SECONDS = float(os.getenv("FLYHUB_TOKEN_REFRESH_MARGIN", 300))
+
+
+class TokenManager:
+    """
+    Async FlyHub token cache with single-flight refresh.
+
+    Concurrent callers that find the token missing or expired all await the
+    same /Authenticate call. Once the token enters its refresh margin, callers
+    keep using it while a single background refresh replaces it.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str],
+        username: Optional[str],
+        api_key: Optional[str],
+        ttl: float = TOKEN_TTL_SECONDS,
+        refresh_margin: float = TOKEN_REFRESH_MARGIN_SECONDS,
+    ):
+        self.base_url = base_url
+        self.username = username
+        self.api_key = api_key
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def cached_token(self) -> Optional[str]:
+        """The current token if it has not expired, without refreshing."""
+        if self._token and self._expires_at > time.time():
+            return self._token
+        return None
+
+    @property
+    def expires_at(self) -> float:
+        return self._expires_at
+
+    async def get_token(self) -> str:
+        """Return a valid token, authenticating at most once for all waiters."""
+        now = time.time()
+        if self._token and self._expires_at > now:
+            if self._expires_at - now <= self.refresh_margin:
+                self._start_refresh()
+            return self._token
+        return await asyncio.shield(self._start_refresh())
+
+    def invalidate(self, token: Optional[str] = None):
+        """Drop the cached token, unless it has already been replaced."""
+        if token is None or token == self._token:
+            self._token = None
+            self._expires_at = 0.0
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+            self._refresh_task.add_done_callback(self._record_refresh)
+        return self._refresh_task
+
+    @staticmethod
+    def _record_refresh(task: asyncio.Task):
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            TOKEN_REFRESHES.labels("flyhub", "error").inc()
+            logger.error(f"FlyHub token refresh failed: {task.exception()}")
+        else:
+            TOKEN_REFRESHES.labels("flyhub", "ok").inc()
+
+    async def _refresh(self) -> str:
+        if not self.base_url or not self.base_url.startswith(("http://", "https://")):
+            raise HTTPException(
+                status_code=500,
+                detail=f"Invalid FlyHub Base URL: {self.base_url}. Ensure it starts with 'http://' or 'https://'.",
+            )
+
+        url = f"{self.base_url.rstrip('/')}/Authenticate"
+        payload = {"username": self.username, "apikey": self.api_key}
+
+        try:
+            response = await provider_pool.post("flyhub", "Authenticate", url, json=payload)
+        except httpx.RequestError as exc:
+            raise HTTPException(
+                status_code=500,
+                detail=f"An unexpected error occurred during FlyHub Authentication: {str(exc)}",
+            )
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"FlyHub Authentication Failed: {response.text}",
+            )
+
+        token = response.json().get("TokenId")
+        if not token:
+            raise HTTPException(status_code=500, detail="FlyHub authentication failed. Token is None.")
+
+        self._token = token
+        self._expires_at = time.time() + self.ttl
+        logger.info("FlyHub token retrieved successfully.")
+        return token
+
+
+flyhub_token_manager = TokenManager(
+    base_url=os.getenv("FLYHUB_PRODUCTION_URL"),
+    username=os.getenv("FLYHUB_USERNAME"),
+    api_key=os.getenv("FLYHUB_API_KEY"),
+)
+
+
+async def flyhub_post(operation: str, url: str, **kwargs) -> httpx.Response:
+    """
+    POST to FlyHub with a bearer token from the shared TokenManager.
+    A 401 invalidates the token and the request is retried once with a fresh one.
+    """
+    headers = dict(kwargs.pop("headers", None) or {})
+    headers.setdefault("Content-Type", "application/json")
+
+    token = await flyhub_token_manager.get_token()
+    headers["Authorization"] = f"Bearer {token}"
+    response = await provider_pool.post("flyhub", operation, url, headers=headers, **kwargs)
+
+    if response.status_code == 401:
+        logger.info(f"FlyHub {operation} returned 401; refreshing token and retrying.")
+        flyhub_token_manager.invalidate(token)
+        token = await flyhub_token_manager.get_token()
+        headers["Authorization"] = f"Bearer {token}"
+        response = await provider_pool.post("flyhub", operation, url, headers=headers, **kwargs)
+    return response
@@ -1,14 +1,12 @@
 #app\flight_services\clients\flyhub_client.py
 import httpx
 import json
-import subprocess
 from typing import Dict
 from fastapi import HTTPException
 import os
 import logging
-import time
-import requests
 from dotenv import load_dotenv  # Import dotenv
+from app.flight_services.clients.flyhub_auth import flyhub_post, flyhub_token_manager
 
 # Load environment variables from .env file
 load_dotenv()
@@ -29,10 +27,6 @@ else:
     logger.info("FlyHub environment variables loaded successfully.")
 
 
-# Cached token for FlyHub
-cached_token = {"token": None, "expires_at": 0}
-
-
 def validate_url(url: str):
     """Validate the FlyHub Base URL to ensure it includes a valid protocol."""
     if not url.startswith("http://") and not url.startswith("https://"):
@@ -42,55 +36,20 @@ def validate_url(url: str):
         )
 
 
-def get_flyhub_token() -> str:
+async def get_flyhub_token() -> str:
     """
-    Retrieve a valid token for FlyHub API.
+    Retrieve a valid token for FlyHub API from the shared TokenManager.
     """
-    global cached_token
-
-    # Validate the FlyHub Base URL
-    validate_url(FLYHUB_BASE_URL)
-
-    # Check if the cached token is still valid
-    if cached_token["token"] and cached_token["expires_at"] > time.time():
-        return cached_token["token"]
-
-    # Request a new token
-    url = f"{FLYHUB_BASE_URL}/Authenticate"
-    payload = {"username": FLYHUB_USERNAME, "apikey": FLYHUB_API_KEY}
-
-    try:
-        response = httpx.post(url, json=payload)
-        if response.status_code == 200:
-            token_data = response.json()
-            cached_token["token"] = token_data["TokenId"]
-            # Assume token validity is 1 hour (3600 seconds)
-            cached_token["expires_at"] = time.time() + 3600
-            logger.info("FlyHub token retrieved successfully.")
-            return cached_token["token"]
-        else:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"FlyHub Authentication Failed: {response.text}",
-            )
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"An unexpected error occurred during FlyHub Authentication: {str(e)}",
-        )
+    return await flyhub_token_manager.get_token()
 #updated
 async def fetch_flyhub_ticket_cancel(payload: dict) -> dict:
     url = f"{FLYHUB_BASE_URL}/AirCancel"
-    headers = {"Authorization": f"Bearer {get_flyhub_token()}", "Content-Type": "application/json"}
 
     logger.info(f"Sending Ticket Cancel request to FlyHub: {url}")
-    logger.debug(f"Payload: {payload}")
 
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
+        response = await flyhub_post("AirCancel", url, json=payload)
         logger.info(f"FlyHub Ticket Cancel Response Status: {response.status_code}")
-        logger.debug(f"FlyHub Ticket Cancel Response Body: {response.text}")
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -102,16 +61,12 @@ async def fetch_flyhub_ticket_issue(payload: dict) -> dict:
     Fetch ticket issue details from FlyHub API.
     """
     url = f"{FLYHUB_BASE_URL}/AirTicketing"
-    headers = {"Authorization": f"Bearer {get_flyhub_token()}", "Content-Type": "application/json"}
 
     logger.info(f"Sending Ticket Issue request to FlyHub: {url}")
-    logger.debug(f"Payload: {payload}")
 
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
+        response = await flyhub_post("AirTicketing", url, json=payload)
         logger.info(f"FlyHub Ticket Issue Response Status: {response.status_code}")
-        logger.debug(f"FlyHub Ticket Issue Response Body: {response.text}")
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -132,34 +87,19 @@ async def fetch_flyhub_airretrieve(payload: dict) -> dict:
         HTTPException: If the request fails or an error occurs.
     """
     try:
-        # Get a valid token (from cache or authenticate)
-        token = get_flyhub_token()
-        if not token:
-            raise HTTPException(
-                status_code=500,
-                detail="FlyHub authentication failed. Token is None."
-            )
-        
-        # Set up the API endpoint and headers
+        # Set up the API endpoint
         url = f"{FLYHUB_BASE_URL}/AirRetrieve"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        }
         
-        # Log the request
+        # Log the request; payload and response are logged, sampled and redacted, by the provider pool
         logger.info(f"Sending AirRetrieve request to FlyHub. URL: {url}")
-        logger.info(f"Payload: {payload}")
         
         # Make the HTTP request
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers)
+        response = await flyhub_post("AirRetrieve", url, json=payload)
         
         # Raise for status if response indicates an error
         response.raise_for_status()
         
-        # Log the response
-        logger.info(f"FlyHub AirRetrieve response: {response.json()}")
+        logger.info(f"FlyHub AirRetrieve Response Status: {response.status_code}")
         return response.json()
 
     except httpx.HTTPStatusError as http_err:
@@ -192,20 +132,8 @@ async def fetch_flyhub_airbook(search_id: str, result_id: str, passengers: list)
         HTTPException: If the request fails or an error occurs.
     """
     try:
-        # Get a valid token (from cache or authenticate)
-        token = get_flyhub_token()
-        if not token:
-            raise HTTPException(
-                status_code=500,
-                detail="FlyHub authentication failed. Token is None."
-            )
-        
-        # Set up the API endpoint and headers
+        # Set up the API endpoint
         url = f"{FLYHUB_BASE_URL}/AirBook"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        }
         
         # Create the payload
         payload = {
@@ -214,19 +142,16 @@ async def fetch_flyhub_airbook(search_id: str, result_id: str, passengers: list)
             "Passengers": passengers
         }
         
-        # Log the request
+        # Log the request; payload and response are logged, sampled and redacted, by the provider pool
         logger.info(f"Sending AirBook request to FlyHub. URL: {url}")
-        logger.info(f"Payload: {payload}")
         
         # Make the HTTP request
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers)
+        response = await flyhub_post("AirBook", url, json=payload)
         
         # Raise for status if response indicates an error
         response.raise_for_status()
         
-        # Log the response
-        logger.info(f"FlyHub AirBook response: {response.json()}")
+        logger.info(f"FlyHub AirBook Response Status: {response.status_code}")
         return response.json()
 
     except httpx.HTTPStatusError as http_err:
@@ -260,20 +185,8 @@ async def fetch_flyhub_airprebook(search_id: str, result_id: str, passengers: li
         HTTPException: If the request fails or an error occurs.
     """
     try:
-        # Get a valid token (from cache or authenticate)
-        token = get_flyhub_token()
-        if not token:
-            raise HTTPException(
-                status_code=500,
-                detail="FlyHub authentication failed. Token is None."
-            )
-        
-        # Set up the API endpoint and headers
+        # Set up the API endpoint
         url = f"{FLYHUB_BASE_URL}/AirPreBook"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        }
         
         # Create the payload
         payload = {
@@ -282,19 +195,16 @@ async def fetch_flyhub_airprebook(search_id: str, result_id: str, passengers: li
             "Passengers": passengers
         }
         
-        # Log the request
+        # Log the request; payload and response are logged, sampled and redacted, by the provider pool
         logger.info(f"Sending AirPreBook request to FlyHub. URL: {url}")
-        logger.info(f"Payload: {payload}")
         
         # Make the HTTP request
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers)
+        response = await flyhub_post("AirPreBook", url, json=payload)
         
         # Raise for status if response indicates an error
         response.raise_for_status()
         
-        # Log the response
-        logger.info(f"FlyHub AirPreBook response: {response.json()}")
+        logger.info(f"FlyHub AirPreBook Response Status: {response.status_code}")
         return response.json()
 
     except httpx.HTTPStatusError as http_err:
@@ -326,20 +236,8 @@ async def fetch_flyhub_airprice(search_id: str, result_id: str):
         HTTPException: If the request fails or an error occurs.
     """
     try:
-        # Get a valid token (from cache or authenticate)
-        token = get_flyhub_token()
-        if not token:
-            raise HTTPException(
-                status_code=500,
-                detail="FlyHub authentication failed. Token is None."
-            )
-        
-        # Set up the API endpoint and headers
+        # Set up the API endpoint
         url = f"{FLYHUB_BASE_URL}/AirPrice"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        }
         
         # Create the payload
         payload = {
@@ -347,19 +245,16 @@ async def fetch_flyhub_airprice(search_id: str, result_id: str):
             "ResultID": result_id,
         }
         
-        # Log the request
+        # Log the request; payload and response are logged, sampled and redacted, by the provider pool
         logger.info(f"Sending AirPrice request to FlyHub. URL: {url}")
-        logger.info(f"Payload: {payload}")
         
         # Make the HTTP request
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers)
+        response = await flyhub_post("AirPrice", url, json=payload)
         
         # Raise for status if response indicates an error
         response.raise_for_status()
         
-        # Log the response
-        logger.info(f"FlyHub AirPrice response: {response.json()}")
+        logger.info(f"FlyHub AirPrice Response Status: {response.status_code}")
         return response.json()
 
     except httpx.HTTPStatusError as http_err:
@@ -377,94 +272,29 @@ async def fetch_flyhub_airprice(search_id: str, result_id: str):
         )
 
 
-import asyncio
-import httpx
-import requests
-from fastapi import HTTPException
-
-# Replace these with your actual constants or import them as needed.
-FLYHUB_BASE_URL = "https://your-flyhub-url.com"
-
-# get_flyhub_token(), validate_url(), and cached_token are assumed to be defined elsewhere.
-
 async def fetch_flyhub_flights(payload: dict, page: int = 1, size: int = 50) -> dict:
     """
-    Fetch flights from FlyHub API with a fallback to requests.
+    Fetch flights from FlyHub API.
     Supports pagination using page and size parameters.
+    Transient failures are retried by the provider pool; 4xx responses are not re-sent.
     """
-    token = get_flyhub_token()
-    if not token:
-        raise HTTPException(
-            status_code=500, detail="FlyHub authentication failed. Token is None."
-        )
-
     validate_url(FLYHUB_BASE_URL)
     url = f"{FLYHUB_BASE_URL}/AirSearch"
 
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
-
     # Add pagination to the payload
     payload["PageNumber"] = page
     payload["PageSize"] = size
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"FlyHub API Error: {response.text}"
-            )
-    except Exception:
-        # Fall back to synchronous request wrapped in an executor
-        return await fallback_to_requests_async_flyhub(payload, page, size)
-
-
-async def fallback_to_requests_async_flyhub(payload: dict, page: int = 1, size: int = 50) -> dict:
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(
-        None, lambda: fallback_to_requests_flyhub(payload, page, size)
-    )
-
-
-def fallback_to_requests_flyhub(payload: dict, page: int = 1, size: int = 50) -> dict:
-    """
-    Fallback to the requests library if httpx fails.
-    Supports pagination using page and size parameters.
-    """
-    validate_url(FLYHUB_BASE_URL)
-    url = f"{FLYHUB_BASE_URL}/AirSearch"
-    token = cached_token.get("token", None)
-    if not token:
-        raise HTTPException(
-            status_code=500,
-            detail="Cannot perform requests fallback: Missing authentication token."
-        )
-
-    payload["PageNumber"] = page
-    payload["PageSize"] = size
-
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
-
-    try:
-        response = requests.post(url, json=payload, headers=headers)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Requests API Error: {response.text}"
-            )
-    except requests.exceptions.RequestException as e:
+        response = await flyhub_post("AirSearch", url, json=payload)
+    except httpx.RequestError as exc:
         raise HTTPException(
-            status_code=500,
-            detail=f"Requests fallback error: {str(e)}"
+            status_code=503,
+            detail=f"Network or request error during FlyHub AirSearch: {str(exc)}"
         )
+    if response.status_code == 200:
+        return response.json()
+    raise HTTPException(
+        status_code=response.status_code,
+        detail=f"FlyHub API Error: {response.text}"
+    )
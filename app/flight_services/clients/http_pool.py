@@ -0,0 +1,193 @@
+#app\flight_services\clients\http_pool.py
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+from app.flight_services.clients.retry import get_retry_state, is_retryable
+from app.flight_services.utils.metrics import (
+    PROVIDER_INFLIGHT,
+    PROVIDER_REQUEST_SECONDS,
+    PROVIDER_RESPONSE_BYTES,
+    PROVIDER_RETRIES,
+    status_class,
+)
+from app.flight_services.utils.provider_log import log_exchange
+from app.flight_services.utils.tracing import current_span, span
+
+logger = logging.getLogger("http_pool")
+
+PROVIDERS = ("bdfare", "flyhub")
+
+# Per-operation request timeouts in seconds. Override with HTTP_TIMEOUT_<OPERATION>,
+# e.g. HTTP_TIMEOUT_AIRSHOPPING=15.
+OPERATION_TIMEOUTS: Dict[str, float] = {
+    # Search
+    "AirShopping": 10.0,
+    "AirSearch": 10.0,
+    # Rules
+    "MiniRule": 10.0,
+    "FareRules": 60.0,
+    "AirMiniRules": 10.0,
+    "AirRules": 10.0,
+    # Auth / account
+    "Authenticate": 10.0,
+    "GetBalance": 10.0,
+}
+DEFAULT_TIMEOUT = 60.0
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5.0))
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_operation_timeout(operation: str) -> httpx.Timeout:
+    """Return the timeout for a provider operation, honouring env overrides."""
+    seconds = _env_float(f"HTTP_TIMEOUT_{operation.upper()}", OPERATION_TIMEOUTS.get(operation, DEFAULT_TIMEOUT))
+    return httpx.Timeout(seconds, connect=min(CONNECT_TIMEOUT, seconds))
+
+
+class ProviderPool:
+    """
+    One long-lived httpx.AsyncClient per provider.
+
+    Clients keep connections alive between requests, so searches, pricing and
+    booking calls reuse the TCP/TLS session to each provider host instead of
+    handshaking on every call. Pool limits are configurable per provider with
+    <PROVIDER>_HTTP_MAX_CONNECTIONS, <PROVIDER>_HTTP_MAX_KEEPALIVE and
+    <PROVIDER>_HTTP_KEEPALIVE_EXPIRY; HTTP/2 is used when HTTP2_ENABLED is set
+    (default) and the h2 package is installed.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def _build_client(self, provider: str) -> httpx.AsyncClient:
+        prefix = provider.upper()
+        limits = httpx.Limits(
+            max_connections=_env_int(f"{prefix}_HTTP_MAX_CONNECTIONS", 100),
+            max_keepalive_connections=_env_int(f"{prefix}_HTTP_MAX_KEEPALIVE", 20),
+            keepalive_expiry=_env_float(f"{prefix}_HTTP_KEEPALIVE_EXPIRY", 30.0),
+        )
+        http2 = os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")
+        if http2 and not _http2_available():
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1.")
+            http2 = False
+        logger.info(f"Opening {provider} HTTP client (http2={http2}, limits={limits}).")
+        return httpx.AsyncClient(
+            limits=limits,
+            http2=http2,
+            timeout=httpx.Timeout(DEFAULT_TIMEOUT, connect=CONNECT_TIMEOUT),
+        )
+
+    async def startup(self):
+        """Open a client for every provider. Called from the app startup hook."""
+        for provider in PROVIDERS:
+            self.client(provider)
+
+    async def shutdown(self):
+        """Close every open client. Called from the app shutdown hook."""
+        clients, self._clients = self._clients, {}
+        for provider, client in clients.items():
+            logger.info(f"Closing {provider} HTTP client.")
+            await client.aclose()
+
+    def client(self, provider: str) -> httpx.AsyncClient:
+        """Return the shared client for a provider, creating it on first use."""
+        client = self._clients.get(provider)
+        if client is None or client.is_closed:
+            client = self._build_client(provider)
+            self._clients[provider] = client
+        return client
+
+    async def request(
+        self,
+        provider: str,
+        operation: str,
+        method: str,
+        url: str,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Send a request to a provider through its shared client.
+        Transient failures are retried according to the provider's RetryPolicy;
+        see clients/retry.py for which operations and errors qualify. The
+        policy's deadline bounds the whole call: each attempt's timeout is
+        clipped to the time left.
+        The final exchange is logged, sampled, by utils/provider_log.py, and
+        latency, response size and in-flight calls are recorded in utils/metrics.py,
+        and each call is an "http.request" span (utils/tracing.py).
+        """
+        request_timeout = httpx.Timeout(timeout, connect=min(CONNECT_TIMEOUT, timeout)) if timeout else get_operation_timeout(operation)
+        client = self.client(provider)
+        with span("http.request", provider=provider, operation=operation) as current, \
+                PROVIDER_INFLIGHT.labels(provider, operation).track_inprogress():
+            started = time.monotonic()
+            response = None
+            try:
+                response = await self._send(client, provider, operation, method, url, request_timeout, started, **kwargs)
+            finally:
+                status_code = response.status_code if response is not None else None
+                PROVIDER_REQUEST_SECONDS.labels(provider, operation, status_class(status_code)).observe(time.monotonic() - started)
+                current.set_attribute("http.status_code", status_code)
+        PROVIDER_RESPONSE_BYTES.labels(provider, operation).observe(len(response.content))
+        return response
+
+    async def _send(
+        self,
+        client: httpx.AsyncClient,
+        provider: str,
+        operation: str,
+        method: str,
+        url: str,
+        request_timeout: httpx.Timeout,
+        started: float,
+        **kwargs,
+    ) -> httpx.Response:
+        state = get_retry_state(provider)
+        attempts = 0
+        while True:
+            attempts += 1
+            current_span().set_attribute("attempts", attempts)
+            try:
+                response = await client.request(method, url, timeout=state.attempt_timeout(request_timeout), **kwargs)
+            except httpx.TransportError as exc:
+                delay = state.next_delay() if is_retryable(operation, error=exc) else None
+                if delay is None:
+                    log_exchange(provider, operation, kwargs.get("json"), None, time.monotonic() - started, attempts)
+                    raise
+                logger.warning(f"{provider} {operation} attempt {state.attempt - 1} failed ({exc!r}); retrying in {delay:.2f}s.")
+            else:
+                delay = state.next_delay() if is_retryable(operation, response=response) else None
+                if delay is None:
+                    log_exchange(provider, operation, kwargs.get("json"), response, time.monotonic() - started, attempts)
+                    return response
+                logger.warning(f"{provider} {operation} attempt {state.attempt - 1} returned {response.status_code}; retrying in {delay:.2f}s.")
+            PROVIDER_RETRIES.labels(provider, operation).inc()
+            await asyncio.sleep(delay)
+
+    async def post(self, provider: str, operation: str, url: str, **kwargs) -> httpx.Response:
+        return await self.request(provider, operation, "POST", url, **kwargs)
+
+    async def get(self, provider: str, operation: str, url: str, **kwargs) -> httpx.Response:
+        return await self.request(provider, operation, "GET", url, **kwargs)
+
+
+provider_pool = ProviderPool()
@@ -0,0 +1,159 @@
+#app\flight_services\clients\retry.py
+import os
+import time
+import random
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+logger = logging.getLogger("provider_retry")
+
+# Operations that create, change or cancel bookings. These are only retried
+# when the request provably never reached the provider (connection failures).
+NON_IDEMPOTENT_OPERATIONS = frozenset({
+    "OrderCreate",
+    "OrderSell",
+    "OrderChange",
+    "OrderCancel",
+    "AirBook",
+    "AirPreBook",
+    "AirTicketing",
+    "AirCancel",
+})
+
+RETRYABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+# The request was never sent, so any operation may retry.
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# The request may have been processed; only idempotent operations retry.
+TRANSIENT_ERRORS = (httpx.ReadTimeout, httpx.WriteTimeout, httpx.ReadError, httpx.WriteError, httpx.RemoteProtocolError)
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, capped by a total deadline."""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.2, max_delay: float = 2.0, deadline: float = 30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    @classmethod
+    def from_env(cls, provider: str) -> "RetryPolicy":
+        prefix = provider.upper()
+        return cls(
+            max_attempts=int(os.getenv(f"{prefix}_RETRY_MAX_ATTEMPTS", 3)),
+            base_delay=float(os.getenv(f"{prefix}_RETRY_BASE_DELAY", 0.2)),
+            max_delay=float(os.getenv(f"{prefix}_RETRY_MAX_DELAY", 2.0)),
+            deadline=float(os.getenv(f"{prefix}_RETRY_DEADLINE", 30.0)),
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries to a fraction of traffic per provider, so a
+    provider outage does not multiply the load we send it.
+    Every request deposits `ratio` tokens; every retry withdraws one.
+    """
+
+    def __init__(self, ratio: float = 0.2, capacity: float = 10.0):
+        self.ratio = ratio
+        self.capacity = capacity
+        self._tokens = capacity
+
+    def record_request(self):
+        self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+    @classmethod
+    def from_env(cls, provider: str) -> "RetryBudget":
+        prefix = provider.upper()
+        return cls(
+            ratio=float(os.getenv(f"{prefix}_RETRY_BUDGET_RATIO", 0.2)),
+            capacity=float(os.getenv(f"{prefix}_RETRY_BUDGET_CAPACITY", 10)),
+        )
+
+
+def is_retryable(operation: str, response: Optional[httpx.Response] = None, error: Optional[Exception] = None) -> bool:
+    """Decide whether a failed attempt may be retried for this operation."""
+    idempotent = operation not in NON_IDEMPOTENT_OPERATIONS
+    if error is not None:
+        if isinstance(error, CONNECT_ERRORS):
+            return True
+        return idempotent and isinstance(error, TRANSIENT_ERRORS)
+    if response is not None:
+        return idempotent and response.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+def clip_timeout(timeout: httpx.Timeout, seconds: float) -> httpx.Timeout:
+    """`timeout` with no phase allowed to run longer than `seconds`."""
+    def clip(value: Optional[float]) -> float:
+        return seconds if value is None else min(value, seconds)
+
+    return httpx.Timeout(
+        connect=clip(timeout.connect),
+        read=clip(timeout.read),
+        write=clip(timeout.write),
+        pool=clip(timeout.pool),
+    )
+
+
+class RetryState:
+    """
+    Tracks attempts and the deadline for one logical provider call. The
+    deadline covers the attempts as well as the backoff sleeps between them:
+    each attempt's timeout is clipped to what is left (attempt_timeout).
+    """
+
+    def __init__(self, policy: RetryPolicy, budget: RetryBudget):
+        self.policy = policy
+        self.budget = budget
+        self.attempt = 1
+        self.started = time.monotonic()
+        budget.record_request()
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline; never negative."""
+        return max(0.0, self.policy.deadline - (time.monotonic() - self.started))
+
+    def attempt_timeout(self, timeout: httpx.Timeout) -> httpx.Timeout:
+        """The timeout for the next attempt: `timeout`, cut to the time left."""
+        return clip_timeout(timeout, self.remaining())
+
+    def next_delay(self) -> Optional[float]:
+        """Delay before the next attempt, or None if no retry is allowed."""
+        if self.attempt >= self.policy.max_attempts:
+            return None
+        delay = self.policy.backoff(self.attempt)
+        if self.remaining() - delay <= 0:
+            return None
+        if not self.budget.try_spend():
+            logger.warning("Retry budget exhausted; not retrying.")
+            return None
+        self.attempt += 1
+        return delay
+
+
+retry_policies: Dict[str, RetryPolicy] = {}
+retry_budgets: Dict[str, RetryBudget] = {}
+
+
+def get_retry_state(provider: str) -> RetryState:
+    policy = retry_policies.get(provider)
+    if policy is None:
+        policy = retry_policies[provider] = RetryPolicy.from_env(provider)
+    budget = retry_budgets.get(provider)
+    if budget is None:
+        budget = retry_budgets[provider] = RetryBudget.from_env(provider)
+    return RetryState(policy, budget)
@@ -1,10 +1,10 @@
 import httpx
 import os
 import logging
-import time  # Import the time module
 from dotenv import load_dotenv  # Import dotenv
 from fastapi import HTTPException
-from app.flight_services.clients.flyhub_client import get_flyhub_token
+from app.flight_services.clients.flyhub_auth import flyhub_post
+from app.flight_services.clients.http_pool import provider_pool
 
 # Load environment variables from .env file
 load_dotenv()
@@ -25,9 +25,6 @@ if not BDFARE_BASE_URL or not BDFARE_API_KEY or not FLYHUB_BASE_URL:
 
 logger.info("Environment variables loaded successfully.")
 
-# Cached token for FlyHub
-cached_token = {"token": None, "expires_at": 0}
-
 def transform_to_bdfare_request(data: dict) -> dict:
     """
     Transform the input data to match the BDFare request format.
@@ -67,12 +64,11 @@ async def fetch_bdfare_rules(endpoint: str, payload: dict):
     headers = {"X-API-KEY": BDFARE_API_KEY, "Content-Type": "application/json"}
 
     try:
-        logger.info(f"Sending request to BDFare API at {url} with payload: {payload}")
-        async with httpx.AsyncClient(timeout=10) as client:
-            response = await client.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            logger.info(f"BDFare API response: {response.json()}")
-            return response.json()
+        logger.info(f"Sending request to BDFare API at {url}")
+        response = await provider_pool.post("bdfare", endpoint, url, json=payload, headers=headers)
+        response.raise_for_status()
+        logger.info(f"BDFare API response status: {response.status_code}")
+        return response.json()
     except httpx.HTTPStatusError as e:
         logger.error(f"BDFare API returned error: {e.response.status_code} {e.response.text}")
         raise HTTPException(
@@ -98,36 +94,17 @@ async def fetch_flyhub_rules(endpoint: str, payload: dict):
     Returns:
         dict: The response from the FlyHub API.
     """
-    # Ensure we have a valid token
-    global cached_token
-    if not cached_token["token"] or cached_token["expires_at"] <= time.time():
-        logger.info("Fetching new FlyHub token...")
-        cached_token["token"] = get_flyhub_token()  # Call the function to get a new token
-        cached_token["expires_at"] = time.time() + 3600  # Set the new expiration time
-
     url = f"{FLYHUB_BASE_URL.rstrip('/')}/{endpoint}"  # Ensure no trailing slashes
-    headers = {"Authorization": f"Bearer {cached_token['token']}", "Content-Type": "application/json"}
 
     try:
-        logger.info(f"Sending request to FlyHub API at {url} with payload: {payload}")
-        async with httpx.AsyncClient(timeout=10) as client:
-            response = await client.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            logger.info(f"FlyHub API response: {response.json()}")
-            return response.json()
+        logger.info(f"Sending request to FlyHub API at {url}")
+        # flyhub_post refreshes the shared token and retries once on 401
+        response = await flyhub_post(endpoint, url, json=payload)
+        response.raise_for_status()
+        logger.info(f"FlyHub API response status: {response.status_code}")
+        return response.json()
     except httpx.HTTPStatusError as e:
         logger.error(f"FlyHub API returned error: {e.response.status_code} {e.response.text}")
-        if e.response.status_code == 401:  # Token expired or invalid
-            logger.info("FlyHub token expired. Fetching a new token...")
-            cached_token["token"] = get_flyhub_token()
-            cached_token["expires_at"] = time.time() + 3600  # Update token expiration
-            headers["Authorization"] = f"Bearer {cached_token['token']}"
-            # Retry the request
-            async with httpx.AsyncClient(timeout=10) as client:
-                response = await client.post(url, json=payload, headers=headers)
-                response.raise_for_status()
-                logger.info(f"FlyHub API response after retry: {response.json()}")
-                return response.json()
         raise HTTPException(
             status_code=e.response.status_code,
             detail=f"FlyHub API error: {e.response.text}"
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 # --- Request Model ---
 class AirRulesRequest(BaseModel):
@@ -12,11 +12,28 @@ class RuleDetailModel(BaseModel):
     category_name: str = Field(..., example="Penalties")
     rules_text: str = Field(..., example="CHANGES PER TICKET CHARGE BDT 1200 FOR REISSUE...")
 
+class PenaltyChargeModel(BaseModel):
+    """One fee, either an amount in a currency or a percentage of the fare."""
+    amount: Optional[float] = Field(None, example=1200)
+    currency: Optional[str] = Field(None, example="BDT")
+    percent: Optional[float] = Field(None, example=None)
+    applies: str = Field(..., example="before_departure", description="any_time, before_departure or after_departure")
+
+class PenaltiesModel(BaseModel):
+    """Change, cancel and no-show fees parsed from the Penalties rule text."""
+    change_permitted: Optional[bool] = Field(None, description="Null when the rule text does not say.")
+    cancel_permitted: Optional[bool] = None
+    change_fees: List[PenaltyChargeModel] = []
+    cancel_fees: List[PenaltyChargeModel] = []
+    no_show_fees: List[PenaltyChargeModel] = []
+    currency: Optional[str] = Field(None, example="BDT")
+
 class PaxFareRulesModel(BaseModel):
     """Represents fare rules for a specific passenger type and fare basis code on a route."""
     pax_type: str = Field(..., example="Adult")
     fare_basis_code: str = Field(..., example="EDOMO")
     rule_details: List[RuleDetailModel]
+    penalties: Optional[PenaltiesModel] = None
 
 class RouteFareRulesModel(BaseModel):
     """Represents fare rules for a specific route, containing rules for various passenger types."""
@@ -29,4 +46,34 @@ class RouteFareRulesModel(BaseModel):
 # class AirRulesResponse(BaseModel):
 #     traceId: str
 #     rules_by_route: List[RouteFareRulesModel]
-# For now, we'll assume the endpoint directly returns List[RouteFareRulesModel]
\ No newline at end of file
+# For now, we'll assume the endpoint directly returns List[RouteFareRulesModel]
+
+# --- Batch request / response ---
+class AirRulesBatchRequest(BaseModel):
+    traceId: str = Field(..., example="80969b97-38a7-4f05-8253-b3cd4598aa5d", description="The trace ID of the search the offers belong to.")
+    offerIds: List[str] = Field(..., min_items=1, example=["offer_1_abc", "offer_2_def"], description="Offers for which rules are requested; duplicates are fetched once.")
+    includeMiniRules: bool = Field(True, description="Also fetch each offer's mini rule (change / refund penalties).")
+    includeRuleTexts: bool = Field(True, description="Return full rule texts in `fareRules`; when false only parsed `penalties` are returned.")
+
+class OfferRulesErrorModel(BaseModel):
+    status_code: int = Field(..., example=504)
+    detail: str = Field(..., example="The BDFare API FareRules request timed out.")
+
+class PaxPenaltiesModel(BaseModel):
+    route: str = Field(..., example="DAC→JSR")
+    pax_type: str = Field(..., example="Adult")
+    fare_basis_code: str = Field(..., example="EDOMO")
+    penalties: Optional[PenaltiesModel] = None
+
+class OfferRulesResultModel(BaseModel):
+    """Rules for one offer. A failed call leaves its field null and records why under `errors`."""
+    offerId: str
+    fareRulesId: Optional[str] = Field(None, description="Key into the response's `fareRules`; offers with the same fare bases share one entry.")
+    penalties: Optional[List[PaxPenaltiesModel]] = Field(None, description="Parsed penalties per route and passenger type.")
+    miniRule: Optional[Dict[str, Any]] = None
+    errors: Dict[str, OfferRulesErrorModel] = Field(default_factory=dict, description="Per call errors, keyed by `fareRules` or `miniRule`.")
+
+class AirRulesBatchResponse(BaseModel):
+    traceId: str
+    results: List[OfferRulesResultModel]
+    fareRules: Dict[str, List[RouteFareRulesModel]]
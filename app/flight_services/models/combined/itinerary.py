@@ -0,0 +1,538 @@
+#app\flight_services\models\combined\itinerary.py
+"""
+Compact internal representation of normalized combined-search itineraries.
+
+The adapters in adapters/combined_search.py build these objects; sorting,
+filtering, dedup and caching work on their typed fields. to_dict() converts
+to the existing JSON shape of /api/combined/search and is only called at the
+edge. Provider fields that are passed through untouched (carrier info,
+price breakdowns, upsell brands) are kept as the provider's own objects.
+"""
+import copy
+from typing import Any, Dict, List, Optional, Tuple
+
+BDFARE = "bdfare"
+FLYHUB = "flyhub"
+
+ONEWAY = "oneway"
+RETURN = "return"
+
+
+def to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Endpoint:
+    """Departure or arrival point of a segment."""
+    __slots__ = ("iata", "terminal", "time", "airport_name", "city")
+
+    def __init__(self, iata: Optional[str], terminal, time: Optional[str], airport_name: Optional[str], city: Optional[str]):
+        self.iata = iata
+        self.terminal = terminal
+        self.time = time
+        self.airport_name = airport_name
+        self.city = city
+
+    def to_bdfare_dict(self) -> dict:
+        return {
+            "IATACode": self.iata,
+            "Terminal": self.terminal,
+            "ScheduledTime": self.time,
+            "AirportName": self.airport_name,
+            "CityName": self.city,
+        }
+
+    def to_flyhub_dict(self) -> dict:
+        return {
+            "IATACode": self.iata,
+            "AirportName": self.airport_name,
+            "Terminal": self.terminal,
+            "ScheduledTime": self.time,
+            "CityName": self.city,
+        }
+
+
+class Segment:
+    """
+    One flight leg. `carrier` is the marketing carrier code for both
+    providers; `marketing` and `operating` hold BDFare's carrier objects as
+    received, while FlyHub's operating carrier is a plain code.
+    """
+    __slots__ = (
+        "source", "departure", "arrival", "carrier", "carrier_name", "flight_number",
+        "marketing", "operating", "logo", "aircraft", "booking_class", "cabin",
+        "duration", "stops", "baggage", "segment_group", "return_journey",
+        "airline_pnr", "technical_stop_over",
+    )
+
+    def __init__(
+        self,
+        source: str,
+        departure: Endpoint,
+        arrival: Endpoint,
+        carrier: Optional[str] = None,
+        carrier_name: Optional[str] = None,
+        flight_number: Optional[str] = None,
+        marketing: Any = None,
+        operating: Any = None,
+        logo: Optional[str] = None,
+        aircraft: Optional[str] = None,
+        booking_class: Optional[str] = None,
+        cabin: Optional[str] = None,
+        duration: Any = "0",
+        stops: Any = None,
+        baggage: Any = None,
+        segment_group: Any = None,
+        return_journey: Any = None,
+        airline_pnr: Optional[str] = None,
+        technical_stop_over: Any = None,
+    ):
+        self.source = source
+        self.departure = departure
+        self.arrival = arrival
+        self.carrier = carrier
+        self.carrier_name = carrier_name
+        self.flight_number = flight_number
+        self.marketing = marketing
+        self.operating = operating
+        self.logo = logo
+        self.aircraft = aircraft
+        self.booking_class = booking_class
+        self.cabin = cabin
+        self.duration = duration
+        self.stops = stops
+        self.baggage = baggage
+        self.segment_group = segment_group
+        self.return_journey = return_journey
+        self.airline_pnr = airline_pnr
+        self.technical_stop_over = technical_stop_over
+
+    @property
+    def duration_minutes(self) -> Optional[int]:
+        return _to_int(self.duration)
+
+    def to_dict(self) -> dict:
+        if self.source == FLYHUB:
+            return {
+                "Departure": self.departure.to_flyhub_dict(),
+                "Arrival": self.arrival.to_flyhub_dict(),
+                "Airline": {
+                    "Code": self.carrier,
+                    "Name": self.carrier_name,
+                    "FlightNumber": self.flight_number,
+                    "BookingClass": self.booking_class,
+                    "CabinClass": self.cabin,
+                    "OperatingCarrier": self.operating,
+                    "Logo": self.logo,
+                },
+                "JourneyDuration": f"{self.duration} minutes",
+                "StopQuantity": self.stops,
+                "Equipment": self.aircraft,
+                "Baggage": self.baggage,
+                "SegmentGroup": self.segment_group,
+            }
+        return {
+            "Departure": self.departure.to_bdfare_dict(),
+            "Arrival": self.arrival.to_bdfare_dict(),
+            "MarketingCarrier": self.marketing,
+            "OperatingCarrier": self.operating,
+            "Logo": self.logo,
+            "AircraftType": self.aircraft,
+            "RBD": self.booking_class,
+            "FlightNumber": self.flight_number,
+            "SegmentGroup": self.segment_group,
+            "ReturnJourney": self.return_journey,
+            "AirlinePNR": self.airline_pnr,
+            "TechnicalStopOver": self.technical_stop_over,
+            "Duration": f"{self.duration} minutes",
+            "CabinType": self.cabin,
+        }
+
+
+class Fare:
+    """Per passenger-type fare line (BDFare fareDetail / FlyHub Fares entry)."""
+    __slots__ = (
+        "source", "base_fare", "tax", "other", "discount", "vat", "currency",
+        "pax_type", "pax_count", "subtotal", "agent_markup", "service_fee",
+    )
+
+    def __init__(
+        self,
+        source: str,
+        base_fare=None,
+        tax=None,
+        other=None,
+        discount=None,
+        vat=None,
+        currency: Optional[str] = None,
+        pax_type: Optional[str] = None,
+        pax_count=None,
+        subtotal=None,
+        agent_markup=None,
+        service_fee=None,
+    ):
+        self.source = source
+        self.base_fare = base_fare
+        self.tax = tax
+        self.other = other
+        self.discount = discount
+        self.vat = vat
+        self.currency = currency
+        self.pax_type = pax_type
+        self.pax_count = pax_count
+        self.subtotal = subtotal
+        self.agent_markup = agent_markup
+        self.service_fee = service_fee
+
+    def to_dict(self) -> dict:
+        if self.source == FLYHUB:
+            return {
+                "BaseFare": self.base_fare,
+                "Tax": self.tax,
+                "Currency": self.currency,
+                "OtherCharges": self.other,
+                "Discount": self.discount,
+                "AgentMarkUp": self.agent_markup,
+                "PaxType": self.pax_type,
+                "PassengerCount": self.pax_count,
+                "ServiceFee": self.service_fee,
+            }
+        return {
+            "BaseFare": self.base_fare,
+            "Tax": self.tax,
+            "OtherFee": self.other,
+            "Discount": self.discount,
+            "VAT": self.vat,
+            "Currency": self.currency,
+            "PaxType": self.pax_type,
+            "PaxCount": self.pax_count,
+            "SubTotal": self.subtotal,
+        }
+
+
+class Baggage:
+    """BDFare baggage allowance for one leg."""
+    __slots__ = ("departure", "arrival", "check_in", "cabin")
+
+    def __init__(self, departure: Optional[str], arrival: Optional[str], check_in=None, cabin=None):
+        self.departure = departure
+        self.arrival = arrival
+        self.check_in = check_in
+        self.cabin = cabin
+
+    def to_dict(self) -> dict:
+        return {
+            "Departure": self.departure,
+            "Arrival": self.arrival,
+            "CheckIn": self.check_in,
+            "Cabin": self.cabin,
+        }
+
+
+def _dicts(items) -> List[dict]:
+    return [item.to_dict() for item in items]
+
+
+class Itinerary:
+    """
+    A bookable combined-search result.
+
+    BDFare one-way offers and FlyHub results map one-to-one; BDFare return
+    itineraries pair an outbound and an inbound offer and keep both offers'
+    fares, price breakdowns and baggage in the *_inbound fields. `price` is
+    the total payable as a float, used for sorting and dedup; `total_fare`
+    keeps FlyHub's value as received. `alternatives` holds the offer
+    references of duplicates merged into this itinerary by merge_duplicates.
+    """
+    __slots__ = (
+        "source", "itinerary_type", "trace_id", "search_id", "offer_id", "offer_id_inbound",
+        "result_id", "validating_carrier", "refundable", "fare_type", "price", "currency",
+        "outbound", "inbound", "fares", "fares_inbound", "price_breakdown",
+        "price_breakdown_inbound", "baggage", "baggage_inbound", "upsell_brands",
+        "seats_remaining", "meta", "discount", "last_ticket_date", "total_fare",
+        "total_fare_with_markup", "availability", "mini_rules_available", "hold_allowed",
+        "alternatives",
+    )
+
+    def __init__(
+        self,
+        source: str,
+        itinerary_type: Optional[str] = ONEWAY,
+        trace_id: Optional[str] = None,
+        search_id: Optional[str] = None,
+        offer_id: Optional[str] = None,
+        offer_id_inbound: Optional[str] = None,
+        result_id: Optional[str] = None,
+        validating_carrier: Optional[str] = None,
+        refundable=None,
+        fare_type: Optional[str] = None,
+        price: Optional[float] = None,
+        currency: Optional[str] = None,
+        outbound: Optional[List[Segment]] = None,
+        inbound: Optional[List[Segment]] = None,
+        fares: Optional[List[Fare]] = None,
+        fares_inbound: Optional[List[Fare]] = None,
+        price_breakdown: Optional[Dict[str, Any]] = None,
+        price_breakdown_inbound: Optional[Dict[str, Any]] = None,
+        baggage: Optional[List[Baggage]] = None,
+        baggage_inbound: Optional[List[Baggage]] = None,
+        upsell_brands=None,
+        seats_remaining: Optional[int] = None,
+        meta: Optional[Dict[str, Any]] = None,
+        discount=None,
+        last_ticket_date: Optional[str] = None,
+        total_fare=None,
+        total_fare_with_markup=None,
+        availability=None,
+        mini_rules_available=None,
+        hold_allowed=None,
+        alternatives: Optional[List[dict]] = None,
+    ):
+        self.source = source
+        self.itinerary_type = itinerary_type
+        self.trace_id = trace_id
+        self.search_id = search_id
+        self.offer_id = offer_id
+        self.offer_id_inbound = offer_id_inbound
+        self.result_id = result_id
+        self.validating_carrier = validating_carrier
+        self.refundable = refundable
+        self.fare_type = fare_type
+        self.price = price
+        self.currency = currency
+        self.outbound = outbound or []
+        self.inbound = inbound or []
+        self.fares = fares or []
+        self.fares_inbound = fares_inbound or []
+        self.price_breakdown = price_breakdown if price_breakdown is not None else {}
+        self.price_breakdown_inbound = price_breakdown_inbound if price_breakdown_inbound is not None else {}
+        self.baggage = baggage or []
+        self.baggage_inbound = baggage_inbound or []
+        self.upsell_brands = upsell_brands
+        self.seats_remaining = seats_remaining
+        self.meta = meta
+        self.discount = discount
+        self.last_ticket_date = last_ticket_date
+        self.total_fare = total_fare
+        self.total_fare_with_markup = total_fare_with_markup
+        self.availability = availability
+        self.mini_rules_available = mini_rules_available
+        self.hold_allowed = hold_allowed
+        self.alternatives = alternatives or []
+
+    @classmethod
+    def pair(cls, outbound: "Itinerary", inbound: "Itinerary") -> "Itinerary":
+        """Combine a BDFare outbound and inbound one-way offer into a return itinerary."""
+        price = None
+        if outbound.price is not None and inbound.price is not None:
+            price = outbound.price + inbound.price
+        return cls(
+            source=outbound.source,
+            itinerary_type=RETURN,
+            trace_id=outbound.trace_id,
+            offer_id=outbound.offer_id,
+            offer_id_inbound=inbound.offer_id,
+            validating_carrier=outbound.validating_carrier or inbound.validating_carrier,
+            refundable=outbound.refundable and inbound.refundable,
+            fare_type=outbound.fare_type,
+            price=price,
+            currency=outbound.currency or inbound.currency,
+            outbound=outbound.outbound,
+            inbound=inbound.outbound,
+            fares=outbound.fares,
+            fares_inbound=inbound.fares,
+            price_breakdown=outbound.price_breakdown,
+            price_breakdown_inbound=inbound.price_breakdown,
+            baggage=outbound.baggage,
+            baggage_inbound=inbound.baggage,
+            upsell_brands=outbound.upsell_brands if outbound.upsell_brands is not None else inbound.upsell_brands,
+            seats_remaining=min(outbound.seats_remaining or 0, inbound.seats_remaining or 0),
+            meta=outbound.meta,
+        )
+
+    @property
+    def segments(self) -> List[Segment]:
+        return self.outbound + self.inbound
+
+    @property
+    def stops(self) -> int:
+        """Stops on the outbound journey."""
+        return max(len(self.outbound) - 1, 0)
+
+    @property
+    def departure_time(self) -> Optional[str]:
+        return self.outbound[0].departure.time if self.outbound else None
+
+    @property
+    def duration_minutes(self) -> Optional[int]:
+        """Summed flying time of the outbound segments, if every segment reports one."""
+        total = 0
+        for segment in self.outbound:
+            minutes = segment.duration_minutes
+            if minutes is None:
+                return None
+            total += minutes
+        return total
+
+    @property
+    def signature(self) -> Tuple:
+        """
+        Identity of the physical flights: carrier, flight number and departure
+        minute of every segment, outbound then inbound. Currency and
+        refundability are included so only comparable fares are merged.
+        """
+        return (
+            tuple(_segment_key(segment) for segment in self.outbound),
+            tuple(_segment_key(segment) for segment in self.inbound),
+            self.currency,
+            bool(self.refundable),
+        )
+
+    def offer_ref(self) -> dict:
+        """The ids needed to price and book this itinerary through its provider."""
+        if self.source == FLYHUB:
+            ref = {"Source": FLYHUB, "SearchId": self.search_id, "ResultID": self.result_id}
+        elif self.itinerary_type == RETURN:
+            ref = {"Source": BDFARE, "TraceId": self.trace_id, "OfferIdOutbound": self.offer_id, "OfferIdInbound": self.offer_id_inbound}
+        else:
+            ref = {"Source": BDFARE, "TraceId": self.trace_id, "OfferId": self.offer_id}
+        ref["Price"] = self.price
+        ref["Currency"] = self.currency
+        return ref
+
+    def to_dict(self) -> dict:
+        """The itinerary in the /api/combined/search JSON shape."""
+        flight = self._to_dict()
+        if self.alternatives:
+            flight["AlternativeOffers"] = self.alternatives
+        return flight
+
+    def _to_dict(self) -> dict:
+        if self.source == FLYHUB:
+            return {
+                "Source": FLYHUB,
+                "IsRefundable": self.refundable,
+                "FareType": self.fare_type,
+                "Discount": self.discount,
+                "ValidatingCarrier": self.validating_carrier,
+                "LastTicketDate": self.last_ticket_date,
+                "Pricing": _dicts(self.fares),
+                "TotalFare": self.total_fare,
+                "TotalFareWithAgentMarkup": self.total_fare_with_markup,
+                "Currency": self.currency,
+                "Availabilty": self.availability,
+                "isMiniRulesAvailable": self.mini_rules_available,
+                "HoldAllowed": self.hold_allowed,
+                "OutboundSegments": _dicts(self.outbound),
+                "InboundSegments": _dicts(self.inbound),
+                "SearchId": self.search_id,
+                "ResultID": self.result_id,
+            }
+        if self.itinerary_type == RETURN:
+            return {
+                "Source": BDFARE,
+                "TraceId": self.trace_id,
+                "OfferIdOutbound": self.offer_id,
+                "OfferIdInbound": self.offer_id_inbound,
+                "ValidatingCarrier": self.validating_carrier,
+                "Refundable": self.refundable,
+                "FareType": self.fare_type,
+                "Pricing": {
+                    "FareDetails": {"Outbound": _dicts(self.fares), "Inbound": _dicts(self.fares_inbound)},
+                    "PriceBreakdown": {"Outbound": self.price_breakdown, "Inbound": self.price_breakdown_inbound},
+                },
+                "OutboundSegments": _dicts(self.outbound),
+                "InboundSegments": _dicts(self.inbound),
+                "Baggage": {"Outbound": _dicts(self.baggage), "Inbound": _dicts(self.baggage_inbound)},
+                "UpSellBrandList": self.upsell_brands,
+                "SeatsRemaining": self.seats_remaining,
+                "Extra": self.meta,
+                "ItineraryType": RETURN,
+            }
+        return {
+            "Source": BDFARE,
+            "TraceId": self.trace_id,
+            "OfferId": self.offer_id,
+            "ValidatingCarrier": self.validating_carrier,
+            "Refundable": self.refundable,
+            "FareType": self.fare_type,
+            "Pricing": self.price_breakdown,
+            "FareDetails": _dicts(self.fares),
+            "Penalty": None,
+            "OutboundSegments": _dicts(self.outbound),
+            "InboundSegments": [],
+            "Baggage": _dicts(self.baggage),
+            "UpSellBrandList": self.upsell_brands,
+            "SeatsRemaining": self.seats_remaining,
+            "Extra": self.meta,
+            "ItineraryType": ONEWAY,
+        }
+
+
+def _segment_key(segment: Segment) -> Tuple:
+    flight_number = str(segment.flight_number or "").strip().lstrip("0")
+    # "2024-12-15T10:05:00" and "2024-12-15 10:05" name the same departure minute
+    departure = (segment.departure.time or "")[:16].replace(" ", "T")
+    return ((segment.carrier or "").upper(), flight_number, departure)
+
+
+def merge_duplicates(itineraries: List[Itinerary]) -> List[Itinerary]:
+    """
+    Collapse the same flights sold by more than one provider (equal
+    Itinerary.signature, different source). Offers from one provider are never
+    merged with each other; they are distinct fare products. The cheapest fare
+    is kept, at the position of the first duplicate; ties go to the earlier
+    one. The kept itinerary is a copy whose `alternatives` lists the other
+    offers, cheapest first, so a booking can still be sent to either provider.
+    The input itineraries are not modified.
+    """
+    groups: Dict[Tuple, List[List[Itinerary]]] = {}
+    order = []
+    for itinerary in itineraries:
+        if not itinerary.outbound:
+            # Nothing to compare on; always keep
+            order.append([itinerary])
+            continue
+        candidates = groups.setdefault(itinerary.signature, [])
+        for group in candidates:
+            if all(other.source != itinerary.source for other in group):
+                group.append(itinerary)
+                break
+        else:
+            group = [itinerary]
+            candidates.append(group)
+            order.append(group)
+
+    merged = []
+    for group in order:
+        if len(group) == 1:
+            merged.append(group[0])
+            continue
+        ranked = sorted(group, key=_price_rank)
+        best = copy.copy(ranked[0])
+        best.alternatives = [other.offer_ref() for other in ranked[1:]]
+        merged.append(best)
+    return merged
+
+
+def _price_rank(itinerary: Itinerary) -> float:
+    # sorted() is stable, so equal prices keep provider order
+    return itinerary.price if itinerary.price is not None else float("inf")
+
+
+def bdfare_total_price(price_breakdown: Dict[str, Any]) -> Optional[float]:
+    """Total payable from a BDFare price object (already currency-fixed)."""
+    total_payable = price_breakdown.get("totalPayable") if isinstance(price_breakdown, dict) else None
+    if not isinstance(total_payable, dict):
+        return None
+    return to_float(total_payable.get("total"))
@@ -3,8 +3,13 @@ from typing import List
 import logging
 
 # Models and Service (adjust paths as per your project structure)
-from app.flight_services.models.air_rules import AirRulesRequest, RouteFareRulesModel
-from app.flight_services.services.air_rules_service import get_fare_rules_from_provider
+from app.flight_services.models.air_rules import AirRulesRequest, RouteFareRulesModel, AirRulesBatchRequest, AirRulesBatchResponse
+from app.flight_services.services.air_rules_service import (
+    FARE_RULES_BATCH_MAX_OFFERS,
+    get_fare_rules_batch,
+    get_fare_rules_from_provider,
+)
+from app.flight_services.services.fare_rules_cache import fare_rules_cache
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -58,4 +63,40 @@ async def get_fare_rules_endpoint(
     except Exception as e:
         # Catch any other unexpected errors
         logger.exception(f"Unexpected critical error in /fare-rules endpoint for traceId {request_payload.traceId}: {str(e)}")
-        raise HTTPException(status_code=500, detail="An internal server error occurred while fetching fare rules.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="An internal server error occurred while fetching fare rules.")
+
+
+@router.post(
+    "/fare-rules/batch",
+    response_model=AirRulesBatchResponse,
+    summary="Fetch Fare Rules for Many Offers",
+    description="Retrieves fare rules, parsed penalties and mini rules for a list of offers of one search concurrently, with per-offer errors.",
+    tags=["Flight Rules"]
+)
+async def get_fare_rules_batch_endpoint(
+    request_payload: AirRulesBatchRequest = Body(...)
+):
+    """
+    - **traceId**: The trace identifier of the search the offers belong to.
+    - **offerIds**: The offers to fetch rules for (at most FARE_RULES_BATCH_MAX_OFFERS).
+    - **includeMiniRules**: Also fetch each offer's mini rule.
+    - **includeRuleTexts**: Return full rule texts; when false only parsed penalties are returned.
+    """
+    if len(set(request_payload.offerIds)) > FARE_RULES_BATCH_MAX_OFFERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {FARE_RULES_BATCH_MAX_OFFERS} offers can be requested in one batch.",
+        )
+    logger.info(f"Received fare rules batch request for traceId: {request_payload.traceId} with {len(request_payload.offerIds)} offers")
+    return await get_fare_rules_batch(
+        trace_id=request_payload.traceId,
+        offer_ids=request_payload.offerIds,
+        include_mini_rules=request_payload.includeMiniRules,
+        include_rule_texts=request_payload.includeRuleTexts,
+    )
+
+
+@router.get("/cache/stats", tags=["Flight Rules"])
+async def get_fare_rules_cache_stats():
+    """Fare rules cache hit rate and local entry counts for this worker."""
+    return fare_rules_cache.stats()
@@ -2,13 +2,14 @@ from fastapi import APIRouter, HTTPException, Body
 from pydantic import ValidationError
 from app.flight_services.models.airbook.airbook_request import UnifiedAirBookRequest
 from app.flight_services.services.airbook_service import fetch_airbook, fetch_bdfare_airbook
+from app.flight_services.utils.responses import FastJSONResponse
 import logging
 
 # Initialize the router and logger
 router = APIRouter()
 logger = logging.getLogger("airbook_routes")
 
-@router.post("/book", tags=["AirBook"])
+@router.post("/book", tags=["AirBook"], response_class=FastJSONResponse)
 async def get_airbook(payload: UnifiedAirBookRequest = Body(...)):
     print("Received AirBook request.")
     print("Request Payload:", payload.dict())
@@ -21,7 +22,7 @@ async def get_airbook(payload: UnifiedAirBookRequest = Body(...)):
         
         response = await fetch_airbook(payload)
         logger.info("Returning AirBook response.")
-        return response
+        return FastJSONResponse(response)
     except ValidationError as ve:
         logger.error("Validation Error in request payload.", exc_info=ve)
         raise HTTPException(status_code=422, detail=str(ve))
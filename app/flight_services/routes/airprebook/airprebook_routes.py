@@ -2,13 +2,14 @@ from fastapi import APIRouter, HTTPException, Body
 from pydantic import ValidationError
 from app.flight_services.models.airprebook.airprebook_request import UnifiedAirPrebookRequest
 from app.flight_services.services.airprebook_service import fetch_airprebook
+from app.flight_services.utils.responses import FastJSONResponse
 import logging
 
 # Initialize the router and logger
 router = APIRouter()
 logger = logging.getLogger("airprebook_routes")
 
-@router.post("/prebook", tags=["AirPrebook"])
+@router.post("/prebook", tags=["AirPrebook"], response_class=FastJSONResponse)
 async def get_airprebook(payload: UnifiedAirPrebookRequest = Body(...)):
     """
     Endpoint to process air prebook requests for supported sources.
@@ -18,7 +19,7 @@ async def get_airprebook(payload: UnifiedAirPrebookRequest = Body(...)):
         logger.debug(f"Request payload: {payload.dict()}")
         response = await fetch_airprebook(payload)
         logger.info("Returning AirPrebook response.")
-        return response
+        return FastJSONResponse(response)
     except ValidationError as ve:
         logger.error("Validation Error in request payload.", exc_info=ve)
         raise HTTPException(status_code=422, detail=str(ve))
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, HTTPException, Body
 from app.flight_services.models.airprice.airprice_request import UnifiedAirPriceRequest
 from app.flight_services.services.airprice_service import fetch_airprice
+from app.flight_services.services.price_cache import price_cache
+from app.flight_services.utils.responses import FastJSONResponse
 import logging
 
 router = APIRouter()
 logger = logging.getLogger("airprice_routes")
 
-@router.post("/price", tags=["AirPrice"])
+@router.post("/price", tags=["AirPrice"], response_class=FastJSONResponse)
 async def get_airprice(payload: UnifiedAirPriceRequest = Body(...)):
     """
     Fetch air pricing details based on the unified request format.
@@ -21,10 +23,16 @@ async def get_airprice(payload: UnifiedAirPriceRequest = Body(...)):
         logger.info(f"Received request: {payload.dict()}")
         response = await fetch_airprice(payload)
         logger.info(f"Returning response: {response}")
-        return response
+        return FastJSONResponse(response)
     except HTTPException as he:
         logger.error(f"HTTPException occurred: {he.detail}")
         raise he
     except Exception as e:
         logger.exception("Unexpected error occurred while fetching air pricing.")
-        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+
+
+@router.get("/cache/stats", tags=["AirPrice"])
+async def get_price_cache_stats():
+    """Price cache hit rate for this worker."""
+    return price_cache.stats()
@@ -1,13 +1,14 @@
 from fastapi import APIRouter, HTTPException, Body
 from app.flight_services.models.airretrieve.airretrieve_request import UnifiedAirRetrieveRequest
 from app.flight_services.services.airretrieve_service import fetch_airretrieve
+from app.flight_services.utils.responses import FastJSONResponse
 import logging
 
 # Initialize the router and logger
 router = APIRouter()
 logger = logging.getLogger("airretrieve_routes")
 
-@router.post("/retrieve", tags=["AirRetrieve"])
+@router.post("/retrieve", tags=["AirRetrieve"], response_class=FastJSONResponse)
 async def get_airretrieve(payload: UnifiedAirRetrieveRequest = Body(...)):
     """
     Endpoint to process AirRetrieve requests.
@@ -22,7 +23,7 @@ async def get_airretrieve(payload: UnifiedAirRetrieveRequest = Body(...)):
 
         # Log the response
         logger.info("Returning AirRetrieve response.")
-        return response
+        return FastJSONResponse(response)
 
     except HTTPException as he:
         logger.error(f"HTTPException: {he.detail}")
@@ -2,12 +2,12 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 import os
-import subprocess
-import json
 from dotenv import load_dotenv
 import logging
 import httpx
 
+from app.flight_services.clients.http_pool import provider_pool
+
 # Load .env file
 load_dotenv()
 
@@ -77,7 +77,7 @@ class OrderSellResponse(BaseModel):
 )
 async def place_order_sell(payload: OrderSellRequest):
     """
-    Create and confirm an order sell using BDFare API with curl.
+    Create and confirm an order sell using BDFare API.
 
     Args:
         payload (OrderSellRequest): The order sell request payload.
@@ -93,49 +93,25 @@ async def place_order_sell(payload: OrderSellRequest):
         raise HTTPException(status_code=500, detail="BDFare API key is not configured.")
 
     url = f"{BDFARE_BASE_URL}/OrderSell"
-
-    # Convert payload to JSON string for curl
-    payload_json = json.dumps(payload.dict())
-
-    # Construct the curl command
-    curl_command = [
-        "curl",
-        "-X", "POST",
-        url,
-        "-H", f"X-API-KEY: {BDFARE_API_KEY}",
-        "-H", "Content-Type: application/json",
-        "-d", payload_json,
-    ]
-
-    logger.info(f"Executing curl command: {' '.join(curl_command)}")
+    headers = {
+        "X-API-KEY": BDFARE_API_KEY,
+        "Content-Type": "application/json",
+    }
 
     try:
-        # Execute the curl command
-        result = subprocess.run(curl_command, capture_output=True, text=True)
-
-        # Check for errors
-        if result.returncode != 0:
-            logger.error(f"Curl command failed: {result.stderr}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Curl command failed: {result.stderr}"
-            )
-
-        # Parse the response JSON
-        response_data = json.loads(result.stdout)
-        logger.debug(f"Curl Response: {response_data}")
-
-        return OrderSellResponse(success=True, data=response_data)
-
-    except json.JSONDecodeError:
-        logger.error(f"Failed to decode JSON response from curl: {result.stdout}")
+        response = await provider_pool.post("bdfare", "OrderSell", url, json=payload.dict(), headers=headers)
+    except httpx.RequestError as exc:
+        logger.error(f"BDFare OrderSell request failed: {str(exc)}")
         raise HTTPException(
-            status_code=500,
-            detail=f"Failed to decode JSON response: {result.stdout}"
+            status_code=503,
+            detail=f"BDFare OrderSell request failed: {str(exc)}"
         )
-    except Exception as e:
-        logger.exception(f"Unexpected error occurred using curl: {str(e)}")
+
+    if response.status_code != 200:
+        logger.error(f"BDFare OrderSell returned {response.status_code}: {response.text}")
         raise HTTPException(
-            status_code=500,
-            detail=f"Unexpected error occurred using curl: {str(e)}"
+            status_code=response.status_code,
+            detail=f"BDFare API Error: {response.text}"
         )
+
+    return OrderSellResponse(success=True, data=response.json())
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 import httpx
 import os
+from app.flight_services.clients.http_pool import provider_pool
 
 router = APIRouter()
 
@@ -28,8 +29,7 @@ async def get_balance():
 
     try:
         # Make a GET request to the BDFare API
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
+        response = await provider_pool.get("bdfare", "GetBalance", url, headers=headers)
 
         if response.status_code == 200:
             return response.json()
@@ -2,11 +2,10 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from typing import Dict, Any
 import os
-import subprocess
-import json
 from dotenv import load_dotenv
 import logging
 import httpx
+from app.flight_services.clients.http_pool import provider_pool
 
 # Load .env file
 load_dotenv()
@@ -41,7 +40,7 @@ class miniRuleResponse(BaseModel):
 )
 async def get_miniRule(payload: miniRuleRequest):
     """
-    Fetch miniRule details using BDFare API, with a curl fallback.
+    Fetch miniRule details using BDFare API.
 
     Args:
         payload (miniRuleRequest): The miniRule request payload.
@@ -65,10 +64,8 @@ async def get_miniRule(payload: miniRuleRequest):
     logger.info(f"Making request to BDFare API: {url}")
     logger.debug(f"Payload: {payload.dict()}")
 
-    # Attempt using httpx
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload.dict(), headers=headers)
+        response = await provider_pool.post("bdfare", "MiniRule", url, json=payload.dict(), headers=headers)
         
         logger.info(f"BDFare API responded with status code: {response.status_code}")
 
@@ -84,49 +81,8 @@ async def get_miniRule(payload: miniRuleRequest):
             )
 
     except httpx.RequestError as exc:
-        logger.exception(f"Error communicating with BDFare API using httpx: {exc}")
-        logger.info("Falling back to curl...")
-
-        # Use curl as a fallback
-        try:
-            # Convert payload to JSON string for curl
-            payload_json = json.dumps(payload.dict())
-
-            # Construct the curl command
-            curl_command = [
-                "curl",
-                "-X", "POST",
-                url,
-                "-H", f"X-API-KEY: {BDFARE_API_KEY}",
-                "-H", "Content-Type: application/json",
-                "-d", payload_json
-            ]
-
-            # Execute the curl command
-            result = subprocess.run(curl_command, capture_output=True, text=True)
-
-            # Check for errors
-            if result.returncode != 0:
-                logger.error(f"Curl command failed: {result.stderr}")
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Curl command failed: {result.stderr}"
-                )
-
-            # Parse and return the JSON response
-            response_json = json.loads(result.stdout)
-            logger.debug(f"Curl Response: {response_json}")
-            return miniRuleResponse(success=True, data=response_json)
-
-        except json.JSONDecodeError:
-            logger.error(f"Failed to decode JSON response from curl: {result.stdout}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to decode JSON response: {result.stdout}"
-            )
-        except Exception as e:
-            logger.exception(f"Unexpected error occurred using curl: {str(e)}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Unexpected error occurred using curl: {str(e)}"
-            )
+        logger.exception(f"Error communicating with BDFare API: {exc}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"BDFare MiniRule request failed: {str(exc)}"
+        )
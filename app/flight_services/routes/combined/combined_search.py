@@ -1,7 +1,20 @@
 from fastapi import APIRouter, Body, HTTPException, Query
+from typing import Optional
 from fastapi.middleware.gzip import GZipMiddleware
 from app.flight_services.models.combined.combined_search import FlightSearchRequest
-from app.flight_services.services.combined_service import combined_search
+from fastapi.responses import StreamingResponse
+from app.flight_services.services.combined_service import (
+    combined_search,
+    combined_search_page,
+    prepare_combined_search_stream,
+    provider_flight,
+    search_flight,
+    search_refresh,
+)
+from app.flight_services.services.prewarm import read_prewarm_status
+from app.flight_services.services.results_engine import cache_key_for_handle, results_store
+from app.flight_services.utils.responses import FastJSONResponse, dumps
+from app.flight_services.utils.tracing import span
 import logging
 
 # Initialize the router and logger
@@ -16,29 +29,30 @@ console_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 
 
-@router.post("/search")
+@router.post("/search", response_class=FastJSONResponse)
 async def search_flights(
     payload: FlightSearchRequest = Body(...),
     page: int = Query(1, ge=1, description="Page number for pagination"),
     size: int = Query(100, ge=1, le=100, description="Number of results per page (max 100)"),
 ):
     try:
-        # Call the combined search service
-        results = await combined_search(payload, page=page, size=size)
+        # Call the combined search service; the root span of a search trace
+        with span("route.search_flights", page=page, size=size):
+            results = await combined_search(payload, page=page, size=size)
 
-        # Previously, you sliced the results here...
-        # total_results = len(results["flights"])
-        # start = (page - 1) * size
-        # end = start + size
-        # paginated_flights = results["flights"][start:end]
-
-        # Return paginated response with metadata
+        # Return paginated response with metadata; the service slices the
+        # page from the stored result set
         response = {
             "page": page,
             "size": size,
+            "total": results["total"],
             "flights": results["flights"],
+            "providers": results.get("providers", {}),
+            "partial": results.get("partial", False),
+            "handle": results.get("handle"),
+            "nextCursor": results.get("nextCursor"),
         }
-        return response
+        return FastJSONResponse(response)
 
     except ValueError as ve:
         raise HTTPException(status_code=422, detail=f"Validation Error: {str(ve)}")
@@ -50,6 +64,111 @@ async def search_flights(
         )
 
 
+@router.get("/search/page", response_class=FastJSONResponse)
+async def search_flights_page(
+    cursor: str = Query(..., description="nextCursor from /search or from a previous page"),
+):
+    """
+    Next page of an earlier /search, served from its stored results in the
+    same order without calling the providers again. Returns 409 once those
+    results have been replaced and have expired; repeat the search.
+    """
+    response = await combined_search_page(cursor)
+    return FastJSONResponse(response)
+
+
+@router.get("/search/stats")
+async def search_stats():
+    """
+    Per-worker counters: request coalescing (identical concurrent searches
+    served by one provider run, and provider calls shared by searches and
+    streams) and background refreshes of stale cache entries.
+    """
+    return {
+        "singleFlight": search_flight.stats(),
+        "providerCalls": provider_flight.stats(),
+        "refresh": search_refresh.stats(),
+    }
+
+
+@router.get("/prewarm/status")
+async def prewarm_status():
+    """Status of the cache prewarming scheduler, as last written by the process that runs it."""
+    return read_prewarm_status()
+
+
+def _split(value: Optional[str]):
+    return [item.strip() for item in value.split(",") if item.strip()] if value else None
+
+
+@router.get("/results/{handle}", response_class=FastJSONResponse)
+async def query_results(
+    handle: str,
+    sort: Optional[str] = Query(None, description="price, duration or departure; prefix with '-' for descending"),
+    airlines: Optional[str] = Query(None, description="Comma-separated validating carrier codes"),
+    maxStops: Optional[int] = Query(None, ge=0, description="Maximum stops on the outbound journey"),
+    refundable: Optional[bool] = Query(None),
+    minPrice: Optional[float] = Query(None, ge=0),
+    maxPrice: Optional[float] = Query(None, ge=0),
+    departureWindows: Optional[str] = Query(None, description="Comma-separated: night, morning, afternoon, evening"),
+    page: int = Query(1, ge=1, description="Page number for pagination"),
+    size: int = Query(100, ge=1, le=100, description="Number of results per page (max 100)"),
+):
+    """
+    Sort, filter and facet the results of an earlier /search without calling
+    the providers again. `handle` is the value returned by /search.
+    """
+    cache_key = cache_key_for_handle(handle)
+    result_set = await results_store.get(cache_key) if cache_key else None
+    if result_set is None:
+        raise HTTPException(status_code=404, detail="Search results not found or expired; repeat the search.")
+    try:
+        response = result_set.query(
+            sort=sort,
+            airlines=_split(airlines),
+            max_stops=maxStops,
+            refundable=refundable,
+            min_price=minPrice,
+            max_price=maxPrice,
+            departure_windows=_split(departureWindows),
+            page=page,
+            size=size,
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=422, detail=f"Validation Error: {str(ve)}")
+    response["handle"] = handle
+    return FastJSONResponse(response)
+
+
+@router.post("/search/stream")
+async def search_flights_stream(
+    payload: FlightSearchRequest = Body(...),
+):
+    """
+    Streaming variant of /search as NDJSON (one JSON object per line).
+
+    Each provider's flights are flushed as a {"type": "flights"} line as soon as
+    that provider responds; the last line is a {"type": "summary"} frame with
+    per-provider status and timing. The stream carries the full result set;
+    use the summary's handle with /results to page, sort or filter it.
+    """
+    frames = prepare_combined_search_stream(payload)
+
+    async def ndjson():
+        try:
+            async for frame in frames:
+                yield dumps(frame) + b"\n"
+        except Exception as e:
+            # Headers are already sent; report the failure in-band
+            logger.exception("Combined search stream failed.")
+            yield dumps({"type": "error", "detail": f"An unexpected error occurred: {str(e)}"}) + b"\n"
+
+    # Content-Encoding tells GZipMiddleware to pass frames through instead of
+    # buffering them in the compressor; X-Accel-Buffering does the same for nginx.
+    headers = {"Content-Encoding": "identity", "Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson", headers=headers)
+
+
 
 
 # for raw data
@@ -1,16 +1,77 @@
 import json
-from typing import Optional
+from typing import Dict, Iterable, Optional
+
+LOGO_NOT_AVAILABLE = 'Logo not available'
+
+
+class AirlineRecord:
+    """Compact airline record loaded from airlines.json."""
+    __slots__ = ('id', 'name', 'logo', 'lcc')
+
+    def __init__(self, id: str, name: str, logo: str, lcc: str):
+        self.id = id
+        self.name = name
+        self.logo = logo
+        self.lcc = lcc
+
+    def to_dict(self) -> dict:
+        return {'id': self.id, 'lcc': self.lcc, 'name': self.name, 'logo': self.logo}
+
+
+UNKNOWN_AIRLINE = AirlineRecord(id='Unknown', name='Unknown Airline', logo=LOGO_NOT_AVAILABLE, lcc='0')
+
+
+class AirlineRegistry:
+    """
+    Airlines keyed by carrier code.
+    The first entry wins for duplicate codes, matching the previous linear scan.
+    """
+
+    def __init__(self, airlines: Iterable[dict]):
+        self._by_code: Dict[str, AirlineRecord] = {}
+        for airline in airlines:
+            code = airline.get('id')
+            if not code or code in self._by_code:
+                continue
+            self._by_code[code] = AirlineRecord(
+                id=code,
+                name=airline.get('name') or '',
+                logo=airline.get('logo') or LOGO_NOT_AVAILABLE,
+                lcc=airline.get('lcc') or '0',
+            )
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._by_code
+
+    def __len__(self) -> int:
+        return len(self._by_code)
+
+    def find(self, code: Optional[str]) -> Optional[AirlineRecord]:
+        """Return the airline for a code, or None if it is unknown."""
+        if not code:
+            return None
+        return self._by_code.get(code)
+
+    def get(self, code: Optional[str]) -> AirlineRecord:
+        """Return the airline for a code, or UNKNOWN_AIRLINE if it is unknown."""
+        return self.find(code) or UNKNOWN_AIRLINE
+
+    def get_logo(self, code: Optional[str]) -> str:
+        return self.get(code).logo
+
+    def get_many(self, codes: Iterable[str]) -> Dict[str, AirlineRecord]:
+        """Batch lookup; every requested code is present in the result."""
+        return {code: self.get(code) for code in set(codes)}
+
 
 # Load airlines data from a JSON file
 def load_airlines_data():
     with open('app/flight_services/data/airlines.json', 'r') as file:
         return json.load(file)
 
-airlines_data = load_airlines_data()
+airline_registry = AirlineRegistry(load_airlines_data())
 
 # Function to get airline by ID
 def get_airline_by_id(airline_id: str) -> Optional[dict]:
-    for airline in airlines_data:
-        if airline['id'] == airline_id:
-            return airline
-    return None
+    airline = airline_registry.find(airline_id)
+    return airline.to_dict() if airline else None
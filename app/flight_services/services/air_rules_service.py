@@ -1,10 +1,15 @@
+import os
+import json
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from fastapi import HTTPException
 
 # BDFare Client and Adapter (adjust paths as per your project structure)
-from app.flight_services.clients.bdfare_client import fetch_bdfare_farerules
+from app.flight_services.clients.bdfare_client import fetch_bdfare_farerules, fetch_bdfare_minirule
 from app.flight_services.adapters.airrules_bdfare import adapt_bdfare_fare_rules, AdaptedRouteFareRules
+from app.flight_services.services.fare_rules_cache import fare_rules_cache
 
 # Model for type hinting the adapted response if needed, though TypedDict is also fine
 from app.flight_services.models.air_rules import RouteFareRulesModel
@@ -12,19 +17,47 @@ from app.flight_services.models.air_rules import RouteFareRulesModel
 
 logger = logging.getLogger(__name__)
 
+# Upstream FareRules / MiniRule calls in flight for all batch requests of a worker
+FARE_RULES_BATCH_CONCURRENCY = int(os.getenv("FARE_RULES_BATCH_CONCURRENCY", 8))
+FARE_RULES_BATCH_MAX_OFFERS = int(os.getenv("FARE_RULES_BATCH_MAX_OFFERS", 50))
+
+# Created on first use: on Python < 3.10 a semaphore binds to the loop
+# current at construction, which at import time is not the server's
+_batch_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _get_batch_semaphore() -> asyncio.Semaphore:
+    global _batch_semaphore
+    if _batch_semaphore is None:
+        _batch_semaphore = asyncio.Semaphore(FARE_RULES_BATCH_CONCURRENCY)
+    return _batch_semaphore
+
+
 async def get_fare_rules_from_provider(
     trace_id: str,
-    offer_id: str  # Changed from offer_ids: List[str]
+    offer_id: str,  # Changed from offer_ids: List[str]
+    semaphore: Optional[asyncio.Semaphore] = None,
 ) -> List[AdaptedRouteFareRules]:
     """
     Fetches and adapts fare rules from BDFare for a single offer.
+    Adapted rules are cached per offer and per fare basis; see fare_rules_cache.
+    When a semaphore is given it is held only for the upstream call, not for cache hits.
     """
     try:
+        cached_rules = await fare_rules_cache.get(trace_id, offer_id)
+        if cached_rules is not None:
+            logger.info(f"Serving fare rules from cache for traceId: {trace_id}, offerId: {offer_id}")
+            return cached_rules
+
         logger.info(f"Fetching fare rules from BDFare for traceId: {trace_id}, offerId: {offer_id}")
-        raw_bdfare_rules_response: Dict[str, Any] = await fetch_bdfare_farerules(
-            trace_id=trace_id,
-            offer_id=offer_id # Pass the single offer_id
-        )
+        if semaphore is None:
+            raw_bdfare_rules_response: Dict[str, Any] = await fetch_bdfare_farerules(
+                trace_id=trace_id,
+                offer_id=offer_id # Pass the single offer_id
+            )
+        else:
+            async with semaphore:
+                raw_bdfare_rules_response = await fetch_bdfare_farerules(trace_id=trace_id, offer_id=offer_id)
         # ... (rest of the function remains the same) ...
         if not raw_bdfare_rules_response:
             logger.warning(f"Received empty response from BDFare client for fare rules. TraceId: {trace_id}, OfferId: {offer_id}")
@@ -37,6 +70,7 @@ async def get_fare_rules_from_provider(
              logger.info(f"Fare rules adaptation resulted in an empty list for traceId: {trace_id}, OfferId: {offer_id}, though provider call was successful.")
         elif not adapted_rules:
              logger.warning(f"Fare rules adaptation resulted in an empty list for traceId: {trace_id}, OfferId: {offer_id}.")
+        await fare_rules_cache.set(trace_id, offer_id, adapted_rules)
         return adapted_rules
 
     except HTTPException as he:
@@ -44,4 +78,108 @@ async def get_fare_rules_from_provider(
         raise he
     except Exception as e:
         logger.exception(f"Unexpected error fetching or adapting fare rules for traceId {trace_id}, OfferId {offer_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"An unexpected error occurred while processing fare rules: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred while processing fare rules: {str(e)}")
+
+
+def fare_rules_id(adapted_rules: List[AdaptedRouteFareRules]) -> str:
+    """
+    Identifies a set of adapted rules by its (route, paxType, fareBasisCode)
+    layout. Rule texts depend only on that layout, so offers sharing their
+    fare bases share one id and one copy of the texts in a batch response.
+    """
+    layout = [
+        [route["route"], [[pax["pax_type"], pax["fare_basis_code"]] for pax in route["pax_specific_rules"]]]
+        for route in adapted_rules
+    ]
+    raw = json.dumps(layout, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _error(exc: Exception) -> Dict[str, Any]:
+    if isinstance(exc, HTTPException):
+        return {"status_code": exc.status_code, "detail": str(exc.detail)}
+    return {"status_code": 500, "detail": str(exc) or repr(exc)}
+
+
+def penalties_summary(adapted_rules: List[AdaptedRouteFareRules]) -> List[Dict[str, Any]]:
+    """The parsed penalties of adapted rules, per route and passenger type, without rule texts."""
+    return [
+        {
+            "route": route["route"],
+            "pax_type": pax["pax_type"],
+            "fare_basis_code": pax["fare_basis_code"],
+            "penalties": pax.get("penalties"),
+        }
+        for route in adapted_rules
+        for pax in route["pax_specific_rules"]
+    ]
+
+
+async def _get_offer_rules(
+    trace_id: str, offer_id: str, semaphore: asyncio.Semaphore, include_rule_texts: bool
+) -> Tuple[Optional[List[AdaptedRouteFareRules]], List[Dict[str, Any]]]:
+    """An offer's adapted rules (None when texts are not wanted) and its penalties summary."""
+    if not include_rule_texts:
+        summary = await fare_rules_cache.get_penalties(trace_id, offer_id)
+        if summary is not None:
+            return None, summary
+    adapted_rules = await get_fare_rules_from_provider(trace_id, offer_id, semaphore)
+    return (adapted_rules if include_rule_texts else None), penalties_summary(adapted_rules)
+
+
+async def _get_mini_rule(trace_id: str, offer_id: str, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    async with semaphore:
+        return await fetch_bdfare_minirule(trace_id=trace_id, offer_id=offer_id)
+
+
+async def get_fare_rules_batch(
+    trace_id: str, offer_ids: List[str], include_mini_rules: bool = True, include_rule_texts: bool = True
+) -> Dict[str, Any]:
+    """
+    Fetches fare rules, and optionally mini rules, for many offers of one search.
+
+    Every FareRules and MiniRule call is started at once and bounded by a
+    worker-wide semaphore, so a batch takes about as long as its slowest call
+    rather than the sum. Repeated offer ids are fetched and returned once; offers whose fare
+    bases match return one shared `fareRules` entry (see fare_rules_id), and
+    their rule texts are stored once in the fare rules cache. Each result
+    carries its parsed penalties; without rule texts, cached offers are answered
+    from the penalty index alone. A failed call is reported in that offer's
+    `errors` and does not fail the batch.
+    """
+    unique_offer_ids = list(dict.fromkeys(offer_ids))
+    semaphore = _get_batch_semaphore()
+    logger.info(f"Fetching rules for {len(unique_offer_ids)} offers of traceId: {trace_id} (mini rules: {include_mini_rules}, rule texts: {include_rule_texts})")
+
+    fare_rule_calls = [_get_offer_rules(trace_id, offer_id, semaphore, include_rule_texts) for offer_id in unique_offer_ids]
+    mini_rule_calls = [_get_mini_rule(trace_id, offer_id, semaphore) for offer_id in unique_offer_ids] if include_mini_rules else []
+    outcomes = await asyncio.gather(*fare_rule_calls, *mini_rule_calls, return_exceptions=True)
+    fare_rule_outcomes = outcomes[:len(unique_offer_ids)]
+    mini_rule_outcomes = outcomes[len(unique_offer_ids):] or [None] * len(unique_offer_ids)
+
+    fare_rules: Dict[str, List[AdaptedRouteFareRules]] = {}
+    results: List[Dict[str, Any]] = []
+    for offer_id, offer_rules, mini_rule in zip(unique_offer_ids, fare_rule_outcomes, mini_rule_outcomes):
+        result = {"offerId": offer_id, "fareRulesId": None, "penalties": None, "miniRule": None, "errors": {}}
+        if isinstance(offer_rules, BaseException):
+            result["errors"]["fareRules"] = _error(offer_rules)
+        else:
+            adapted_rules, result["penalties"] = offer_rules
+            if adapted_rules:
+                rules_id = fare_rules_id(adapted_rules)
+                fare_rules.setdefault(rules_id, adapted_rules)
+                result["fareRulesId"] = rules_id
+        if isinstance(mini_rule, BaseException):
+            result["errors"]["miniRule"] = _error(mini_rule)
+        else:
+            result["miniRule"] = mini_rule
+        results.append(result)
+
+    failed = sum(1 for result in results if result["errors"])
+    if failed:
+        logger.warning(f"Rules batch for traceId {trace_id}: {failed} of {len(unique_offer_ids)} offers had errors.")
+    return {
+        "traceId": trace_id,
+        "results": results,
+        "fareRules": fare_rules,
+    }
@@ -1,5 +1,6 @@
 import logging
 from fastapi import HTTPException
+from app.flight_services.services.price_cache import price_cache
 from app.flight_services.clients.bdfare_client import fetch_bdfare_airbook
 from app.flight_services.clients.flyhub_client import fetch_flyhub_airbook
 from app.flight_services.adapters.airbook_bdfare import adapt_to_bdfare_airbook_request
@@ -28,20 +29,28 @@ async def fetch_airbook(payload: UnifiedAirBookRequest) -> dict:
         logger.info("Processing BDFare AirBook request.")
         bdfare_request = adapt_to_bdfare_airbook_request(payload.dict())
         logger.debug(f"Transformed request for BDFare: {bdfare_request}")
-        return await fetch_bdfare_airbook(
-            trace_id=bdfare_request["traceId"],
-            offer_ids=bdfare_request["offerId"],
-            request=bdfare_request["request"]
-        )
+        try:
+            return await fetch_bdfare_airbook(
+                trace_id=bdfare_request["traceId"],
+                offer_ids=bdfare_request["offerId"],
+                request=bdfare_request["request"]
+            )
+        finally:
+            # The offer's price may change once it is held or booked
+            await price_cache.invalidate(source, payload.traceId, payload.offerId)
     elif source == "flyhub":
         logger.info("Processing FlyHub AirBook request.")
         flyhub_request = convert_flyhub_to_bdfare_airbook_request(payload.dict())
         logger.debug(f"Transformed request for FlyHub: {flyhub_request}")
-        return await fetch_flyhub_airbook(
-            search_id=flyhub_request["SearchID"],
-            result_id=flyhub_request["ResultID"],
-            passengers=flyhub_request["Passengers"]
-        )
+        try:
+            return await fetch_flyhub_airbook(
+                search_id=flyhub_request["SearchID"],
+                result_id=flyhub_request["ResultID"],
+                passengers=flyhub_request["Passengers"]
+            )
+        finally:
+            # The offer's price may change once it is held or booked
+            await price_cache.invalidate(source, payload.traceId, payload.offerId)
     else:
         logger.error(f"Unsupported source: {source}")
         raise HTTPException(
@@ -0,0 +1,49 @@
+#app\flight_services\services\airport_index.py
+import json
+from typing import Dict, NamedTuple, Optional
+
+
+class AirportRecord(NamedTuple):
+    """Compact reference record for a single airport."""
+    iata: str
+    icao: str
+    name: str
+    city: str
+    country: str
+
+
+# Load airports data from a JSON file
+def load_airport_index(path: str = 'app/flight_services/data/airports.json') -> Dict[str, AirportRecord]:
+    """
+    Build a dict keyed by upper-cased IATA code.
+    The first entry wins for duplicate codes, matching the previous DataFrame lookup.
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+
+    index: Dict[str, AirportRecord] = {}
+    for row in data:
+        iata = row.get('IATA')
+        if not iata:
+            continue
+        code = iata.strip().upper()
+        if code in index:
+            continue
+        index[code] = AirportRecord(
+            iata=code,
+            icao=row.get('ICAO') or '',
+            name=row.get('Airport name') or '',
+            city=row.get('City') or '',
+            country=row.get('Country') or '',
+        )
+    return index
+
+
+airport_index = load_airport_index()
+
+
+def get_airport(iata_code: Optional[str]) -> Optional[AirportRecord]:
+    """Return the airport record for an IATA code, or None if it is unknown."""
+    if not iata_code:
+        return None
+    return airport_index.get(iata_code.upper())
@@ -0,0 +1,156 @@
+#app\flight_services\services\airport_search.py
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.flight_services.services.airport_index import AirportRecord, airport_index
+
+DEFAULT_LIMIT = 8
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class AirportAutocomplete:
+    """
+    Autocomplete index over the airport reference data.
+
+    Prefix matches are answered from sorted key lists with bisect, substring
+    matches from a trigram inverted index (a scan for queries under three
+    characters, which have no trigram). Results are ranked as: exact IATA,
+    exact ICAO, IATA prefix, ICAO prefix, city prefix, airport name prefix,
+    airport name substring, then any other substring (city, country or code).
+    """
+
+    def __init__(self, records: Iterable[AirportRecord]):
+        self.records: List[AirportRecord] = list(records)
+        self._iata: Dict[str, List[int]] = {}
+        self._icao: Dict[str, List[int]] = {}
+        iata_keys: List[Tuple[str, int]] = []
+        icao_keys: List[Tuple[str, int]] = []
+        city_keys: List[Tuple[str, int]] = []
+        name_keys: List[Tuple[str, int]] = []
+        self._names: List[str] = []
+        self._haystacks: List[str] = []
+        self._trigram_index: Dict[str, List[int]] = {}
+
+        for idx, record in enumerate(self.records):
+            iata = record.iata.lower()
+            icao = record.icao.lower()
+            city = record.city.lower()
+            name = record.name.lower()
+            country = record.country.lower()
+
+            self._iata.setdefault(iata, []).append(idx)
+            iata_keys.append((iata, idx))
+            if icao:
+                self._icao.setdefault(icao, []).append(idx)
+                icao_keys.append((icao, idx))
+            if city:
+                city_keys.append((city, idx))
+            name_keys.append((name, idx))
+            self._names.append(name)
+
+            # Fields are joined with a separator that never appears in a query,
+            # so substring matches cannot span two fields.
+            haystack = "\x00".join((city, country, name, iata, icao))
+            self._haystacks.append(haystack)
+            for trigram in _trigrams(haystack):
+                self._trigram_index.setdefault(trigram, []).append(idx)
+
+        iata_keys.sort()
+        icao_keys.sort()
+        city_keys.sort()
+        name_keys.sort()
+        self._iata_keys = [key for key, _ in iata_keys]
+        self._iata_ids = [idx for _, idx in iata_keys]
+        self._icao_keys = [key for key, _ in icao_keys]
+        self._icao_ids = [idx for _, idx in icao_keys]
+        self._city_keys = [key for key, _ in city_keys]
+        self._city_ids = [idx for _, idx in city_keys]
+        self._name_keys = [key for key, _ in name_keys]
+        self._name_ids = [idx for _, idx in name_keys]
+
+    @staticmethod
+    def _prefix_ids(keys: List[str], ids: List[int], prefix: str) -> List[int]:
+        start = bisect_left(keys, prefix)
+        matches = []
+        for pos in range(start, len(keys)):
+            if not keys[pos].startswith(prefix):
+                break
+            matches.append(ids[pos])
+        matches.sort()
+        return matches
+
+    def _substring_ids(self, query: str) -> List[int]:
+        if len(query) < 3:
+            return [idx for idx, haystack in enumerate(self._haystacks) if query in haystack]
+        postings = []
+        for trigram in _trigrams(query):
+            posting = self._trigram_index.get(trigram)
+            if not posting:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+        return sorted(idx for idx in candidates if query in self._haystacks[idx])
+
+    def search(self, query: Optional[str], limit: int = DEFAULT_LIMIT) -> List[AirportRecord]:
+        """Return up to `limit` ranked airport records matching the query."""
+        if not query:
+            return []
+        query = query.lower().strip()
+        if not query:
+            return []
+
+        seen: Set[int] = set()
+        results: List[AirportRecord] = []
+
+        def take(ids: Iterable[int]) -> bool:
+            for idx in ids:
+                if idx in seen:
+                    continue
+                seen.add(idx)
+                results.append(self.records[idx])
+                if len(results) >= limit:
+                    return True
+            return False
+
+        if take(self._iata.get(query, ())):
+            return results
+        if take(self._icao.get(query, ())):
+            return results
+        if take(self._prefix_ids(self._iata_keys, self._iata_ids, query)):
+            return results
+        if take(self._prefix_ids(self._icao_keys, self._icao_ids, query)):
+            return results
+        if take(self._prefix_ids(self._city_keys, self._city_ids, query)):
+            return results
+        if take(self._prefix_ids(self._name_keys, self._name_ids, query)):
+            return results
+
+        substring_ids = self._substring_ids(query)
+        if take(idx for idx in substring_ids if query in self._names[idx]):
+            return results
+        take(substring_ids)
+        return results
+
+
+airport_autocomplete: Optional[AirportAutocomplete] = None
+
+
+def build_airport_autocomplete() -> AirportAutocomplete:
+    """Build the autocomplete index from the shared airport index."""
+    global airport_autocomplete
+    airport_autocomplete = AirportAutocomplete(airport_index.values())
+    return airport_autocomplete
+
+
+def search_airports(query: Optional[str], limit: int = DEFAULT_LIMIT) -> List[AirportRecord]:
+    """Search airports, building the index on first use if startup has not run."""
+    index = airport_autocomplete or build_airport_autocomplete()
+    return index.search(query, limit=limit)
@@ -2,6 +2,7 @@ from app.flight_services.clients.bdfare_client import fetch_bdfare_airprebook
 from app.flight_services.clients.flyhub_client import fetch_flyhub_airprebook
 from app.flight_services.adapters.airprebook_flyhub import convert_bdfare_to_flyhub_airprebook_request
 from app.flight_services.adapters.airprebook_bdfare import adapt_to_bdfare_airprebook_request
+from app.flight_services.services.price_cache import price_cache
 
 import logging
 from fastapi import HTTPException
@@ -30,20 +31,28 @@ async def fetch_airprebook(payload: UnifiedAirPrebookRequest) -> dict:
         logger.info("Processing BDFare AirPrebook request.")
         bdfare_request = adapt_to_bdfare_airprebook_request(payload.dict())
         logger.debug(f"Transformed request for BDFare: {bdfare_request}")
-        return await fetch_bdfare_airprebook(
-            trace_id=bdfare_request["traceId"],
-            offer_ids=bdfare_request["offerId"],
-            request=bdfare_request["request"]
-        )
+        try:
+            return await fetch_bdfare_airprebook(
+                trace_id=bdfare_request["traceId"],
+                offer_ids=bdfare_request["offerId"],
+                request=bdfare_request["request"]
+            )
+        finally:
+            # The offer's price may change once it is held or booked
+            await price_cache.invalidate(source, payload.traceId, payload.offerId)
     elif source == "flyhub":
         logger.info("Processing FlyHub AirPrebook request.")
         flyhub_request = convert_bdfare_to_flyhub_airprebook_request(payload.dict())
         logger.debug(f"Transformed request for FlyHub: {flyhub_request}")
-        return await fetch_flyhub_airprebook(
-            search_id=flyhub_request["SearchID"],
-            result_id=flyhub_request["ResultID"],
-            passengers=flyhub_request["Passengers"]
-        )
+        try:
+            return await fetch_flyhub_airprebook(
+                search_id=flyhub_request["SearchID"],
+                result_id=flyhub_request["ResultID"],
+                passengers=flyhub_request["Passengers"]
+            )
+        finally:
+            # The offer's price may change once it is held or booked
+            await price_cache.invalidate(source, payload.traceId, payload.offerId)
     else:
         logger.error(f"Unsupported source: {source}")
         raise HTTPException(
@@ -2,6 +2,7 @@ from app.flight_services.clients.bdfare_client import fetch_bdfare_airprice
 from app.flight_services.clients.flyhub_client import fetch_flyhub_airprice
 from app.flight_services.adapters.airprice_adapter_bdfare import adapt_bdfare_response
 from app.flight_services.adapters.airprice_adapter_flyhub import convert_bdfare_to_flyhub_airprice_request
+from app.flight_services.services.price_cache import price_cache, priced_offer_ids
 import logging
 from fastapi import HTTPException
 
@@ -10,18 +11,25 @@ logger = logging.getLogger("airprice_service")
 async def fetch_airprice(payload):
     """
     Fetch air pricing details from BDFare or FlyHub.
+    Responses are cached briefly per (source, traceId, offerId); see price_cache.
     """
     source = payload.source.lower()
+    if source not in ("bdfare", "flyhub"):
+        raise HTTPException(status_code=400, detail=f"Unsupported source: {source}")
+
+    offer_ids = priced_offer_ids(source, payload.offerId)
+    cached = await price_cache.get(source, payload.traceId, offer_ids)
+    if cached is not None:
+        logger.info(f"Serving {source} price for {payload.traceId} {offer_ids} from cache.")
+        return cached
 
     if source == "bdfare":
         raw_response = await fetch_bdfare_airprice(payload.traceId, payload.offerId)
-        return raw_response  # Return raw response directly
 
-    elif source == "flyhub":
+    else:
         logger.info("Processing request for FlyHub.")
         flyhub_payload = convert_bdfare_to_flyhub_airprice_request(payload.dict())
         raw_response = await fetch_flyhub_airprice(flyhub_payload["SearchID"], flyhub_payload["ResultID"])
-        return raw_response  # Return raw response directly
 
-    else:
-        raise HTTPException(status_code=400, detail=f"Unsupported source: {source}")
+    await price_cache.set(source, payload.traceId, offer_ids, raw_response)
+    return raw_response  # Return raw response directly
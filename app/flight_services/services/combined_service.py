@@ -1,16 +1,338 @@
 import asyncio
+import logging
+import os
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from fastapi import HTTPException
 from app.flight_services.clients.bdfare_client import fetch_bdfare_flights
 from app.flight_services.clients.flyhub_client import fetch_flyhub_flights
 from app.flight_services.adapters.flyhub_adapter import convert_bdfare_to_flyhub
-from app.flight_services.adapters.combined_search import format_flight_data_with_ids
-# Removed: from app.cache import get_formatted_flights
+from app.flight_services.adapters.combined_search import normalize_flight_data
+from app.flight_services.models.combined.itinerary import Itinerary, merge_duplicates
+from app.flight_services.services.results_engine import (
+    LEGACY_GENERATION,
+    ResultSet,
+    cache_key_for_handle,
+    decode_cursor,
+    generation_cache_key,
+    result_page,
+    results_store,
+    rows_from_itineraries,
+    search_handle,
+)
+from app.flight_services.utils.metrics import FLIGHT_FORMAT_SECONDS, SEARCH_OFFERS, observe_seconds
+from app.flight_services.utils.refresh import RefreshPool
+from app.flight_services.utils.singleflight import SingleFlight
+from app.flight_services.utils.tracing import span
+from app.cache import search_cache, normalize_search_request, get_search_cache_key, get_search_ttls
+
+logger = logging.getLogger("combined_service")
+
+SOURCES = {
+    "bdfare": ("bdfare",),
+    "flyhub": ("flyhub",),
+    "all": ("bdfare", "flyhub"),
+}
+
+# Overall search SLA in seconds. When more than one provider is queried, each
+# gets <PROVIDER>_SEARCH_BUDGET seconds (capped at the SLA); providers that
+# miss it are reported as timed out and their late results only go to the
+# search cache. A single-provider search has nothing to return without its
+# provider, so it waits up to the client's own timeout.
+SEARCH_SLA_SECONDS = float(os.getenv("COMBINED_SEARCH_SLA", 4.0))
+
+# Offers requested from each provider in a single upstream search. The whole
+# set is stored and client pages are sliced from it.
+SEARCH_FETCH_SIZE = int(os.getenv("COMBINED_SEARCH_FETCH_SIZE", 500))
+
+# Keeps late-result cache writers referenced until they finish.
+_background_tasks = set()
+
+# Identical searches that arrive while one is running share its provider
+# calls and formatted result.
+search_flight = SingleFlight("combined_search")
+
+# Upstream search calls, keyed by provider request. Streams, which do not go
+# through search_flight, and searches whose sources overlap (e.g. "all" and
+# "bdfare") share a provider call that is already in flight.
+provider_flight = SingleFlight("provider_search")
+
+# Background refreshes of stale cached searches (see combined_search). At most
+# SEARCH_REFRESH_CONCURRENCY run at once so provider rate limits hold.
+search_refresh = RefreshPool(
+    "combined_search_refresh",
+    concurrency=int(os.getenv("SEARCH_REFRESH_CONCURRENCY", 4)),
+    max_pending=int(os.getenv("SEARCH_REFRESH_MAX_PENDING", 64)),
+)
+
+
+def get_provider_budget(provider: str) -> float:
+    budget = float(os.getenv(f"{provider.upper()}_SEARCH_BUDGET", SEARCH_SLA_SECONDS))
+    return min(budget, SEARCH_SLA_SECONDS)
+
+
+def _parse_search_payload(payload) -> Tuple[str, str, dict]:
+    """Validate a combined search payload and return (source, pointOfSale, request)."""
+    # Assumes payload is Pydantic model, convert to dict
+    request_payload = payload.dict()
+    point_of_sale = request_payload.get("pointOfSale")
+    source = request_payload.get("source")
+    request_data = request_payload.get("request")
+
+    if not source:
+        raise ValueError("The 'source' key is missing in the payload.")
+    if not point_of_sale:
+        raise ValueError("The 'pointOfSale' key is missing in the payload.")
+    if not request_data:
+        raise ValueError("The 'request' key is missing in the payload.")
+    if source not in SOURCES:
+        raise ValueError(f"Invalid source specified: {source}")
+    return source, point_of_sale, request_data
+
+
+def _search_cache_key(source: str, point_of_sale: str, request_data: dict) -> Tuple[str, Tuple[int, int]]:
+    """The search cache key and its (soft, hard) TTLs."""
+    # Every client page of a search shares the one upstream fetch
+    normalized = normalize_search_request(source, point_of_sale, request_data, 1, SEARCH_FETCH_SIZE)
+    return get_search_cache_key(normalized), get_search_ttls(normalized)
+
+
+def _provider_fetch(provider: str, point_of_sale: str, request_data: dict):
+    """A function starting the fetch of the full result set from one provider."""
+    if provider == "bdfare":
+        enriched_request_data = {
+            "pointOfSale": point_of_sale,
+            "request": request_data,
+        }
+        return lambda: fetch_bdfare_flights(enriched_request_data, page=1, size=SEARCH_FETCH_SIZE)
+    with span("adapter.convert_bdfare_to_flyhub"):
+        flyhub_payload = convert_bdfare_to_flyhub(request_data)
+    return lambda: fetch_flyhub_flights(flyhub_payload, page=1, size=SEARCH_FETCH_SIZE)
+
+
+def _provider_calls(source: str, point_of_sale: str, request_data: dict) -> Dict[str, object]:
+    """
+    Build one fetch coroutine per provider selected by `source`, for the full
+    result set. Each joins an identical call to that provider already in flight
+    (see provider_flight); the key is the cache key of a search of that
+    provider alone.
+    """
+    calls = {}
+    for provider in SOURCES[source]:
+        key, _ = _search_cache_key(provider, point_of_sale, request_data)
+        calls[provider] = provider_flight.do(key, _provider_fetch(provider, point_of_sale, request_data))
+    return calls
+
+
+def _provider_trace_ids(provider: str, response: dict) -> dict:
+    """The provider's own ids for a search response, as span attributes."""
+    if provider == "bdfare":
+        return {"bdfare.traceId": (response.get("response") or {}).get("traceId")}
+    if provider == "flyhub":
+        return {"flyhub.SearchId": response.get("SearchId")}
+    return {}
+
+
+def _normalize(provider: str, response: dict) -> List[Itinerary]:
+    with span("adapter.normalize_flight_data", provider=provider) as current, observe_seconds(FLIGHT_FORMAT_SECONDS, provider):
+        itineraries = normalize_flight_data({provider: response})
+        current.set_attribute("offers", len(itineraries))
+    SEARCH_OFFERS.labels(provider).observe(len(itineraries))
+    return itineraries
+
+
+async def _timed_call(provider: str, call) -> Tuple[str, Optional[dict], Optional[Exception], float]:
+    started = time.monotonic()
+    with span("provider.search", provider=provider) as current:
+        try:
+            response = await call
+        except Exception as e:
+            current.set_error(_error_detail(e))
+            return provider, None, e, time.monotonic() - started
+        if isinstance(response, dict):
+            current.set_attributes(**_provider_trace_ids(provider, response))
+    return provider, response, None, time.monotonic() - started
+
+
+def _error_detail(error: Exception) -> str:
+    if isinstance(error, HTTPException):
+        return str(error.detail)
+    return str(error)
+
+
+def _provider_status(error: Optional[Exception], elapsed: float, count: int) -> dict:
+    status = {"status": "ok", "latencyMs": round(elapsed * 1000), "count": count}
+    if error is not None:
+        status.update(status="error", error=_error_detail(error))
+    return status
+
+
+def _is_partial(providers: Dict[str, dict]) -> bool:
+    return any(status["status"] != "ok" for status in providers.values())
+
+
+def _search_result(flights: list, providers: Dict[str, dict]) -> dict:
+    return {"flights": flights, "providers": providers, "partial": _is_partial(providers)}
+
+
+class ProviderRun:
+    """
+    The provider calls of one search, each running against its own deadline.
+
+    completed() yields calls as they finish in time. Calls that miss their
+    deadline are not cancelled; they are moved to `late` so their results can
+    still be cached once they arrive. With a single provider there is no
+    deadline: a partial result would be an empty one.
+    """
+
+    def __init__(self, calls: Dict[str, object], ttls: Tuple[int, int]):
+        loop = asyncio.get_event_loop()
+        now = loop.time()
+        self.soft_ttl, self.ttl = ttls
+        self.providers = list(calls)
+        self.tasks = {provider: asyncio.ensure_future(_timed_call(provider, call)) for provider, call in calls.items()}
+        self.budgets = {provider: get_provider_budget(provider) for provider in calls} if len(calls) > 1 else {}
+        self.deadlines = {provider: now + budget for provider, budget in self.budgets.items()}
+        self.late: Dict[str, asyncio.Task] = {}
+
+    async def completed(self) -> AsyncIterator[Tuple[str, Optional[dict], Optional[Exception], float]]:
+        loop = asyncio.get_event_loop()
+        pending = {task: provider for provider, task in self.tasks.items()}
+        while pending:
+            deadlines = [self.deadlines[provider] for provider in pending.values() if provider in self.deadlines]
+            timeout = max(0.0, min(deadlines) - loop.time()) if deadlines else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                pending.pop(task)
+                yield task.result()
+            now = loop.time()
+            for task, provider in list(pending.items()):
+                if provider in self.deadlines and self.deadlines[provider] <= now:
+                    logger.warning(f"{provider} search missed its {self.budgets[provider]:.1f}s budget; returning without it.")
+                    pending.pop(task)
+                    self.late[provider] = task
+
+    def timeout_status(self, provider: str) -> dict:
+        return {"status": "timeout", "latencyMs": round(self.budgets[provider] * 1000), "count": 0}
+
+    def cancel(self):
+        """Cancel calls that are neither finished nor handed over as late."""
+        for provider, task in self.tasks.items():
+            if provider not in self.late and not task.done():
+                task.cancel()
+
+    def ordered_itineraries(self, formatted: Dict[str, List[Itinerary]]) -> List[Itinerary]:
+        # Same order as a single format_flight_data_with_ids call over all providers
+        return [itinerary for provider in self.providers for itinerary in formatted.get(provider, [])]
+
+    def store(self, cache_key: str, formatted: Dict[str, List[Itinerary]], providers: Dict[str, dict]) -> dict:
+        """
+        Merge flights offered by more than one provider, keep the results for
+        sort/filter queries and return the search result dict.
+        """
+        with span("adapter.format_flight_data", providers=",".join(formatted)) as current:
+            rows = rows_from_itineraries(merge_duplicates(self.ordered_itineraries(formatted)))
+            current.set_attribute("flights", len(rows))
+        results = _search_result([row.flight for row in rows], providers)
+        result_set = ResultSet(rows, providers, results["partial"])
+        # Cached with the flights, so every worker rebuilds the same generation
+        results["generation"] = result_set.generation
+        results_store.put(cache_key, result_set, self.ttl)
+        return results
+
+    async def finish(self, cache_key: str, formatted: Dict[str, List[Itinerary]], providers: Dict[str, dict]) -> dict:
+        """
+        Store and cache the combined result, and return it. With late providers
+        outstanding, the cache write is deferred to a background task that waits
+        for them, so the cache holds the complete result for the next identical
+        search. The partial result is cached under its generation instead, so
+        cursors issued for it keep working in every worker once it is replaced.
+        """
+        results = self.store(cache_key, formatted, providers)
+        if self.late:
+            await search_cache.set(generation_cache_key(cache_key, results["generation"]), results, self.ttl, self.ttl)
+            task = asyncio.ensure_future(self._cache_late_results(cache_key, dict(formatted), dict(providers)))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        elif any(status["status"] == "ok" for status in providers.values()):
+            await search_cache.set(cache_key, results, self.ttl, self.soft_ttl)
+        return results
+
+    async def _cache_late_results(self, cache_key: str, formatted: Dict[str, list], providers: Dict[str, dict]):
+        try:
+            for provider, response, error, elapsed in await asyncio.gather(*self.late.values()):
+                if error is None:
+                    formatted[provider] = _normalize(provider, response)
+                else:
+                    logger.error(f"{provider} search failed after its deadline: {error}")
+                providers[provider] = _provider_status(error, elapsed, len(formatted.get(provider, [])))
+            results = self.store(cache_key, formatted, providers)
+            if any(status["status"] == "ok" for status in providers.values()):
+                await search_cache.set(cache_key, results, self.ttl, self.soft_ttl)
+        except Exception:
+            logger.exception(f"Caching late search results failed for {cache_key}.")
+
+
+async def _run_search(source: str, point_of_sale: str, request_data: dict, cache_key: str, ttls: Tuple[int, int]) -> dict:
+    """Call the providers, then store and cache the combined result."""
+    run = ProviderRun(_provider_calls(source, point_of_sale, request_data), ttls)
+    formatted = {}
+    providers = {}
+    async for provider, response, error, elapsed in run.completed():
+        if error is not None:
+            # A single provider's errors propagate to the caller as before
+            if len(run.providers) == 1:
+                raise error
+            logger.error(f"{provider} search failed: {error}")
+        else:
+            formatted[provider] = _normalize(provider, response)
+        providers[provider] = _provider_status(error, elapsed, len(formatted.get(provider, [])))
+    for provider in run.late:
+        providers[provider] = run.timeout_status(provider)
+
+    return await run.finish(cache_key, formatted, providers)
+
+
+async def _refresh_search(entry, source: str, point_of_sale: str, request_data: dict, cache_key: str, ttls: Tuple[int, int]):
+    # Keep the results being replaced for the cursors already issued for them
+    remaining = int(ttls[1] - entry.age)
+    if remaining > 0:
+        generation = entry.value.get("generation", LEGACY_GENERATION)
+        await search_cache.set(generation_cache_key(cache_key, generation), entry.value, remaining, remaining)
+    return await search_flight.do(cache_key, lambda: _run_search(source, point_of_sale, request_data, cache_key, ttls))
+
+
+def _refresh_if_stale(entry, source: str, point_of_sale: str, request_data: dict, cache_key: str, ttls: Tuple[int, int]):
+    """Queue a background refresh for a cache entry past its soft TTL."""
+    if entry.is_stale:
+        search_refresh.submit(
+            cache_key,
+            lambda: _refresh_search(entry, source, point_of_sale, request_data, cache_key, ttls),
+        )
+
 
 async def combined_search(payload: dict, page: int = 1, size: int = 100) -> dict:
     """
     Perform a combined flight search using BDFare and FlyHub APIs based on the source.
-    Pagination is applied at the external API call level (upstream).
-    Caching functionality has been removed.
+    Each provider is asked once for up to SEARCH_FETCH_SIZE offers; the
+    formatted set is cached under a hash of the normalized request, and every
+    page is sliced from it, so neither a repeated search nor a later page
+    makes an upstream call. Cached results past their soft TTL are still
+    served while a background refresh (see search_refresh) replaces them;
+    past the hard TTL they are gone and the search waits for the providers.
+    `nextCursor` addresses the following page (see combined_search_page);
+    it is None on the last page.
+
+    When more than one provider is queried, each runs against its own
+    deadline within the search SLA. The response carries whatever finished
+    in time plus a `providers` block with each provider's status ("ok",
+    "error" or "timeout"), latency and flight count; `partial` is true when
+    a provider is missing from the flights.
+    A flight offered by both providers is returned once, at the cheaper fare,
+    with the other offer under "AlternativeOffers".
+    `handle` identifies the stored results for /api/combined/results queries.
+    Concurrent identical searches in a worker share one provider run (see
+    search_flight).
 
     Args:
         payload (dict): The flight search request payload.
@@ -21,68 +343,32 @@ async def combined_search(payload: dict, page: int = 1, size: int = 100) -> dict
         dict: A unified structure containing the flight results.
     """
     try:
-        # Assumes payload is Pydantic model, convert to dict
-        request_payload = payload.dict()
-        point_of_sale = request_payload.get("pointOfSale")
-        source = request_payload.get("source")
-        request_data = request_payload.get("request")
-
-        if not source:
-            raise ValueError("The 'source' key is missing in the payload.")
-        if not point_of_sale:
-            raise ValueError("The 'pointOfSale' key is missing in the payload.")
-        if not request_data:
-            raise ValueError("The 'request' key is missing in the payload.")
-
-        enriched_request_data = {
-            "pointOfSale": point_of_sale,
-            "request": request_data,
-        }
-
-        raw_results = {}
-
-        if source == "bdfare":
-            raw_results["bdfare"] = await fetch_bdfare_flights(enriched_request_data, page=page, size=size)
-
-        elif source == "flyhub":
-            flyhub_payload = convert_bdfare_to_flyhub(request_data)
-            raw_results["flyhub"] = await fetch_flyhub_flights(flyhub_payload, page=page, size=size)
-
-        elif source == "all":
-            flyhub_payload = convert_bdfare_to_flyhub(request_data)
-            bdfare_task = fetch_bdfare_flights(enriched_request_data, page=page, size=size)
-            flyhub_task = fetch_flyhub_flights(flyhub_payload, page=page, size=size)
-            
-            # Use return_exceptions=True to prevent one failing task from cancelling the other
-            bdfare_response, flyhub_response = await asyncio.gather(
-                bdfare_task, flyhub_task, return_exceptions=True
+        with span("service.combined_search", page=page, size=size) as current:
+            source, point_of_sale, request_data = _parse_search_payload(payload)
+
+            cache_key, ttls = _search_cache_key(source, point_of_sale, request_data)
+            handle = search_handle(cache_key)
+            offset = (page - 1) * size
+            current.set_attributes(source=source, handle=handle)
+            entry = await search_cache.get_entry(cache_key)
+            if entry is not None:
+                current.set_attribute("cache", "stale" if entry.is_stale else "hit")
+                _refresh_if_stale(entry, source, point_of_sale, request_data, cache_key, ttls)
+                cached = entry.value
+                return result_page(
+                    cached["flights"], cached.get("providers", {}), cached.get("partial", False),
+                    handle, cached.get("generation", LEGACY_GENERATION), offset, size,
+                )
+
+            current.set_attribute("cache", "miss")
+            results = await search_flight.do(
+                cache_key, lambda: _run_search(source, point_of_sale, request_data, cache_key, ttls)
             )
-            
-            # Handle exceptions from gather if necessary, or assign results/None
-            if isinstance(bdfare_response, Exception):
-                 # Log the exception or handle specifically if needed
-                 # logger.error("BDFare task failed", exc_info=bdfare_response)
-                 bdfare_response = None # Or handle the error appropriately
-            if isinstance(flyhub_response, Exception):
-                 # Log the exception or handle specifically if needed
-                 # logger.error("FlyHub task failed", exc_info=flyhub_response)
-                 flyhub_response = None # Or handle the error appropriately
-
-            raw_results["bdfare"] = bdfare_response
-            raw_results["flyhub"] = flyhub_response
-
-        else:
-            raise ValueError(f"Invalid source specified: {source}")
-
-        # Format the raw results directly, bypassing the cache function
-        # Assumes format_flight_data_with_ids takes the raw_results dict
-        # and returns the desired structured format.
-        # Based on the original code, get_formatted_flights likely passed raw_results
-        # to format_flight_data_with_ids.
-        formatted_results = format_flight_data_with_ids(raw_results)
 
-        # Return the formatted results in the expected structure
-        return {"flights": formatted_results.get("Flights", [])}
+            # Return the requested page in the expected structure
+            return result_page(
+                results["flights"], results["providers"], results["partial"], handle, results["generation"], offset, size
+            )
 
 
     except KeyError as e:
@@ -96,6 +382,123 @@ async def combined_search(payload: dict, page: int = 1, size: int = 100) -> dict
         # Catch any other unexpected errors
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
+
+async def warm_search(payload) -> Optional[Dict[str, dict]]:
+    """
+    Make sure the search cache holds fresh results for a search, for the
+    pre-warming scheduler. A fresh entry is left alone and None is returned;
+    a missing or stale one is fetched now (joining any identical search in
+    flight) and the run's `providers` block is returned. Errors propagate.
+    """
+    source, point_of_sale, request_data = _parse_search_payload(payload)
+    cache_key, ttls = _search_cache_key(source, point_of_sale, request_data)
+    entry = await search_cache.get_entry(cache_key)
+    if entry is not None and not entry.is_stale:
+        return None
+    results = await search_flight.do(
+        cache_key, lambda: _run_search(source, point_of_sale, request_data, cache_key, ttls)
+    )
+    return results["providers"]
+
+
+async def combined_search_page(cursor: str) -> dict:
+    """
+    Return the page a cursor from combined_search addresses, sliced from the
+    stored result set in the same order. No provider is called; a cursor whose
+    search has expired raises 404. A cursor keeps paging the result set it
+    was issued for after a refresh or late provider results replace it, until
+    that set expires; then it raises 409.
+    """
+    try:
+        handle, generation, offset, size = decode_cursor(cursor)
+    except ValueError as ve:
+        raise HTTPException(status_code=422, detail=f"Validation Error: {str(ve)}")
+    result_set = await results_store.get(cache_key_for_handle(handle), generation)
+    if result_set is None:
+        raise HTTPException(status_code=404, detail="Search results not found or expired; repeat the search.")
+    if result_set.generation != generation:
+        raise HTTPException(status_code=409, detail="Search results have been refreshed; repeat the search.")
+    return result_set.page(handle, offset, size)
+
+
+def prepare_combined_search_stream(payload) -> AsyncIterator[dict]:
+    """
+    Validate a combined search payload and return an async iterator of frames.
+
+    Validation runs eagerly so bad requests fail with 422 before a streaming
+    response is started. See combined_search_stream for the frame format.
+    """
+    try:
+        source, point_of_sale, request_data = _parse_search_payload(payload)
+    except ValueError as ve:
+        raise HTTPException(status_code=422, detail=f"Validation Error: {str(ve)}")
+    return combined_search_stream(source, point_of_sale, request_data)
+
+
+async def combined_search_stream(source: str, point_of_sale: str, request_data: dict) -> AsyncIterator[dict]:
+    """
+    Streaming variant of combined_search.
+
+    Yields one {"type": "flights", "source": <provider>, "flights": [...]} frame
+    per provider as soon as that provider responds and is formatted, then a
+    final {"type": "summary", ...} frame with the same `providers` block and
+    `partial` flag as combined_search. A cache hit is sent as a single
+    flights frame with source "cache". Provider deadlines and caching behave
+    exactly as in combined_search; the stream carries the full result set
+    rather than one page. Flights frames are sent before the other
+    provider has answered, so they are not de-duplicated; the stored results
+    behind the summary's `handle` are.
+    """
+    started = time.monotonic()
+    cache_key, ttls = _search_cache_key(source, point_of_sale, request_data)
+    entry = await search_cache.get_entry(cache_key)
+    if entry is not None:
+        _refresh_if_stale(entry, source, point_of_sale, request_data, cache_key, ttls)
+        cached = entry.value
+        yield {"type": "flights", "source": "cache", "flights": cached["flights"]}
+        yield {
+            "type": "summary",
+            "handle": search_handle(cache_key),
+            "cached": True,
+            "total": len(cached["flights"]),
+            "providers": cached.get("providers", {}),
+            "partial": cached.get("partial", False),
+            "elapsedMs": round((time.monotonic() - started) * 1000),
+        }
+        return
+
+    run = ProviderRun(_provider_calls(source, point_of_sale, request_data), ttls)
+    formatted = {}
+    providers = {}
+    try:
+        async for provider, response, error, elapsed in run.completed():
+            if error is not None:
+                logger.error(f"{provider} search failed: {error}")
+            else:
+                formatted[provider] = _normalize(provider, response)
+            providers[provider] = _provider_status(error, elapsed, len(formatted.get(provider, [])))
+            if error is None:
+                yield {"type": "flights", "source": provider, "flights": [itinerary.to_dict() for itinerary in formatted[provider]]}
+    finally:
+        # The client may disconnect mid-stream; stop waiting for the provider
+        # calls (provider_flight lets them finish for any other search sharing them)
+        run.cancel()
+
+    for provider in run.late:
+        providers[provider] = run.timeout_status(provider)
+    results = await run.finish(cache_key, formatted, providers)
+
+    yield {
+        "type": "summary",
+        "handle": search_handle(cache_key),
+        "cached": False,
+        # The stored (de-duplicated) set, as /search/page and /results count it
+        "total": len(results["flights"]),
+        "providers": providers,
+        "partial": _is_partial(providers),
+        "elapsedMs": round((time.monotonic() - started) * 1000),
+    }
+
 # for raw data
 
 # import logging
@@ -0,0 +1,178 @@
+#app\flight_services\services\fare_rules_cache.py
+"""
+Two-level cache for adapted BDFare fare rules.
+
+Level 1 maps an offer (traceId, offerId) to its rule layout: the routes and,
+per route, the (paxType, fareBasisCode) pairs, without any rule text.
+Level 2 maps (route, paxType, fareBasisCode) to the adapted rule details,
+zlib-compressed, next to the penalties parsed from them. Rule texts are
+multi-kilobyte and identical for every offer with the same fare basis on a
+route, so level 2 is shared across searches and stores each text once;
+get_penalties reads the parsed penalties without decompressing any text.
+
+Both levels live in Redis through the search cache's client, with a local LRU
+in front; compressed texts are base64 encoded because the client decodes
+responses as text.
+"""
+import os
+import json
+import zlib
+import base64
+import hashlib
+import logging
+from typing import List, Optional
+
+from app.cache import SearchCache, search_cache
+from app.flight_services.adapters.airrules_bdfare import AdaptedRouteFareRules
+from app.flight_services.adapters.airrules_penalties import penalty_index
+
+logger = logging.getLogger("fare_rules_cache")
+
+# An offer's layout is only useful while its traceId is
+FARE_RULES_OFFER_TTL = int(os.getenv("FARE_RULES_OFFER_TTL", 1800))
+# Rule texts change only when an airline files new rules
+FARE_RULES_TTL = int(os.getenv("FARE_RULES_TTL", 86400))
+FARE_RULES_LRU_SIZE = int(os.getenv("FARE_RULES_LRU_SIZE", 2048))
+FARE_RULES_CACHE_ENABLED = os.getenv("FARE_RULES_CACHE", "true").lower() in ("1", "true", "yes")
+
+FARE_RULES_PREFIX = "farerules:v1:"
+
+
+def _digest(*parts: str) -> str:
+    raw = json.dumps(parts, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def offer_key(trace_id: str, offer_id: str) -> str:
+    return f"{FARE_RULES_PREFIX}offer:{_digest(trace_id, offer_id)}"
+
+
+def rule_key(route: str, pax_type: str, fare_basis_code: str) -> str:
+    return f"{FARE_RULES_PREFIX}rule:{_digest(route, pax_type, fare_basis_code)}"
+
+
+def compress_rules(rule_details: list) -> str:
+    raw = json.dumps(rule_details, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.b64encode(zlib.compress(raw, 6)).decode("ascii")
+
+
+def decompress_rules(blob: str) -> list:
+    return json.loads(zlib.decompress(base64.b64decode(blob)).decode("utf-8"))
+
+
+class FareRulesCache:
+    """Level 1: offer -> rule layout. Level 2: (route, paxType, fareBasisCode) -> compressed rule details."""
+
+    def __init__(self, redis_client=None):
+        self.offers = SearchCache(
+            redis_client,
+            ttl=FARE_RULES_OFFER_TTL,
+            lru_size=FARE_RULES_LRU_SIZE,
+            soft_ttl=FARE_RULES_OFFER_TTL,
+            name="fare_rules_offers",
+        )
+        self.rules = SearchCache(
+            redis_client,
+            ttl=FARE_RULES_TTL,
+            lru_size=FARE_RULES_LRU_SIZE,
+            local_ttl=FARE_RULES_TTL,
+            soft_ttl=FARE_RULES_TTL,
+            name="fare_rules_texts",
+        )
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, trace_id: str, offer_id: str) -> Optional[List[AdaptedRouteFareRules]]:
+        """The adapted rules for an offer, or None unless every rule text is cached."""
+        if not FARE_RULES_CACHE_ENABLED:
+            return None
+        layout = await self.offers.get(offer_key(trace_id, offer_id))
+        if layout is None:
+            self.misses += 1
+            return None
+        adapted = []
+        for route in layout["routes"]:
+            pax_specific_rules = []
+            for pax in route["pax"]:
+                stored = await self.rules.get(rule_key(route["route"], pax["pax_type"], pax["fare_basis_code"]))
+                if stored is None:
+                    # The text was evicted before the layout; fetch the offer again
+                    self.misses += 1
+                    return None
+                rule_details = decompress_rules(stored["z"])
+                if "p" in stored:
+                    penalties = stored["p"]
+                    penalty_index.put(route["route"], pax["pax_type"], pax["fare_basis_code"], penalties)
+                else:
+                    penalties = penalty_index.get_or_parse(route["route"], pax["pax_type"], pax["fare_basis_code"], rule_details)
+                pax_specific_rules.append({
+                    "pax_type": pax["pax_type"],
+                    "fare_basis_code": pax["fare_basis_code"],
+                    "rule_details": rule_details,
+                    "penalties": penalties,
+                })
+            adapted.append({"route": route["route"], "pax_specific_rules": pax_specific_rules})
+        self.hits += 1
+        return adapted
+
+    async def set(self, trace_id: str, offer_id: str, adapted: List[AdaptedRouteFareRules]):
+        if not FARE_RULES_CACHE_ENABLED or not adapted:
+            return
+        layout = {"routes": []}
+        for route in adapted:
+            pax_layout = []
+            for pax in route["pax_specific_rules"]:
+                await self.rules.set(
+                    rule_key(route["route"], pax["pax_type"], pax["fare_basis_code"]),
+                    {"z": compress_rules(pax["rule_details"]), "p": pax.get("penalties")},
+                )
+                pax_layout.append({"pax_type": pax["pax_type"], "fare_basis_code": pax["fare_basis_code"]})
+            layout["routes"].append({"route": route["route"], "pax": pax_layout})
+        await self.offers.set(offer_key(trace_id, offer_id), layout)
+
+    async def get_penalties(self, trace_id: str, offer_id: str) -> Optional[List[dict]]:
+        """
+        The parsed penalties per route and passenger type of an offer, or None
+        on a miss. Served from the worker's penalty index, else from the level-2
+        entries; rule texts are never decompressed or parsed here.
+        """
+        if not FARE_RULES_CACHE_ENABLED:
+            return None
+        layout = await self.offers.get(offer_key(trace_id, offer_id))
+        if layout is None:
+            self.misses += 1
+            return None
+        summary = []
+        for route in layout["routes"]:
+            for pax in route["pax"]:
+                found, penalties = penalty_index.get(route["route"], pax["pax_type"], pax["fare_basis_code"])
+                if not found:
+                    stored = await self.rules.get(rule_key(route["route"], pax["pax_type"], pax["fare_basis_code"]))
+                    if stored is None or "p" not in stored:
+                        self.misses += 1
+                        return None
+                    penalties = stored["p"]
+                    penalty_index.put(route["route"], pax["pax_type"], pax["fare_basis_code"], penalties)
+                summary.append({
+                    "route": route["route"],
+                    "pax_type": pax["pax_type"],
+                    "fare_basis_code": pax["fare_basis_code"],
+                    "penalties": penalties,
+                })
+        self.hits += 1
+        return summary
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": FARE_RULES_CACHE_ENABLED,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "cachedOffers": len(self.offers.local),
+            "cachedRuleTexts": len(self.rules.local),
+            "penaltyIndex": penalty_index.stats(),
+        }
+
+
+fare_rules_cache = FareRulesCache(search_cache.redis)
@@ -0,0 +1,317 @@
+#app\flight_services\services\prewarm.py
+"""
+Background pre-warming of the combined search cache for top routes.
+
+A PrewarmScheduler periodically searches every configured route, date offset
+and passenger mix so popular searches are answered from the cache. Searches
+whose cache entry is still fresh are skipped; see warm_search.
+
+Exactly one process warms the cache: inside the API, the gunicorn worker that
+takes the lock file at startup (PREWARM_ENABLED=true), or a separate process:
+
+    python -m app.flight_services.services.prewarm
+
+The scheduler writes its status to PREWARM_STATUS_FILE so any worker can
+serve /api/combined/prewarm/status.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from app.cache import SEARCH_CACHE_BACKEND, search_cache
+from app.flight_services.clients.http_pool import provider_pool
+from app.flight_services.models.combined.combined_search import FlightSearchRequest
+from app.flight_services.services.combined_service import SOURCES, warm_search
+
+logger = logging.getLogger("prewarm")
+
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "false").lower() in ("1", "true", "yes")
+PREWARM_CONFIG = os.getenv("PREWARM_CONFIG", "app/flight_services/data/prewarm_routes.json")
+PREWARM_LOCK_FILE = os.getenv("PREWARM_LOCK_FILE", "/tmp/prewarm.lock")
+PREWARM_STATUS_FILE = os.getenv("PREWARM_STATUS_FILE", "/tmp/prewarm-status.json")
+
+# Failed jobs kept in the status for inspection
+RECENT_ERRORS = 20
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class PrewarmJob:
+    """One search to keep warm: a route, a departure date offset and a passenger mix."""
+    __slots__ = ("origin", "destination", "date_offset", "pax_mix")
+
+    def __init__(self, origin: str, destination: str, date_offset: int, pax_mix: Dict[str, int]):
+        self.origin = origin
+        self.destination = destination
+        self.date_offset = date_offset
+        self.pax_mix = pax_mix
+
+    @property
+    def label(self) -> str:
+        pax = " ".join(f"{ptc}{count}" for ptc, count in sorted(self.pax_mix.items()))
+        return f"{self.origin}-{self.destination} +{self.date_offset}d {pax}"
+
+    def request(self, config: "PrewarmConfig", today: date) -> FlightSearchRequest:
+        """The search as a client would send it, so it maps to the same cache key."""
+        pax = []
+        for ptc, count in self.pax_mix.items():
+            for _ in range(count):
+                pax.append({"paxID": f"PAX{len(pax) + 1}", "ptc": ptc})
+        return FlightSearchRequest(
+            pointOfSale=config.point_of_sale,
+            source=config.source,
+            request={
+                "originDest": [
+                    {
+                        "originDepRequest": {
+                            "iatA_LocationCode": self.origin,
+                            "date": (today + timedelta(days=self.date_offset)).isoformat(),
+                        },
+                        "destArrivalRequest": {"iatA_LocationCode": self.destination},
+                    }
+                ],
+                "pax": pax,
+                "shoppingCriteria": {
+                    "tripType": "Oneway",
+                    "travelPreferences": {"vendorPref": [], "cabinCode": config.cabin_code},
+                    "returnUPSellInfo": True,
+                },
+            },
+        )
+
+
+class PrewarmConfig:
+    """Routes, date offsets, passenger mixes and pacing, loaded from PREWARM_CONFIG."""
+
+    def __init__(self, data: dict):
+        self.interval = float(data.get("intervalSeconds", 600))
+        self.jitter = float(data.get("jitter", 0.1))
+        self.rate = float(data.get("ratePerSecond", 2))
+        self.point_of_sale = data.get("pointOfSale", "BD")
+        self.source = data.get("source", "all")
+        self.cabin_code = data.get("cabinCode", "Economy")
+        if self.source not in SOURCES:
+            raise ValueError(f"Invalid prewarm source: {self.source}")
+        providers = SOURCES[self.source]
+        concurrency = data.get("providerConcurrency") or {}
+        self.provider_concurrency = {provider: int(concurrency.get(provider, 2)) for provider in providers}
+        self.jobs: List[PrewarmJob] = []
+        for route in data.get("routes", []):
+            origin, _, destination = route.upper().partition("-")
+            if not origin or not destination:
+                raise ValueError(f"Invalid prewarm route: {route!r}; use ORIGIN-DEST.")
+            for offset in data.get("dateOffsets", [1]):
+                for pax_mix in data.get("paxMixes", [{"ADT": 1}]):
+                    self.jobs.append(PrewarmJob(origin, destination, int(offset), pax_mix))
+
+    @classmethod
+    def load(cls, path: str = PREWARM_CONFIG) -> "PrewarmConfig":
+        with open(path, "r", encoding="utf-8") as file:
+            return cls(json.load(file))
+
+
+def _acquire_lock(path: str):
+    """Take an exclusive, non-blocking lock on `path`; return the open file, or None if another process holds it."""
+    try:
+        import fcntl
+    except ImportError:  # Windows development hosts; run unlocked
+        logger.warning("fcntl is unavailable; the prewarm lock is not enforced.")
+        return open(os.devnull, "w")
+    # Append mode: a losing process must not truncate the holder's pid
+    lock_file = open(path, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    lock_file.truncate(0)
+    lock_file.write(str(os.getpid()))
+    lock_file.flush()
+    return lock_file
+
+
+class PrewarmScheduler:
+    """
+    Runs a warm-up cycle over all configured jobs every `intervalSeconds`
+    (jittered by +/- `jitter`). Job starts are paced to `ratePerSecond` in a
+    shuffled order, and each provider has at most `providerConcurrency`
+    searches in flight.
+    """
+
+    def __init__(self, config_path: str = PREWARM_CONFIG, mode: str = "worker"):
+        self.config_path = config_path
+        self.mode = mode
+        self.config: Optional[PrewarmConfig] = None
+        self._lock_file = None
+        self._task: Optional[asyncio.Task] = None
+        self._status = {
+            "enabled": True,
+            "mode": mode,
+            "pid": os.getpid(),
+            "jobs": 0,
+            "cycles": 0,
+            "running": False,
+            "lastCycleStartedAt": None,
+            "lastCycleFinishedAt": None,
+            "lastCycleSeconds": None,
+            "nextCycleAt": None,
+            "lastCycle": None,
+            "recentErrors": [],
+        }
+
+    def acquire(self) -> bool:
+        """Take the prewarm lock; only the holder may run the scheduler."""
+        self._lock_file = _acquire_lock(PREWARM_LOCK_FILE)
+        return self._lock_file is not None
+
+    async def start(self) -> bool:
+        """Start the scheduler in this process if it wins the lock. Called from the app startup hook."""
+        if not self.acquire():
+            logger.info("Cache prewarming runs in another process.")
+            return False
+        self.config = PrewarmConfig.load(self.config_path)
+        if SEARCH_CACHE_BACKEND == "memory":
+            logger.warning("Search cache is in memory; prewarming only helps this worker.")
+        self._task = asyncio.ensure_future(self.run_forever())
+        logger.info(f"Cache prewarming started in pid {os.getpid()} with {len(self.config.jobs)} searches.")
+        return True
+
+    async def stop(self):
+        """Stop the scheduler and release the lock. Called from the app shutdown hook."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _next_delay(self) -> float:
+        jitter = self.config.jitter
+        return self.config.interval * random.uniform(1 - jitter, 1 + jitter)
+
+    async def run_forever(self):
+        if self.config is None:
+            self.config = PrewarmConfig.load(self.config_path)
+        self._status["jobs"] = len(self.config.jobs)
+        # Workers restarting together should not all warm at the same moment
+        await asyncio.sleep(random.uniform(0, min(self.config.interval * self.config.jitter, 30)))
+        while True:
+            try:
+                await self.run_cycle()
+            except Exception:
+                logger.exception("Prewarm cycle failed.")
+            delay = self._next_delay()
+            self._status["nextCycleAt"] = datetime.fromtimestamp(time.time() + delay, timezone.utc).isoformat(timespec="seconds")
+            self._write_status()
+            await asyncio.sleep(delay)
+
+    async def run_cycle(self):
+        config = self.config
+        jobs = list(config.jobs)
+        random.shuffle(jobs)
+        today = date.today()
+        semaphores = {provider: asyncio.Semaphore(limit) for provider, limit in config.provider_concurrency.items()}
+        counts = {"warmed": 0, "fresh": 0, "failed": 0}
+        started = time.monotonic()
+        self._status.update(running=True, lastCycleStartedAt=_now_iso(), nextCycleAt=None)
+        self._write_status()
+
+        tasks = []
+        spacing = 1.0 / config.rate if config.rate > 0 else 0.0
+        try:
+            for job in jobs:
+                # Acquire before starting the job so pacing and caps apply to upstream calls
+                for provider in sorted(semaphores):
+                    await semaphores[provider].acquire()
+                tasks.append(asyncio.ensure_future(self._run_job(job, today, semaphores, counts)))
+                if spacing:
+                    await asyncio.sleep(spacing)
+            await asyncio.gather(*tasks)
+        finally:
+            self._status["running"] = False
+
+        self._status.update(
+            cycles=self._status["cycles"] + 1,
+            lastCycleFinishedAt=_now_iso(),
+            lastCycleSeconds=round(time.monotonic() - started, 1),
+            lastCycle=counts,
+        )
+        logger.info(f"Prewarm cycle finished: {counts} in {self._status['lastCycleSeconds']}s.")
+
+    async def _run_job(self, job: PrewarmJob, today: date, semaphores: Dict[str, asyncio.Semaphore], counts: Dict[str, int]):
+        try:
+            providers = await warm_search(job.request(self.config, today))
+            if providers is None:
+                counts["fresh"] += 1
+            elif any(status["status"] == "ok" for status in providers.values()):
+                counts["warmed"] += 1
+            else:
+                counts["failed"] += 1
+                self._record_error(job, f"no provider succeeded: {providers}")
+        except Exception as e:
+            counts["failed"] += 1
+            self._record_error(job, str(e) or repr(e))
+        finally:
+            for semaphore in semaphores.values():
+                semaphore.release()
+
+    def _record_error(self, job: PrewarmJob, error: str):
+        logger.warning(f"Prewarming {job.label} failed: {error}")
+        errors = self._status["recentErrors"]
+        errors.append({"search": job.label, "error": error[:300], "at": _now_iso()})
+        del errors[:-RECENT_ERRORS]
+
+    def status(self) -> dict:
+        return dict(self._status)
+
+    def _write_status(self):
+        # Write then rename, so readers in other workers never see a partial file
+        tmp_path = f"{PREWARM_STATUS_FILE}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(self._status, file)
+            os.replace(tmp_path, PREWARM_STATUS_FILE)
+        except OSError as e:
+            logger.warning(f"Could not write prewarm status: {e}")
+
+
+def read_prewarm_status() -> dict:
+    """The scheduler's last written status, from whichever process runs it."""
+    try:
+        with open(PREWARM_STATUS_FILE, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {"enabled": PREWARM_ENABLED, "running": False, "cycles": 0}
+
+
+prewarm_scheduler = PrewarmScheduler()
+
+
+async def main():
+    scheduler = PrewarmScheduler(mode="standalone")
+    if not scheduler.acquire():
+        logger.error(f"Another process holds {PREWARM_LOCK_FILE}; not starting.")
+        return
+    await provider_pool.startup()
+    try:
+        await scheduler.run_forever()
+    finally:
+        await scheduler.stop()
+        await provider_pool.shutdown()
+        await search_cache.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+#app\flight_services\services\price_cache.py
+import os
+import json
+import hashlib
+import logging
+from typing import List, Optional
+
+from app.cache import SearchCache, search_cache
+
+logger = logging.getLogger("price_cache")
+
+# Offers are usually re-priced within a minute across the review, prebook
+# and book screens; keep entries only that long.
+PRICE_CACHE_TTL = int(os.getenv("PRICE_CACHE_TTL", 60))
+PRICE_CACHE_ENABLED = os.getenv("PRICE_CACHE", "true").lower() in ("1", "true", "yes")
+
+PRICE_CACHE_PREFIX = "price:v1:"
+
+
+def priced_offer_ids(source: str, offer_ids: Optional[List[str]]) -> List[str]:
+    """The offer ids a price request actually sends upstream: FlyHub prices only the first (its ResultID)."""
+    offer_ids = list(offer_ids or [])
+    return offer_ids[:1] if source == "flyhub" else offer_ids
+
+
+def price_cache_key(source: str, trace_id: Optional[str], offer_ids: List[str]) -> str:
+    """Key for (source, traceId/SearchID, offerIds/ResultID); offer order is kept as sent."""
+    raw = json.dumps([source, trace_id, offer_ids], separators=(",", ":"))
+    return f"{PRICE_CACHE_PREFIX}{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+
+def _is_cacheable(response) -> bool:
+    # BDFare reports failures as "success": false, FlyHub as a non-null "Error"
+    return isinstance(response, dict) and response.get("success") is not False and not response.get("Error")
+
+
+class PriceCache:
+    """
+    Short-TTL cache of raw OfferPrice / AirPrice responses, shared by all
+    workers through the search cache's Redis client. There is no in-process
+    tier, so an invalidation in one worker is seen by every other worker.
+    Prebook and book invalidate the offers they act on.
+    """
+
+    def __init__(self, redis_client=None, ttl: int = PRICE_CACHE_TTL):
+        self.cache = SearchCache(redis_client, ttl=ttl, lru_size=0, soft_ttl=ttl, name="price")
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get(self, source: str, trace_id: Optional[str], offer_ids: List[str]) -> Optional[dict]:
+        if not PRICE_CACHE_ENABLED:
+            return None
+        value = await self.cache.get(price_cache_key(source, trace_id, offer_ids))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, source: str, trace_id: Optional[str], offer_ids: List[str], response: dict):
+        if PRICE_CACHE_ENABLED and _is_cacheable(response):
+            await self.cache.set(price_cache_key(source, trace_id, offer_ids), response)
+
+    async def invalidate(self, source: str, trace_id: Optional[str], offer_ids: Optional[List[str]]):
+        """
+        Drop cached prices for the offers a prebook or book acted on: the
+        exact offer list and each offer priced on its own.
+        """
+        offer_ids = priced_offer_ids(source, offer_ids)
+        keys = {price_cache_key(source, trace_id, offer_ids)}
+        keys.update(price_cache_key(source, trace_id, [offer_id]) for offer_id in offer_ids)
+        for key in keys:
+            await self.cache.delete(key)
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": PRICE_CACHE_ENABLED,
+            "ttl": self.cache.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+price_cache = PriceCache(search_cache.redis)
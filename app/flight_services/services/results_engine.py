@@ -0,0 +1,419 @@
+#app\flight_services\services\results_engine.py
+"""
+Sort, filter and facet queries over a stored combined search.
+
+Every combined search keeps its results as a ResultSet under a search handle
+(the digest part of its search cache key). A ResultSet holds one ResultRow per
+itinerary: the flight dict that is returned to clients plus typed sort and
+filter keys extracted once. Sort orders and price-bucket bounds are computed
+when the set is built, so a query is a single pass over a few hundred rows and
+never calls a provider. ResultSets live in a per-worker LRU; a worker that
+does not hold one rebuilds it from the shared search cache.
+
+Search pages are addressed by opaque cursors that encode the handle, offset
+and page size, so the next page is a slice of the stored set in a fixed order.
+A cursor also carries the generation of the set it was issued for. Refreshes
+and late provider results store a new set, with a new generation, under the
+same handle. The replaced set stays reachable by (handle, generation) until
+its TTL ends, so cursors issued for it keep paging the list they started on.
+"""
+import base64
+import binascii
+import logging
+import re
+import uuid
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from app.cache import LRUCache, SEARCH_CACHE_PREFIX, SEARCH_CACHE_TTL, search_cache
+from app.flight_services.models.combined.itinerary import FLYHUB, RETURN, Itinerary, to_float
+from app.flight_services.services.ailineLogoService import airline_registry
+
+logger = logging.getLogger("results_engine")
+
+RESULTS_STORE_SIZE = 128
+PRICE_BUCKETS = 5
+MAX_PAGE_SIZE = 100
+
+SORT_KEYS = ("price", "duration", "departure")
+
+# Departure-time windows by hour of day: (name, from hour, to hour)
+DEPARTURE_WINDOWS = (
+    ("night", 0, 6),
+    ("morning", 6, 12),
+    ("afternoon", 12, 18),
+    ("evening", 18, 24),
+)
+
+_HANDLE_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+_GENERATION_PATTERN = re.compile(r"^[0-9a-f]{1,32}$")
+# Generation of cached results stored before generations were recorded
+LEGACY_GENERATION = "0"
+_TIME_PATTERN = re.compile(r"[T ](\d{2}):(\d{2})")
+
+
+def search_handle(cache_key: str) -> str:
+    """The public handle for a search cache key."""
+    return cache_key[len(SEARCH_CACHE_PREFIX):] if cache_key.startswith(SEARCH_CACHE_PREFIX) else cache_key
+
+
+def cache_key_for_handle(handle: str) -> Optional[str]:
+    if not _HANDLE_PATTERN.match(handle or ""):
+        return None
+    return f"{SEARCH_CACHE_PREFIX}{handle}"
+
+
+def generation_cache_key(cache_key: str, generation: str) -> str:
+    """Where a replaced result set is kept for the cursors issued for it."""
+    return f"{cache_key}:{generation}"
+
+
+def new_generation() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def encode_cursor(handle: str, generation: str, offset: int, size: int) -> str:
+    """An opaque cursor for the page of `size` flights starting at `offset` of one result set."""
+    return base64.urlsafe_b64encode(f"{handle}:{generation}:{offset}:{size}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Return (handle, generation, offset, size) from a cursor; raise ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        handle, generation, offset, size = raw.split(":")
+        offset, size = int(offset), int(size)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor.")
+    if (not _HANDLE_PATTERN.match(handle) or not _GENERATION_PATTERN.match(generation)
+            or offset < 0 or not 1 <= size <= MAX_PAGE_SIZE):
+        raise ValueError("Invalid cursor.")
+    return handle, generation, offset, size
+
+
+def result_page(flights: List[dict], providers: dict, partial: bool, handle: str, generation: str, offset: int, size: int) -> dict:
+    """
+    The page of `size` flights starting at `offset` of a stored search, with
+    the total count and a cursor for the next page (None on the last page).
+    """
+    end = offset + size
+    return {
+        "flights": flights[offset:end],
+        "total": len(flights),
+        "providers": providers,
+        "partial": partial,
+        "handle": handle,
+        "nextCursor": encode_cursor(handle, generation, end, size) if end < len(flights) else None,
+    }
+
+
+def _minute_of_day(value: Optional[str]) -> Optional[int]:
+    match = _TIME_PATTERN.search(value or "")
+    if match is None:
+        return None
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+def _duration_minutes(value) -> Optional[int]:
+    """Parse "55 minutes" (formatted) or 55 / "55" (raw) into minutes."""
+    if isinstance(value, str):
+        value = value.split(" ", 1)[0]
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _sum_durations(durations: Iterable) -> Optional[int]:
+    total = 0
+    for duration in durations:
+        minutes = _duration_minutes(duration)
+        if minutes is None:
+            return None
+        total += minutes
+    return total
+
+
+def _departure_window(minute: Optional[int]) -> Optional[str]:
+    if minute is None:
+        return None
+    for name, start, end in DEPARTURE_WINDOWS:
+        if start * 60 <= minute < end * 60:
+            return name
+    return None
+
+
+class ResultRow:
+    """One itinerary of a stored search: the client-facing dict plus typed keys."""
+    __slots__ = ("flight", "price", "duration", "departure", "window", "stops", "carrier", "refundable")
+
+    def __init__(self, flight: dict, price: Optional[float], duration: Optional[int], departure: Optional[int],
+                 stops: int, carrier: Optional[str], refundable: bool):
+        self.flight = flight
+        self.price = price
+        self.duration = duration
+        self.departure = departure
+        self.window = _departure_window(departure)
+        self.stops = stops
+        self.carrier = carrier
+        self.refundable = refundable
+
+    @classmethod
+    def from_itinerary(cls, itinerary: Itinerary) -> "ResultRow":
+        outbound = itinerary.outbound
+        return cls(
+            flight=itinerary.to_dict(),
+            price=itinerary.price,
+            duration=_sum_durations(segment.duration for segment in itinerary.segments) if itinerary.segments else None,
+            departure=_minute_of_day(itinerary.departure_time),
+            stops=itinerary.stops,
+            carrier=itinerary.validating_carrier or (outbound[0].carrier if outbound else None),
+            refundable=bool(itinerary.refundable),
+        )
+
+    @classmethod
+    def from_flight(cls, flight: dict) -> "ResultRow":
+        """Rebuild keys from a formatted flight dict, e.g. one loaded from the search cache."""
+        outbound = flight.get("OutboundSegments") or []
+        segments = outbound + (flight.get("InboundSegments") or [])
+        if flight.get("Source") == FLYHUB:
+            price = to_float(flight.get("TotalFare"))
+            durations = [segment.get("JourneyDuration") for segment in segments]
+            carrier = flight.get("ValidatingCarrier") or ((outbound[0].get("Airline") or {}).get("Code") if outbound else None)
+            refundable = flight.get("IsRefundable")
+        else:
+            pricing = flight.get("Pricing") or {}
+            if flight.get("ItineraryType") == RETURN:
+                breakdowns = (pricing.get("PriceBreakdown") or {}).values()
+            else:
+                breakdowns = [pricing]
+            totals = [to_float(((breakdown or {}).get("totalPayable") or {}).get("total")) for breakdown in breakdowns]
+            price = sum(totals) if totals and None not in totals else None
+            durations = [segment.get("Duration") for segment in segments]
+            carrier = flight.get("ValidatingCarrier") or ((outbound[0].get("MarketingCarrier") or {}).get("carrierDesigCode") if outbound else None)
+            refundable = flight.get("Refundable")
+        return cls(
+            flight=flight,
+            price=price,
+            duration=_sum_durations(durations) if segments else None,
+            departure=_minute_of_day((outbound[0].get("Departure") or {}).get("ScheduledTime")) if outbound else None,
+            stops=max(len(outbound) - 1, 0),
+            carrier=carrier,
+            refundable=bool(refundable),
+        )
+
+
+def rows_from_itineraries(itineraries: Iterable[Itinerary]) -> List[ResultRow]:
+    return [ResultRow.from_itinerary(itinerary) for itinerary in itineraries]
+
+
+def _sorted_order(rows: Sequence[ResultRow], key: str) -> List[int]:
+    """Row indices in ascending key order; rows without the key go last, in original order."""
+    present = [index for index, row in enumerate(rows) if getattr(row, key) is not None]
+    missing = [index for index, row in enumerate(rows) if getattr(row, key) is None]
+    present.sort(key=lambda index: getattr(rows[index], key))
+    return present + missing
+
+
+class ResultSet:
+    """
+    The itineraries of one search with precomputed sort orders and price-bucket
+    bounds. A ResultSet is never changed once built; `generation` tells it
+    apart from earlier or later sets stored under the same handle.
+    """
+
+    def __init__(self, rows: List[ResultRow], providers: Optional[dict] = None, partial: bool = False,
+                 generation: Optional[str] = None):
+        self.rows = rows
+        self.providers = providers or {}
+        self.partial = partial
+        self.generation = generation or new_generation()
+        self.flights = [row.flight for row in rows]
+        self._orders = {}
+        for key in SORT_KEYS:
+            ascending = _sorted_order(rows, key)
+            present = sum(1 for row in rows if getattr(row, key) is not None)
+            self._orders[key] = ascending
+            self._orders[f"-{key}"] = ascending[:present][::-1] + ascending[present:]
+        prices = [row.price for row in rows if row.price is not None]
+        self.min_price = min(prices) if prices else None
+        self.max_price = max(prices) if prices else None
+
+    @classmethod
+    def from_cached(cls, cached: dict) -> "ResultSet":
+        return cls(
+            [ResultRow.from_flight(flight) for flight in cached.get("flights", [])],
+            providers=cached.get("providers"),
+            partial=cached.get("partial", False),
+            generation=cached.get("generation", LEGACY_GENERATION),
+        )
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def page(self, handle: str, offset: int, size: int) -> dict:
+        """A page of the itineraries in stored order; see result_page."""
+        return result_page(self.flights, self.providers, self.partial, handle, self.generation, offset, size)
+
+    def _matches(
+        self,
+        row: ResultRow,
+        airlines: Optional[set],
+        max_stops: Optional[int],
+        refundable: Optional[bool],
+        min_price: Optional[float],
+        max_price: Optional[float],
+        windows: Optional[set],
+    ) -> bool:
+        if airlines is not None and row.carrier not in airlines:
+            return False
+        if max_stops is not None and row.stops > max_stops:
+            return False
+        if refundable is not None and row.refundable != refundable:
+            return False
+        if min_price is not None and (row.price is None or row.price < min_price):
+            return False
+        if max_price is not None and (row.price is None or row.price > max_price):
+            return False
+        if windows is not None and row.window not in windows:
+            return False
+        return True
+
+    def query(
+        self,
+        sort: Optional[str] = None,
+        airlines: Optional[Iterable[str]] = None,
+        max_stops: Optional[int] = None,
+        refundable: Optional[bool] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        departure_windows: Optional[Iterable[str]] = None,
+        page: int = 1,
+        size: int = 100,
+    ) -> dict:
+        """
+        Filter, sort and page the stored itineraries.
+        `sort` is one of SORT_KEYS, prefixed with "-" for descending; None keeps
+        provider order. Facets are counted over the filtered itineraries.
+        """
+        if sort is not None and sort not in self._orders:
+            raise ValueError(f"Invalid sort key: {sort}. Use one of {', '.join(self._orders)}.")
+        airline_set = {code.upper() for code in airlines} if airlines else None
+        window_set = set(departure_windows) if departure_windows else None
+
+        order = self._orders[sort] if sort else range(len(self.rows))
+        matched = [
+            self.rows[index] for index in order
+            if self._matches(self.rows[index], airline_set, max_stops, refundable, min_price, max_price, window_set)
+        ]
+        start = (page - 1) * size
+        return {
+            "total": len(matched),
+            "page": page,
+            "size": size,
+            "flights": [row.flight for row in matched[start:start + size]],
+            "facets": self.facets(matched),
+            "providers": self.providers,
+            "partial": self.partial,
+        }
+
+    def _price_buckets(self, rows: Sequence[ResultRow]) -> List[dict]:
+        if self.min_price is None:
+            return []
+        width = (self.max_price - self.min_price) / PRICE_BUCKETS or 1.0
+        counts = [0] * PRICE_BUCKETS
+        for row in rows:
+            if row.price is not None:
+                counts[min(int((row.price - self.min_price) / width), PRICE_BUCKETS - 1)] += 1
+        return [
+            {
+                "min": round(self.min_price + index * width, 2),
+                "max": round(self.max_price if index == PRICE_BUCKETS - 1 else self.min_price + (index + 1) * width, 2),
+                "count": count,
+            }
+            for index, count in enumerate(counts)
+        ]
+
+    def facets(self, rows: Optional[Sequence[ResultRow]] = None) -> dict:
+        """Price buckets and airline, stop, refundability and departure-window counts."""
+        rows = self.rows if rows is None else rows
+        airlines: Dict[str, dict] = {}
+        stops: Dict[int, int] = {}
+        windows = {name: 0 for name, _, _ in DEPARTURE_WINDOWS}
+        refundable = {"refundable": 0, "nonRefundable": 0}
+        for row in rows:
+            if row.carrier:
+                entry = airlines.get(row.carrier)
+                if entry is None:
+                    entry = airlines[row.carrier] = {"count": 0, "minPrice": None}
+                entry["count"] += 1
+                if row.price is not None and (entry["minPrice"] is None or row.price < entry["minPrice"]):
+                    entry["minPrice"] = row.price
+            stops[row.stops] = stops.get(row.stops, 0) + 1
+            if row.window is not None:
+                windows[row.window] += 1
+            refundable["refundable" if row.refundable else "nonRefundable"] += 1
+        return {
+            "priceBuckets": self._price_buckets(rows),
+            "airlines": sorted(
+                (
+                    {"code": code, "name": airline_registry.get(code).name, "count": entry["count"], "minPrice": entry["minPrice"]}
+                    for code, entry in airlines.items()
+                ),
+                key=lambda entry: (-entry["count"], entry["code"]),
+            ),
+            "stops": [{"stops": count_stops, "count": stops[count_stops]} for count_stops in sorted(stops)],
+            "departureWindows": [
+                {"window": name, "from": f"{start:02d}:00", "to": f"{end:02d}:00", "count": windows[name]}
+                for name, start, end in DEPARTURE_WINDOWS
+            ],
+            "refundable": refundable,
+        }
+
+
+class ResultsStore:
+    """
+    Per-worker LRU of ResultSets keyed by search cache key, holding the latest
+    set of each search, plus one keyed by (search, generation) holding every
+    set issued in this worker. Misses are rebuilt from the shared search
+    cache, so any worker can answer a query for a search another worker ran.
+    """
+
+    def __init__(self, maxsize: int = RESULTS_STORE_SIZE, ttl: float = SEARCH_CACHE_TTL):
+        self.ttl = ttl
+        self._sets = LRUCache(maxsize)
+        self._issued = LRUCache(maxsize)
+
+    def put(self, cache_key: str, result_set: ResultSet, ttl: Optional[float] = None):
+        self._sets.set(cache_key, result_set, ttl or self.ttl)
+        self._issued.set(generation_cache_key(cache_key, result_set.generation), result_set, ttl or self.ttl)
+
+    async def get(self, cache_key: str, generation: Optional[str] = None) -> Optional[ResultSet]:
+        """
+        The stored ResultSet for a search. With `generation`, the set of that
+        generation if this worker or the shared search cache still has it (see
+        generation_cache_key), else the latest set; the caller still has to
+        compare generations, as the requested set may have expired.
+        """
+        if generation is not None:
+            key = generation_cache_key(cache_key, generation)
+            result_set = self._issued.get(key)
+            if result_set is not None:
+                return result_set
+            cached = await search_cache.get(key)
+            if cached is not None:
+                result_set = ResultSet.from_cached(cached)
+                self._issued.set(key, result_set, self.ttl)
+                return result_set
+        result_set = self._sets.get(cache_key)
+        if result_set is not None and (generation is None or result_set.generation == generation):
+            return result_set
+        cached = await search_cache.get(cache_key)
+        if cached is None:
+            return result_set
+        if result_set is None or cached.get("generation", LEGACY_GENERATION) != result_set.generation:
+            result_set = ResultSet.from_cached(cached)
+            self.put(cache_key, result_set)
+        return result_set
+
+
+results_store = ResultsStore()
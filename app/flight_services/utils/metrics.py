@@ -0,0 +1,95 @@
+#app\flight_services\utils\metrics.py
+"""
+Prometheus metrics, served at /metrics.
+
+Under gunicorn each worker is a separate process, so metrics are kept in
+prometheus_client's multiprocess mode: PROMETHEUS_MULTIPROC_DIR must be set
+before the workers start (gunicorn.conf.py does this and cleans up after
+exited workers), and /metrics aggregates the files of all workers. Without
+the variable, e.g. under a plain `uvicorn main:app`, the default in-process
+registry is served.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+FORMAT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+BYTES_BUCKETS = tuple(1024 * 4 ** power for power in range(8))  # 1 KiB .. 16 MiB
+OFFER_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 200, 500, 1000)
+
+PROVIDER_REQUEST_SECONDS = Histogram(
+    "provider_request_seconds",
+    "Upstream provider call latency, including retries.",
+    ["provider", "operation", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+PROVIDER_RESPONSE_BYTES = Histogram(
+    "provider_response_bytes",
+    "Upstream provider response body size.",
+    ["provider", "operation"],
+    buckets=BYTES_BUCKETS,
+)
+PROVIDER_RETRIES = Counter(
+    "provider_retries_total",
+    "Upstream provider attempts that were retried.",
+    ["provider", "operation"],
+)
+PROVIDER_INFLIGHT = Gauge(
+    "provider_inflight_requests",
+    "Upstream provider calls in flight.",
+    ["provider", "operation"],
+    multiprocess_mode="livesum",
+)
+FLIGHT_FORMAT_SECONDS = Histogram(
+    "flight_format_seconds",
+    "Time to normalize provider search responses into combined itineraries.",
+    ["provider"],
+    buckets=FORMAT_BUCKETS,
+)
+SEARCH_OFFERS = Histogram(
+    "search_offers_per_response",
+    "Itineraries per provider search response.",
+    ["provider"],
+    buckets=OFFER_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Cache lookups per cache, tier (local or redis) and result (hit or miss).",
+    ["cache", "tier", "result"],
+)
+TOKEN_REFRESHES = Counter(
+    "token_refreshes_total",
+    "Provider authentication token refreshes.",
+    ["provider", "outcome"],
+)
+
+
+def status_class(status_code) -> str:
+    """Bucket an HTTP status for labels: "2xx", "4xx", ...; "error" when no response arrived."""
+    return f"{status_code // 100}xx" if status_code else "error"
+
+
+@contextmanager
+def observe_seconds(histogram: Histogram, *labels: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(*labels).observe(time.perf_counter() - started)
+
+
+def render_metrics():
+    """The exposition body and its content type, aggregated across workers in multiprocess mode."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,162 @@
+#app\flight_services\utils\provider_log.py
+"""
+Sampled request / response logging for provider calls.
+
+ProviderPool logs every upstream exchange here instead of each client logging
+payloads and bodies itself. A sampled exchange is one INFO line on the
+"provider_io" logger with the request payload and response body; failed
+exchanges are always logged. Bodies are
+redacted and capped, and only formatted if the line is actually emitted.
+Response bodies are logged from the raw text and never parsed here; the
+client's own response.json() stays the only parse.
+
+    PROVIDER_LOG_SAMPLE_RATE=0.01
+    PROVIDER_LOG_SAMPLE_RATES="OrderCreate=1,AirBook=1,AirShopping=0"
+    PROVIDER_LOG_MAX_BYTES=2048
+"""
+import json
+import logging
+import os
+import random
+import re
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("provider_io")
+
+# Fraction of exchanges logged for operations without an override
+PROVIDER_LOG_SAMPLE_RATE = float(os.getenv("PROVIDER_LOG_SAMPLE_RATE", 0.01))
+# Per-operation overrides as "Operation=rate" pairs, comma-separated
+PROVIDER_LOG_SAMPLE_RATES = os.getenv("PROVIDER_LOG_SAMPLE_RATES", "")
+# Bodies are cut to this many characters after redaction
+PROVIDER_LOG_MAX_BYTES = int(os.getenv("PROVIDER_LOG_MAX_BYTES", 2048))
+
+# Bookings, ticketing and cancellations are rare and worth keeping for support
+DEFAULT_OPERATION_RATES = {
+    "OrderSell": 1.0,
+    "OrderCreate": 1.0,
+    "OrderChange": 1.0,
+    "OrderCancel": 1.0,
+    "AirPreBook": 1.0,
+    "AirBook": 1.0,
+    "AirTicketing": 1.0,
+    "AirCancel": 1.0,
+}
+
+REDACTED = "***"
+
+# Key fragments, compared against lower-cased keys without separators
+_SENSITIVE_KEYS = (
+    "apikey", "token", "password", "secret", "authorization", "passport", "document",
+    "identitydoc", "expirydate", "nationalid", "birth",
+)
+_SENSITIVE_TEXT_RE = re.compile(
+    r'"([\w-]*(?:api[_-]?key|token|password|secret|authorization|passport|document|identity[_-]?doc'
+    r'|expiry[_-]?date|national[_-]?id|birth)[\w-]*)"'
+    # A string or scalar value; for an object or array the keys inside it are masked instead
+    r'\s*:\s*(?:"(?:[^"\\]|\\.)*(?:"|$)|[^,{}\[\]\s]+)',
+    re.IGNORECASE,
+)
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse "Operation=rate,..." into a dict, ignoring malformed pairs."""
+    rates = dict(DEFAULT_OPERATION_RATES)
+    for pair in spec.split(","):
+        operation, _, rate = pair.strip().partition("=")
+        if not operation or not rate:
+            continue
+        try:
+            rates[operation.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            logger.warning(f"Ignoring invalid provider log sample rate: {pair!r}")
+    return rates
+
+
+SAMPLE_RATES = parse_sample_rates(PROVIDER_LOG_SAMPLE_RATES)
+
+
+def _is_sensitive(key: str) -> bool:
+    normalized = re.sub(r"[^a-z]", "", key.lower())
+    return any(fragment in normalized for fragment in _SENSITIVE_KEYS)
+
+
+def redact(value: Any) -> Any:
+    """A copy of a JSON-like value with sensitive keys masked."""
+    if isinstance(value, dict):
+        return {key: REDACTED if isinstance(key, str) and _is_sensitive(key) else redact(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+
+def redact_text(text: str) -> str:
+    """Mask sensitive keys in raw JSON text without parsing it; works on truncated text."""
+    return _SENSITIVE_TEXT_RE.sub(lambda match: f'"{match.group(1)}":"{REDACTED}"', text)
+
+
+def _cap(text: str, max_bytes: int, total: Optional[int] = None) -> str:
+    if len(text) <= max_bytes:
+        return text
+    return f"{text[:max_bytes]}...[{total or len(text)} chars total]"
+
+
+class _LazyBody:
+    """Formats a payload or response body only when the log line is emitted."""
+    __slots__ = ("value", "max_bytes")
+
+    def __init__(self, value: Any, max_bytes: int):
+        self.value = value
+        self.max_bytes = max_bytes
+
+    def __str__(self) -> str:
+        value = self.value
+        if value is None:
+            return "-"
+        if hasattr(value, "status_code"):
+            # An httpx.Response: log its raw text, never its parsed body
+            value = value.text
+        if isinstance(value, (bytes, bytearray)):
+            value = value.decode("utf-8", "replace")
+        if isinstance(value, str):
+            # Redact a little past the cap so a masked value is not cut open
+            return _cap(redact_text(value[: self.max_bytes * 2]), self.max_bytes, len(value))
+        try:
+            text = json.dumps(redact(value), ensure_ascii=False, separators=(",", ":"), default=str)
+        except (TypeError, ValueError):
+            text = repr(value)
+        return _cap(text, self.max_bytes)
+
+
+def should_sample(operation: str, failed: bool = False) -> bool:
+    if not logger.isEnabledFor(logging.INFO):
+        return False
+    if failed:
+        return True
+    rate = SAMPLE_RATES.get(operation, PROVIDER_LOG_SAMPLE_RATE)
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+def log_exchange(
+    provider: str,
+    operation: str,
+    payload: Any,
+    response: Optional[Any],
+    elapsed: float,
+    attempts: int = 1,
+):
+    """
+    Log one request / response pair if its operation is sampled. Failures
+    (transport errors, where response is None, and 4xx / 5xx) are always logged.
+    """
+    if not should_sample(operation, failed=response is None or response.status_code >= 400):
+        return
+    logger.info(
+        "%s %s -> %s in %.0fms (attempts=%d) request=%s response=%s",
+        provider,
+        operation,
+        response.status_code if response is not None else "error",
+        elapsed * 1000,
+        attempts,
+        _LazyBody(payload, PROVIDER_LOG_MAX_BYTES),
+        _LazyBody(response, PROVIDER_LOG_MAX_BYTES),
+    )
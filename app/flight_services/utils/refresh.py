@@ -0,0 +1,65 @@
+#app\flight_services\utils\refresh.py
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger("refresh")
+
+
+class RefreshPool:
+    """
+    Bounded pool of background refresh tasks, one per key.
+
+    submit() never blocks the caller. A key that is already queued or running
+    is not submitted again, at most `concurrency` refreshes run at once so
+    upstream rate limits are respected, and once `max_pending` refreshes are
+    queued further submissions are dropped; the next request for a dropped key
+    submits it again.
+    """
+
+    def __init__(self, name: str, concurrency: int, max_pending: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        # Created on first use: on Python < 3.10 a semaphore binds to the loop
+        # current at construction, which at import time is not the server's
+        self._semaphore = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.submitted = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def submit(self, key: str, fn: Callable[[], Awaitable[Any]]) -> bool:
+        """Schedule fn() as the refresh for key; return False if it was not scheduled."""
+        if key in self._pending:
+            self.deduplicated += 1
+            return False
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            logger.warning(f"{self.name}: {len(self._pending)} refreshes pending; dropping refresh for {key}.")
+            return False
+        self.submitted += 1
+        self._pending[key] = asyncio.ensure_future(self._run(key, fn))
+        return True
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[Any]]):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            async with self._semaphore:
+                await fn()
+        except Exception:
+            self.failed += 1
+            logger.exception(f"{self.name}: refresh failed for {key}.")
+        finally:
+            self._pending.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
@@ -0,0 +1,111 @@
+#app\flight_services\utils\responses.py
+import os
+import re
+import json
+import logging
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard encoder
+    orjson = None
+
+logger = logging.getLogger("responses")
+
+# Set FAST_JSON=false to send every response through the standard encoder.
+FAST_JSON_ENABLED = os.getenv("FAST_JSON", "true").lower() in ("1", "true", "yes")
+
+if orjson is not None:
+    # Datetimes, dataclasses and str/int subclasses are handed to _default so they
+    # are encoded exactly as jsonable_encoder would encode them.
+    ORJSON_OPTIONS = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+        | orjson.OPT_PASSTHROUGH_SUBCLASS
+    )
+
+
+# Tokens where orjson's output can differ from json's:
+# - json writes floats below 1e-4 in exponent form ("1e-05"), orjson does not
+#   ("0.00001"); exponent floats are all re-checked to be safe. Values and
+#   non-str keys are matched, not hex-like ids inside strings.
+# - orjson writes NaN and Infinity as null (or a "null" key) where json raises
+#   ValueError, so a null value or key may hide one.
+_MAY_DIFFER = re.compile(
+    rb'(?:^|[:,\[])(?:-?(?:\d+(?:\.\d+)?e|0\.0000)|null)'
+    rb'|[{,]"(?:-?(?:\d+(?:\.\d+)?e[-+]?\d+|0\.0000\d*)|null)":'
+)
+
+
+def _default(obj: Any) -> Any:
+    return jsonable_encoder(obj)
+
+
+def _standard_dumps(content: Any) -> bytes:
+    # Same settings as starlette's JSONResponse.render
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _stdlib_dumps(content: Any) -> bytes:
+    """
+    json.dumps with jsonable_encoder only as the default hook: the C encoder
+    handles plain JSON types itself, and the output is the same bytes.
+    Dict keys json cannot take (datetimes, tuples) raise TypeError.
+    """
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize `content` to the bytes FastAPI's default JSON response would send,
+    including the ValueError for NaN and Infinity.
+
+    Uses orjson when it is installed and FAST_JSON is enabled. Content orjson
+    cannot encode (integers over 64 bits), and bodies where its output may
+    differ (small or exponent floats, null values) go through the stdlib C
+    encoder without the jsonable_encoder pre-pass; only content that encoder
+    cannot take falls back to the full standard path.
+    """
+    if orjson is not None and FAST_JSON_ENABLED:
+        try:
+            body = orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+        except (TypeError, orjson.JSONEncodeError) as e:
+            logger.debug(f"orjson could not encode response, using the standard encoder: {e}")
+        else:
+            # A cheap scan; a string that happens to match only costs a re-encode
+            if _MAY_DIFFER.search(body) is None:
+                return body
+    try:
+        return _stdlib_dumps(content)
+    except TypeError:
+        return _standard_dumps(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson.
+
+    Return it from a route (`return FastJSONResponse(result)`) so FastAPI skips
+    its own jsonable_encoder pass as well as json.dumps. The body is the same
+    as the default JSONResponse would produce for the same content.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
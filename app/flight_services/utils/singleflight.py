@@ -0,0 +1,52 @@
+#app\flight_services\utils\singleflight.py
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger("singleflight")
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task instead of starting their own, and all
+    of them get its result or its exception. The task is shielded from the
+    callers, so one client disconnecting does not cancel the work the others
+    are waiting for. State is per process (per gunicorn worker).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+            logger.debug(f"{self.name}: joined in-flight call for {key}.")
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Future):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Every waiter may have gone away; mark the exception as retrieved
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        total = self.calls + self.coalesced
+        return {
+            "inFlight": len(self._calls),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalescedRatio": round(self.coalesced / total, 4) if total else 0.0,
+        }
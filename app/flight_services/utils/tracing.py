@@ -0,0 +1,241 @@
+#app\flight_services\utils\tracing.py
+"""
+Lightweight tracing spans, OpenTelemetry style, without a collector.
+
+    with span("service.combined_search", source=source) as current:
+        ...
+        current.set_attribute("cache", "hit")
+
+Spans nest through a context variable, so tasks started inside a span (the
+provider fetches of a search) become its children. Finished spans go to the
+exporter picked by TRACING_EXPORTER:
+
+    none    (default) spans are not recorded
+    memory  kept in `memory_exporter`, the last TRACING_MEMORY_SPANS; for tests
+    file    appended as JSON lines to TRACING_FILE, one span per line
+
+TRACING_SAMPLE_RATE picks the fraction of traces recorded; a trace is kept
+or dropped as a whole. Per-stage latency breakdown of a trace file:
+
+    python -m app.flight_services.utils.tracing /tmp/traces.jsonl
+"""
+import contextvars
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger("tracing")
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_FILE = os.getenv("TRACING_FILE", "/tmp/traces.jsonl")
+TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", 1.0))
+TRACING_MEMORY_SPANS = int(os.getenv("TRACING_MEMORY_SPANS", 10000))
+
+
+class Span:
+    """One timed stage of a trace, with attributes such as the provider traceId."""
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_time", "_started", "duration", "attributes", "status", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.attributes = attributes
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def set_error(self, error: str):
+        """Mark the span failed for an error that is handled rather than raised."""
+        self.status = "error"
+        self.error = error
+
+    def end(self):
+        self.duration = time.perf_counter() - self._started
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentId": self.parent_id,
+            "startTime": self.start_time,
+            "durationMs": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span that is not recorded; attributes are dropped."""
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, **attributes: Any):
+        pass
+
+    def set_error(self, error: str):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+# The innermost open span of the running task; NOOP_SPAN inside an unsampled trace
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class InMemoryExporter:
+    """Keeps the most recent finished spans in memory."""
+
+    def __init__(self, maxlen: int = TRACING_MEMORY_SPANS):
+        self.spans: "deque[Span]" = deque(maxlen=maxlen)
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+    def clear(self):
+        self.spans.clear()
+
+    def finished(self, name: Optional[str] = None) -> List[Span]:
+        return [span for span in self.spans if name is None or span.name == name]
+
+
+class FileExporter:
+    """Appends finished spans as JSON lines; safe to share the file across workers."""
+
+    def __init__(self, path: str = TRACING_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str, separators=(",", ":")) + "\n"
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as file:
+                file.write(line)
+        except OSError as e:
+            logger.warning(f"Could not export span {span.name}: {e}")
+
+
+memory_exporter = InMemoryExporter()
+
+
+def _build_exporter(kind: str):
+    if kind == "memory":
+        return memory_exporter
+    if kind == "file":
+        return FileExporter(TRACING_FILE)
+    if kind != "none":
+        logger.warning(f"Unknown TRACING_EXPORTER {kind!r}; tracing is off.")
+    return None
+
+
+class Tracer:
+    def __init__(self, exporter=None, sample_rate: float = TRACING_SAMPLE_RATE):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def configure(self, exporter=None, sample_rate: Optional[float] = None):
+        """Swap the exporter at runtime, e.g. tracer.configure(memory_exporter) in tests."""
+        self.exporter = exporter
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Any]:
+        parent = _current_span.get()
+        if self.exporter is None or parent is NOOP_SPAN:
+            yield NOOP_SPAN
+            return
+        if parent is None and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            # Unsampled root: children see NOOP_SPAN and skip recording too
+            token = _current_span.set(NOOP_SPAN)
+            try:
+                yield NOOP_SPAN
+            finally:
+                _current_span.reset(token)
+            return
+
+        trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex
+        current = Span(name, trace_id, parent.span_id if parent is not None else None, attributes)
+        token = _current_span.set(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.status = "error"
+            current.error = str(e) or repr(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            current.end()
+            try:
+                self.exporter.export(current)
+            except Exception:
+                logger.exception(f"Exporting span {name} failed.")
+
+
+tracer = Tracer(_build_exporter(TRACING_EXPORTER))
+
+
+def span(name: str, **attributes: Any):
+    """Open a child of the current span, or a new trace; see Tracer.span."""
+    return tracer.span(name, **attributes)
+
+
+def current_span():
+    """The innermost open span, or NOOP_SPAN outside any recorded trace."""
+    current = _current_span.get()
+    return current if current is not None else NOOP_SPAN
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def latency_breakdown(spans: Iterable[dict]) -> Dict[str, dict]:
+    """Count, p50, p95 and max duration in ms per span name, from span dicts."""
+    durations: Dict[str, List[float]] = defaultdict(list)
+    for item in spans:
+        if item.get("durationMs") is not None:
+            durations[item["name"]].append(item["durationMs"])
+    return {
+        name: {
+            "count": len(values),
+            "p50": _percentile(values, 0.5),
+            "p95": _percentile(values, 0.95),
+            "max": max(values),
+        }
+        for name, values in sorted(durations.items())
+    }
+
+
+def main(path: str = TRACING_FILE):
+    with open(path, "r", encoding="utf-8") as file:
+        spans = [json.loads(line) for line in file if line.strip()]
+    print(f"{'span':<48} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}")
+    for name, stats in latency_breakdown(spans).items():
+        print(f"{name:<48} {stats['count']:>7} {stats['p50']:>10.1f} {stats['p95']:>10.1f} {stats['max']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
@@ -0,0 +1,102 @@
+#benchmarks\format_latency.py
+"""
+Formatting latency of a combined search page, before and after the IATA
+index (airport_index.py) replaced the pandas DataFrame scans.
+
+Both formatters get the same 100 one-way offers per provider, built from
+tests/fixtures. The "old" formatter is the DataFrame-based adapter kept in
+benchmarks/fixtures/combined_search_old.py, or adapters/combined_search.py
+as of --old-rev when one is given; either way it needs pandas installed, and
+its per-lookup INFO logging goes to os.devnull rather than the terminal.
+
+    python benchmarks/format_latency.py
+    python benchmarks/format_latency.py --offers 500 --rounds 50
+    python benchmarks/format_latency.py --old-rev <revision>
+"""
+import argparse
+import copy
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+import types
+from pathlib import Path
+from typing import Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "tests")]
+os.chdir(ROOT)  # the formatters open app/flight_services/data/airports.json relative to the repo
+
+from conftest import scaled_responses  # noqa: E402
+from app.flight_services.adapters.combined_search import format_flight_data_with_ids  # noqa: E402
+
+ADAPTER = "app/flight_services/adapters/combined_search.py"
+# The adapter as it was when airports were looked up in a DataFrame
+OLD_ADAPTER = ROOT / "benchmarks" / "fixtures" / "combined_search_old.py"
+
+
+def load_old_formatter(rev: Optional[str] = None):
+    """Import the old adapter, or the adapter as it was at `rev`, under a private module name."""
+    if rev is None:
+        source = OLD_ADAPTER.read_text(encoding="utf-8")
+        filename = str(OLD_ADAPTER)
+    else:
+        source = subprocess.run(
+            ["git", "show", f"{rev}:{ADAPTER}"], cwd=ROOT, check=True, capture_output=True, text=True
+        ).stdout
+        filename = f"{rev}:{ADAPTER}"
+    module = types.ModuleType("combined_search_old")
+    module.__file__ = filename
+    exec(compile(source, module.__file__, "exec"), module.__dict__)
+    for handler in logging.getLogger("format_flight_data").handlers:
+        if isinstance(handler, logging.StreamHandler):
+            handler.setStream(open(os.devnull, "w"))
+    return module.format_flight_data_with_ids
+
+
+def measure(format_fn, data, rounds: int) -> list:
+    """Wall time in milliseconds of `rounds` calls, each on a fresh copy of the responses."""
+    timings = []
+    for _ in range(rounds):
+        payload = copy.deepcopy(data)
+        started = time.perf_counter()
+        format_fn(payload)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(label: str, timings: list) -> float:
+    median = statistics.median(timings)
+    p95 = sorted(timings)[max(0, int(len(timings) * 0.95) - 1)]
+    print(f"{label:<6} median {median:9.2f} ms   p95 {p95:9.2f} ms   min {min(timings):9.2f} ms")
+    return median
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--offers", type=int, default=100, help="offers per provider (default 100)")
+    parser.add_argument("--rounds", type=int, default=20, help="timed calls per formatter (default 20)")
+    parser.add_argument("--old-rev", help="git revision to load the old adapter from (default: the vendored copy in benchmarks/fixtures)")
+    args = parser.parse_args()
+
+    data = scaled_responses("oneway", args.offers)
+    new_format = format_flight_data_with_ids
+    try:
+        old_format = load_old_formatter(args.old_rev)
+    except ImportError as exc:
+        sys.exit(f"The old formatter needs pandas ({exc}); pip install pandas to compare.")
+
+    # Same output, or the comparison means nothing
+    if old_format(copy.deepcopy(data)) != new_format(copy.deepcopy(data)):
+        sys.exit(f"Formatter output differs from {args.old_rev or OLD_ADAPTER.name}; not comparing.")
+
+    print(f"Formatting {args.offers} BDFare + {args.offers} FlyHub offers, {args.rounds} rounds")
+    old = report("old", measure(old_format, data, args.rounds))
+    new = report("new", measure(new_format, data, args.rounds))
+    print(f"speed-up {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#benchmarks\provider_handshake.py
+"""
+Connection reuse against a local mock provider: a fresh httpx.AsyncClient per
+call (how the provider clients worked before clients/http_pool.py) versus the
+shared ProviderPool client.
+
+The mock server answers every POST with the recorded BDFare one-way search
+(tests/fixtures/bdfare_oneway.json) and counts the connections it accepts.
+With --tls it serves HTTPS with a throwaway self-signed certificate (needs the
+openssl binary), which is where most of the per-call handshake cost is.
+--connect-delay holds each new connection for the given milliseconds before
+serving it, standing in for the extra round trips to a remote provider.
+
+    python benchmarks/provider_handshake.py
+    python benchmarks/provider_handshake.py --tls --calls 200 --concurrency 10
+    python benchmarks/provider_handshake.py --tls --connect-delay 40
+"""
+import argparse
+import asyncio
+import os
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import httpx  # noqa: E402
+
+from app.flight_services.clients.http_pool import ProviderPool  # noqa: E402
+
+RESPONSE_BODY = (ROOT / "tests" / "fixtures" / "bdfare_oneway.json").read_bytes()
+REQUEST_BODY = {"pointOfSale": "BD", "request": {"originDest": [], "pax": [{"paxID": "PAX1", "ptc": "ADT"}]}}
+
+
+class MockProvider:
+    """Minimal HTTP/1.1 keep-alive server that replays one JSON response."""
+
+    def __init__(self, connect_delay: float = 0.0):
+        self.connect_delay = connect_delay
+        self.connections = 0
+        self.requests = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        if self.connect_delay:
+            await asyncio.sleep(self.connect_delay)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    name, _, value = line.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)
+                self.requests += 1
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(RESPONSE_BODY)).encode() + b"\r\n\r\n" + RESPONSE_BODY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+
+def self_signed_context(directory: str) -> ssl.SSLContext:
+    """Create a localhost certificate; SSL_CERT_FILE makes httpx trust it."""
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+         "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    os.environ["SSL_CERT_FILE"] = cert
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+async def per_call_client(url: str):
+    async with httpx.AsyncClient(timeout=60) as client:
+        response = await client.post(url, json=REQUEST_BODY)
+    response.raise_for_status()
+
+
+async def run(label: str, send, server: MockProvider, calls: int, concurrency: int) -> float:
+    server.connections = server.requests = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    timings = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await send()
+            timings.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    total = time.perf_counter() - started
+    median = statistics.median(timings)
+    print(f"{label:<9} {calls / total:8.1f} req/s   median {median:7.2f} ms   "
+          f"connections {server.connections:4d} for {server.requests} requests")
+    return median
+
+
+async def main(args):
+    server = MockProvider(args.connect_delay / 1000)
+    with tempfile.TemporaryDirectory() as directory:
+        context = self_signed_context(directory) if args.tls else None
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", 0, ssl=context)
+        port = listener.sockets[0].getsockname()[1]
+        url = f"{'https' if args.tls else 'http'}://localhost:{port}/AirShopping"
+        print(f"{args.calls} calls, {args.concurrency} at a time, against {url}")
+
+        pool = ProviderPool()
+        await pool.post("bdfare", "AirShopping", url, json=REQUEST_BODY)  # client construction is not timed
+        async with listener:
+            per_call = await run("per-call", lambda: per_call_client(url), server, args.calls, args.concurrency)
+            pooled = await run("pooled", lambda: pool.post("bdfare", "AirShopping", url, json=REQUEST_BODY),
+                               server, args.calls, args.concurrency)
+        await pool.shutdown()
+    print(f"median latency saved per call {per_call - pooled:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=100, help="requests per client mode (default 100)")
+    parser.add_argument("--concurrency", type=int, default=1, help="requests in flight at once (default 1)")
+    parser.add_argument("--tls", action="store_true", help="serve HTTPS with a self-signed certificate")
+    parser.add_argument("--connect-delay", type=float, default=0.0, help="ms to hold each new connection (default 0)")
+    asyncio.run(main(parser.parse_args()))
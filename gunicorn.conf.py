@@ -0,0 +1,27 @@
+# gunicorn.conf.py
+# gunicorn main:app -c gunicorn.conf.py
+import os
+import shutil
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", 4))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 300))
+
+# prometheus_client multiprocess mode: every worker writes its metrics to files
+# in this directory and /metrics aggregates them. It must be set before the
+# workers import prometheus_client, so it is set here in the master.
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus-multiproc")
+
+
+def on_starting(server):
+    # Files left by a previous run would be added to this run's counters
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Drop the live gauges (in-flight requests) of a worker that exited
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,8 +1,6 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
-import pandas as pd
-import json
 import logging
 from fastapi import Query
 from starlette.middleware.gzip import GZipMiddleware  # ✅ Correct import
@@ -18,8 +16,13 @@ from app.flight_services.routes.airprice.airprice_routes import router as airpri
 from app.flight_services.routes.airprebook.airprebook_routes import router as airprebook_router
 from app.flight_services.routes.airbook.airbook_routes import router as airbook_router
 from app.flight_services.routes.airretrieve.airretrieve_routes import router as airretrieve_router
-from app.flight_services.services.ailineLogoService import get_airline_by_id
+from app.flight_services.services.ailineLogoService import airline_registry
+from app.flight_services.clients.http_pool import provider_pool
+from app.cache import search_cache
+from app.flight_services.services.prewarm import PREWARM_ENABLED, prewarm_scheduler
+from app.flight_services.services.airport_search import build_airport_autocomplete, search_airports as search_airport_index
 from app.flight_services.routes.airRules.air_rules_routes import router as airRules_router
+from app.flight_services.utils.metrics import render_metrics
 
 
 # Initialize FastAPI app
@@ -69,68 +72,57 @@ class Airport(BaseModel):
             }
         }
 
-# Global variable to hold the data
-airports_df = None
-
-# Load the CSV file into a DataFrame
+# Build the airport autocomplete index once per worker
 @app.on_event("startup")
 async def load_airport_data():
-    global airports_df
-    with open('app/flight_services/data/airports.json', 'r', encoding='utf-8') as file:
-        data = json.load(file)
-    airports_df = pd.json_normalize(data)  # Convert JSON to DataFrame
-    airports_df.rename(columns={
-        'IATA': 'iata_code', 
-        'Country': 'country', 
-        'Airport name': 'airport_name', 
-        'City': 'city'
-    }, inplace=True)
-    airports_df.dropna(subset=['iata_code'], inplace=True)  # Ensure no null IATA codes
+    build_airport_autocomplete()
     logger.info("Airport data loaded successfully.")
 
 
-# Endpoint to get airport data
+# Open one pooled HTTP client per provider for the lifetime of the worker
+@app.on_event("startup")
+async def open_provider_clients():
+    await provider_pool.startup()
+
+
+# Warm the search cache for top routes; only the worker holding the prewarm
+# lock runs the scheduler (or run it separately: python -m app.flight_services.services.prewarm)
+@app.on_event("startup")
+async def start_prewarm_scheduler():
+    if PREWARM_ENABLED:
+        await prewarm_scheduler.start()
+
+
+@app.on_event("shutdown")
+async def close_provider_clients():
+    await prewarm_scheduler.stop()
+    await provider_pool.shutdown()
+    await search_cache.close()
+
+
 # Endpoint to get exactly 8 airport data
 @app.get("/api/airports/", response_model=List[Airport])
 async def search_airports(query: Optional[str] = Query(None, description="Search by airport code, name, or city")):
     if not query:
         return []
 
-    query = query.lower().strip()
-
-    # Check if the query is exactly 3 letters (airport code)
-    if len(query) == 3 and query.isalpha():
-        results = airports_df[airports_df['iata_code'].str.lower() == query]
-    else:
-        # Perform a case-insensitive search across multiple columns
-        results = airports_df[
-            airports_df['city'].str.lower().str.contains(query) |
-            airports_df['country'].str.lower().str.contains(query) |
-            airports_df['airport_name'].str.lower().str.contains(query) |
-            airports_df['iata_code'].str.lower().str.contains(query)
-        ]
-
-    # Limit the results to 8
-    limited_results = results.head(8)
-
-    # Convert the DataFrame rows to a list of Airport models
     return [
         Airport(
-            city=row['city'],
-            country=row['country'],
-            airportName=row['airport_name'],
-            code=row['iata_code']
+            city=airport.city,
+            country=airport.country,
+            airportName=airport.name,
+            code=airport.iata
         )
-        for _, row in limited_results.iterrows()
+        for airport in search_airport_index(query, limit=8)
     ]
 
 
 @app.get("/airline/{airline_id}/logo", response_model=str, status_code=200)
 def read_airline_logo(airline_id: str):
-    airline = get_airline_by_id(airline_id)
+    airline = airline_registry.find(airline_id)
     if airline is None:
         raise HTTPException(status_code=404, detail="Airline not found")
-    return airline.get('logo', 'Logo not available')
+    return airline.logo
 
 
 # Register other routes
@@ -144,6 +136,13 @@ app.include_router(airretrieve_router, prefix="/api/airretrieve", tags=["AirRetr
 app.include_router(airRules_router, prefix="/api/airrules", tags=["AirRules"])
 
 
+# Prometheus scrape endpoint; aggregates all gunicorn workers (see gunicorn.conf.py)
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/", tags=["Health"])
 async def health_check():
     logger.info("Health check endpoint accessed.")
@@ -0,0 +1,139 @@
+#tests\conftest.py
+"""
+Shared fixtures. Provider responses in tests/fixtures/ are replayed through
+the adapters, or served over httpx.MockTransport by provider_stub; nothing
+here talks to BDFare, FlyHub or Redis.
+"""
+import asyncio
+import copy
+import json
+import os
+from collections import Counter
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Read at import time by app modules, so set before any of them is imported:
+# keep the search cache in process and give FlyHub a (never contacted) host
+os.environ.setdefault("SEARCH_CACHE_BACKEND", "memory")
+os.environ.setdefault("FLYHUB_PRODUCTION_URL", "https://flyhub.test/api/v1")
+os.environ.setdefault("FLYHUB_USERNAME", "tests")
+os.environ.setdefault("FLYHUB_API_KEY", "tests")
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# Search case -> (bdfare response, flyhub response); None when the provider is not queried
+SEARCH_CASES = {
+    "oneway": ("bdfare_oneway.json", "flyhub_oneway.json"),
+    "return": ("bdfare_return.json", "flyhub_return.json"),
+    "multicity": ("bdfare_multicity.json", None),
+}
+
+
+def load_fixture(name: str):
+    with open(FIXTURES / name, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def provider_responses(case: str) -> dict:
+    """The raw responses of a search case, keyed by provider, as combined_service passes them on."""
+    bdfare_file, flyhub_file = SEARCH_CASES[case]
+    data = {"bdfare": load_fixture(bdfare_file)}
+    if flyhub_file:
+        data["flyhub"] = load_fixture(flyhub_file)
+    return data
+
+
+def scaled_responses(case: str, offers: int) -> dict:
+    """A search case with each provider's recorded offers repeated up to `offers`."""
+    data = provider_responses(case)
+    bdfare = data["bdfare"]["response"]
+    group = bdfare.get("offersGroup")
+    if isinstance(group, dict):
+        group["ob"] = [copy.deepcopy(group["ob"][i % len(group["ob"])]) for i in range(offers)]
+    elif group:
+        bdfare["offersGroup"] = [copy.deepcopy(group[i % len(group)]) for i in range(offers)]
+    if data.get("flyhub"):
+        results = data["flyhub"]["Results"]
+        data["flyhub"]["Results"] = [copy.deepcopy(results[i % len(results)]) for i in range(offers)]
+    return data
+
+
+@pytest.fixture(params=sorted(SEARCH_CASES))
+def search_case(request):
+    """(case name, provider responses, expected combined output) for each recorded search."""
+    case = request.param
+    return case, provider_responses(case), load_fixture(f"combined_{case}_expected.json")
+
+
+def search_request(origin: str = "DAC", destination: str = "CXB", date: str = "2025-03-15") -> dict:
+    """A one-way combined search request body, as clients send it."""
+    return {
+        "originDest": [{
+            "originDepRequest": {"iatA_LocationCode": origin, "date": date},
+            "destArrivalRequest": {"iatA_LocationCode": destination},
+        }],
+        "pax": [{"paxID": "PAX1", "ptc": "ADT"}],
+        "shoppingCriteria": {
+            "tripType": "Oneway",
+            "travelPreferences": {"vendorPref": [], "cabinCode": "Economy"},
+            "returnUPSellInfo": True,
+        },
+    }
+
+
+def search_payload(source: str = "all", **route):
+    from app.flight_services.models.combined.combined_search import FlightSearchRequest
+
+    return FlightSearchRequest(pointOfSale="BD", source=source, request=search_request(**route))
+
+
+class ProviderStub:
+    """
+    Answers provider HTTP calls by operation (the last URL path part) with
+    the recorded responses of a search case. `delays` holds seconds to wait
+    before answering an operation; `calls` counts requests per operation.
+    """
+
+    def __init__(self, case: str = "oneway"):
+        data = provider_responses(case)
+        self.responses = {
+            "AirShopping": data["bdfare"],
+            "AirSearch": data.get("flyhub") or {"SearchId": None, "Results": []},
+            "Authenticate": {"TokenId": "test-token"},
+        }
+        self.delays = {}
+        self.calls = Counter()
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        operation = request.url.path.rsplit("/", 1)[-1]
+        self.calls[operation] += 1
+        if self.delays.get(operation):
+            await asyncio.sleep(self.delays[operation])
+        if operation not in self.responses:
+            return httpx.Response(404, json={"message": f"No stub for {operation}"})
+        return httpx.Response(200, json=self.responses[operation])
+
+
+@pytest.fixture
+def provider_stub(monkeypatch):
+    """Route the shared provider clients to a ProviderStub for the one-way case."""
+    from app.flight_services.clients.http_pool import PROVIDERS, provider_pool
+
+    stub = ProviderStub()
+    transport = httpx.MockTransport(stub.handle)
+    monkeypatch.setattr(provider_pool, "_clients", {provider: httpx.AsyncClient(transport=transport) for provider in PROVIDERS})
+    return stub
+
+
+@pytest.fixture
+def search_state(monkeypatch):
+    """An empty search cache and results store for the test."""
+    from app.cache import InMemoryRedis, LRUCache, search_cache
+    from app.flight_services.services.results_engine import results_store
+
+    monkeypatch.setattr(search_cache, "redis", InMemoryRedis())
+    monkeypatch.setattr(search_cache, "local", LRUCache(search_cache.local.maxsize))
+    monkeypatch.setattr(results_store, "_sets", LRUCache(results_store._sets.maxsize))
+    monkeypatch.setattr(results_store, "_issued", LRUCache(results_store._issued.maxsize))
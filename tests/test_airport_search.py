@@ -0,0 +1,70 @@
+#tests\test_airport_search.py
+import pytest
+
+from app.flight_services.services.airport_index import AirportRecord
+from app.flight_services.services.airport_search import AirportAutocomplete, search_airports
+
+RECORDS = [
+    AirportRecord("ABA", "UNAA", "Abakan Airport", "Abakan", "Russia"),
+    AirportRecord("BAB", "KBAB", "Beale Air Force Base", "Marysville", "United States of America"),
+    AirportRecord("BAA", "AYBL", "Bialla Airport", "Bialla", "Papua New Guinea"),
+    AirportRecord("XBA", "BAXX", "Baxter Field", "Ruralton", "Canada"),
+    AirportRecord("ZZB", "ZZZB", "Babylon Strip", "Hilla", "Iraq"),
+    AirportRecord("QQB", "QQQB", "Central Airport", "Babruysk", "Belarus"),
+    AirportRecord("QQC", "QQQC", "Kabala Field", "Koinadugu", "Sierra Leone"),
+    AirportRecord("QQD", "QQQD", "Town Airport", "Bourg", "Barbados"),
+]
+
+
+@pytest.fixture
+def autocomplete():
+    return AirportAutocomplete(RECORDS)
+
+
+def _codes(records):
+    return [record.iata for record in records]
+
+
+def test_ranking_order(autocomplete):
+    # exact IATA, IATA prefix, ICAO prefix, city prefix, name prefix, name substring, other substring
+    assert _codes(autocomplete.search("ba", limit=20)) == ["BAB", "BAA", "XBA", "QQB", "ZZB", "ABA", "QQC", "QQD"]
+
+
+def test_exact_codes_come_first(autocomplete):
+    assert _codes(autocomplete.search("aba"))[0] == "ABA"
+    assert _codes(autocomplete.search("baxx")) == ["XBA"]
+    assert _codes(autocomplete.search("UNAA")) == ["ABA"]
+
+
+def test_limit(autocomplete):
+    assert _codes(autocomplete.search("ba", limit=3)) == ["BAB", "BAA", "XBA"]
+
+
+@pytest.mark.parametrize("query", [None, "", "   "])
+def test_empty_query(autocomplete, query):
+    assert autocomplete.search(query) == []
+
+
+def test_no_match(autocomplete):
+    assert autocomplete.search("qz") == []
+    assert autocomplete.search("nowhere") == []
+
+
+@pytest.mark.parametrize("query, code", [
+    ("cx", "CXB"),
+    ("jf", "JFK"),
+    ("vgz", "DAC"),
+    ("vgzr", "DAC"),
+    ("kjfk", "JFK"),
+    ("dac", "DAC"),
+    ("Dhaka", "DAC"),
+    ("cox", "CXB"),
+    ("new y", "JFK"),
+])
+def test_reference_data_queries(query, code):
+    assert code in _codes(search_airports(query))
+
+
+def test_exact_iata_ranks_first_in_reference_data():
+    assert _codes(search_airports("cxb"))[0] == "CXB"
+    assert _codes(search_airports("jfk"))[0] == "JFK"
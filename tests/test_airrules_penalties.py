@@ -0,0 +1,123 @@
+#tests\test_airrules_penalties.py
+import pytest
+
+from app.flight_services.adapters.airrules_penalties import (
+    AFTER_DEPARTURE,
+    ANY_TIME,
+    BEFORE_DEPARTURE,
+    PenaltyIndex,
+    parse_penalties,
+    penalties_from_rule_details,
+)
+
+
+def fee(amount=None, currency="BDT", percent=None, applies=ANY_TIME):
+    if amount is None:
+        currency = None
+    return {"amount": amount, "currency": currency, "percent": percent, "applies": applies}
+
+
+DOCSTRING_EXAMPLE = """
+CHANGES
+  BEFORE DEPARTURE
+    PER TICKET CHARGE BDT 1200 FOR REISSUE.
+  AFTER DEPARTURE
+    CHANGES NOT PERMITTED.
+CANCELLATIONS
+  PER TICKET CHARGE BDT 1500 FOR REFUND.
+  CHARGE BDT 3000 FOR NO-SHOW.
+"""
+
+# (case, text, {field: expected}); fields not listed are not checked
+CASES = [
+    ("any time", "CHANGES\nANY TIME CHARGE BDT 1000 FOR REISSUE.", {
+        "change_permitted": True, "change_fees": [fee(1000.0)], "currency": "BDT",
+    }),
+    ("no condition is any time", "CANCELLATIONS\nCHARGE USD 50.00 FOR REFUND.", {
+        "cancel_permitted": True, "cancel_fees": [fee(50.0, "USD")], "currency": "USD",
+    }),
+    ("before and after departure headers", "CANCELLATIONS\nBEFORE DEPARTURE\nCHARGE BDT 1,500 FOR REFUND.\n"
+                                           "AFTER DEPARTURE\nCHARGE BDT 2,500 FOR REFUND.", {
+        "cancel_fees": [fee(1500.0, applies=BEFORE_DEPARTURE), fee(2500.0, applies=AFTER_DEPARTURE)],
+    }),
+    ("prior to departure", "CHANGES\nPRIOR TO DEP CHARGE BDT 800 FOR CHANGE.", {
+        "change_fees": [fee(800.0, applies=BEFORE_DEPARTURE)],
+    }),
+    ("percent", "CANCELLATIONS\nBEFORE DEPARTURE CHARGE 25 PERCENT FOR REFUND.", {
+        "cancel_fees": [fee(percent=25.0, applies=BEFORE_DEPARTURE)], "currency": None,
+    }),
+    ("percent sign", "CANCELLATIONS\nCHARGE 10% FOR CANCELLATION.", {
+        "cancel_fees": [fee(percent=10.0)],
+    }),
+    ("free of charge", "CHANGES\nBEFORE DEPARTURE\nCHANGES FREE OF CHARGE.", {
+        "change_permitted": True, "change_fees": [fee(0.0, currency=None, applies=BEFORE_DEPARTURE)],
+    }),
+    ("non-refundable", "TICKET IS NON-REFUNDABLE.\nCHANGES\nCHARGE BDT 1000 FOR REISSUE.", {
+        "cancel_permitted": False, "cancel_fees": [], "change_permitted": True,
+    }),
+    ("not permitted", "CHANGES NOT PERMITTED.\nCANCELLATIONS NOT PERMITTED.", {
+        "change_permitted": False, "cancel_permitted": False, "change_fees": [], "cancel_fees": [],
+    }),
+    ("not permitted after a fee", "CHANGES\nBEFORE DEPARTURE CHARGE BDT 1200 FOR REISSUE.\nAFTER DEPARTURE CHANGES NOT PERMITTED.", {
+        "change_permitted": True, "change_fees": [fee(1200.0, applies=BEFORE_DEPARTURE)],
+    }),
+    ("no-show", "CHARGE BDT 3000 FOR NO-SHOW.", {
+        "no_show_fees": [fee(3000.0)], "change_fees": [], "cancel_fees": [],
+    }),
+    ("inline condition does not carry over", "BEFORE DEPARTURE CHARGE BDT 1000 FOR REISSUE\nNO-SHOW CHARGE BDT 2000", {
+        "change_fees": [fee(1000.0, applies=BEFORE_DEPARTURE)], "no_show_fees": [fee(2000.0)],
+    }),
+    ("not permitted clause does not carry over", "CHANGES\nNOT PERMITTED AFTER DEPARTURE.\nCHARGE BDT 900 FOR REISSUE.", {
+        "change_fees": [fee(900.0)],
+    }),
+    ("header condition carries over", "CANCELLATIONS\nAFTER DEPARTURE\nCHARGE BDT 4000 FOR REFUND.\nCHARGE BDT 5000 FOR NO SHOW.", {
+        "cancel_fees": [fee(4000.0, applies=AFTER_DEPARTURE)], "no_show_fees": [fee(5000.0, applies=AFTER_DEPARTURE)],
+    }),
+    ("new section starts at any time", "CHANGES\nAFTER DEPARTURE\nCHARGE BDT 700 FOR REISSUE.\nCANCELLATIONS\nCHARGE BDT 900 FOR REFUND.", {
+        "change_fees": [fee(700.0, applies=AFTER_DEPARTURE)], "cancel_fees": [fee(900.0)],
+    }),
+    ("for refund overrides section", "CHANGES\nCHARGE BDT 1500 FOR REFUND.", {
+        "cancel_fees": [fee(1500.0)], "change_fees": [], "change_permitted": None,
+    }),
+    ("lower case", "changes\nbefore departure charge bdt 600 for reissue.", {
+        "change_fees": [fee(600.0, applies=BEFORE_DEPARTURE)],
+    }),
+    ("docstring example", DOCSTRING_EXAMPLE, {
+        "change_permitted": True,
+        "cancel_permitted": True,
+        "change_fees": [fee(1200.0, applies=BEFORE_DEPARTURE)],
+        "cancel_fees": [fee(1500.0)],
+        "no_show_fees": [fee(3000.0)],
+        "currency": "BDT",
+    }),
+    ("nothing to parse", "FARE RULES APPLY.", {
+        "change_permitted": None, "cancel_permitted": None, "change_fees": [], "cancel_fees": [], "no_show_fees": [],
+        "currency": None,
+    }),
+]
+
+
+@pytest.mark.parametrize("text, expected", [case[1:] for case in CASES], ids=[case[0] for case in CASES])
+def test_parse_penalties(text, expected):
+    penalties = parse_penalties(text)
+    assert {field: penalties[field] for field in expected} == expected
+
+
+def test_penalties_from_rule_details_uses_the_penalties_category():
+    details = [
+        {"category_name": "Baggage", "rules_text": "CHARGE BDT 9999 FOR REISSUE."},
+        {"category_name": "PENALTIES", "rules_text": "CHANGES\nCHARGE BDT 1000 FOR REISSUE."},
+    ]
+    assert penalties_from_rule_details(details)["change_fees"] == [fee(1000.0)]
+    assert penalties_from_rule_details(details[:1]) is None
+
+
+def test_penalty_index_parses_each_fare_basis_once():
+    index = PenaltyIndex(maxsize=2)
+    details = [{"category_name": "Penalties", "rules_text": "CHARGE BDT 3000 FOR NO-SHOW."}]
+    first = index.get_or_parse("DAC-CXB", "ADT", "VOWBD", details)
+    assert index.get_or_parse("DAC-CXB", "ADT", "VOWBD", []) is first
+    index.get_or_parse("DAC-CXB", "ADT", "KOWBD", details)
+    index.get_or_parse("DAC-CXB", "CHD", "VOWBD", details)
+    assert index.get("DAC-CXB", "ADT", "VOWBD") == (False, None)
+    assert index.stats() == {"entries": 2, "hits": 1, "parses": 3}
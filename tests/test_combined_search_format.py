@@ -0,0 +1,49 @@
+#tests\test_combined_search_format.py
+"""
+Golden-output tests for the combined search formatter.
+
+tests/fixtures/combined_*_expected.json is the output of the original
+pandas-based format_flight_data_with_ids on the recorded provider responses;
+the fixtures hold no flight sold by both providers, so merge_duplicates
+leaves them as they are.
+"""
+import copy
+
+from app.flight_services.adapters.combined_search import (
+    UNKNOWN_AIRPORT,
+    UNKNOWN_CITY,
+    format_flight_data_with_ids,
+    get_airport_name_by_code,
+    get_city_by_code,
+    normalize_flight_data,
+)
+
+
+def test_format_matches_baseline(search_case):
+    _, data, expected = search_case
+    assert format_flight_data_with_ids(data) == expected
+
+
+def test_normalize_matches_baseline(search_case):
+    _, data, expected = search_case
+    assert [itinerary.to_dict() for itinerary in normalize_flight_data(data)] == expected["Flights"]
+
+
+def test_format_does_not_modify_responses(search_case):
+    _, data, _ = search_case
+    original = copy.deepcopy(data)
+    format_flight_data_with_ids(data)
+    assert data == original
+
+
+def test_failed_provider_is_skipped(search_case):
+    _, data, expected = search_case
+    flights = format_flight_data_with_ids({"bdfare": None, "flyhub": data.get("flyhub")})["Flights"]
+    assert flights == [flight for flight in expected["Flights"] if flight["Source"] == "flyhub"]
+
+
+def test_airport_lookups():
+    assert get_airport_name_by_code("DAC") == "Hazrat Shahjalal International Airport"
+    assert get_city_by_code("DAC") == "Dhaka"
+    assert get_airport_name_by_code("XXQ") == UNKNOWN_AIRPORT
+    assert get_city_by_code("XXQ") == UNKNOWN_CITY
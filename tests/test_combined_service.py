@@ -0,0 +1,224 @@
+#tests\test_combined_service.py
+import asyncio
+import base64
+
+import pytest
+from fastapi import HTTPException
+
+from app.cache import LRUCache, search_cache
+from app.flight_services.services import combined_service
+from app.flight_services.services.combined_service import (
+    combined_search,
+    combined_search_page,
+    prepare_combined_search_stream,
+)
+from app.flight_services.services.results_engine import cache_key_for_handle, results_store
+from conftest import load_fixture, search_payload
+
+pytestmark = pytest.mark.usefixtures("search_state")
+
+
+def _search(source: str = "all", size: int = 100) -> dict:
+    return asyncio.run(combined_search(search_payload(source), size=size))
+
+
+def _page(cursor: str) -> dict:
+    return asyncio.run(combined_search_page(cursor))
+
+
+async def _collect(frames) -> list:
+    return [frame async for frame in frames]
+
+
+def _stream(source: str = "all") -> list:
+    return asyncio.run(_collect(prepare_combined_search_stream(search_payload(source))))
+
+
+def _sell_first_bdfare_flight_on_flyhub(provider_stub):
+    """Make FlyHub's first result the same flight as BDFare's first offer."""
+    bdfare = provider_stub.responses["AirShopping"]["response"]["offersGroup"][0]["offer"]["paxSegmentList"][0]["paxSegment"]
+    flyhub = provider_stub.responses["AirSearch"]["Results"][0]["segments"][0]
+    flyhub["Airline"]["AirlineCode"] = bdfare["marketingCarrierInfo"]["carrierDesigCode"]
+    flyhub["Airline"]["FlightNumber"] = bdfare["flightNumber"]
+    flyhub["Origin"]["DepTime"] = bdfare["departure"]["aircraftScheduledDateTime"]
+
+
+def _search_key(source: str = "all"):
+    source, point_of_sale, request_data = combined_service._parse_search_payload(search_payload(source))
+    cache_key, ttls = combined_service._search_cache_key(source, point_of_sale, request_data)
+    return (source, point_of_sale, request_data, cache_key, ttls)
+
+
+def _rerun(source: str = "all"):
+    """Re-run a cached search, replacing its results without keeping the old ones."""
+    asyncio.run(combined_service._run_search(*_search_key(source)))
+
+
+def _refresh(source: str = "all"):
+    """Refresh a cached search the way the background refresh does."""
+    source, point_of_sale, request_data, cache_key, ttls = _search_key(source)
+    entry = asyncio.run(search_cache.get_entry(cache_key))
+    asyncio.run(combined_service._refresh_search(entry, source, point_of_sale, request_data, cache_key, ttls))
+
+
+def _new_worker(monkeypatch):
+    """Empty the per-worker stores, leaving only the shared (Redis) cache."""
+    monkeypatch.setattr(results_store, "_sets", LRUCache(results_store._sets.maxsize))
+    monkeypatch.setattr(results_store, "_issued", LRUCache(results_store._issued.maxsize))
+    monkeypatch.setattr(search_cache, "local", LRUCache(search_cache.local.maxsize))
+
+
+def test_search_combines_both_providers(provider_stub):
+    results = _search()
+    expected = load_fixture("combined_oneway_expected.json")["Flights"]
+    assert results["total"] == len(expected)
+    assert results["flights"] == expected[:100]
+    assert results["partial"] is False
+    assert {provider: status["status"] for provider, status in results["providers"].items()} == {"bdfare": "ok", "flyhub": "ok"}
+
+
+def test_repeated_search_is_served_from_cache(provider_stub):
+    first = _search()
+    second = _search()
+    assert second["flights"] == first["flights"]
+    assert provider_stub.calls["AirShopping"] == 1
+    assert provider_stub.calls["AirSearch"] == 1
+
+
+def test_slow_provider_is_cut_at_the_sla(provider_stub, monkeypatch):
+    monkeypatch.setattr(combined_service, "SEARCH_SLA_SECONDS", 0.05)
+    provider_stub.delays["AirSearch"] = 0.5
+    results = _search()
+    assert results["partial"] is True
+    assert results["providers"]["flyhub"]["status"] == "timeout"
+    assert results["flights"] and {flight["Source"] for flight in results["flights"]} == {"bdfare"}
+
+
+@pytest.mark.parametrize("source, operation", [("bdfare", "AirShopping"), ("flyhub", "AirSearch")])
+def test_single_provider_search_waits_past_the_sla(provider_stub, monkeypatch, source, operation):
+    monkeypatch.setattr(combined_service, "SEARCH_SLA_SECONDS", 0.05)
+    provider_stub.delays[operation] = 0.2
+    results = _search(source)
+    assert results["partial"] is False
+    assert results["providers"][source]["status"] == "ok"
+    assert results["flights"] and {flight["Source"] for flight in results["flights"]} == {source}
+
+
+def test_cursors_page_through_the_results(provider_stub):
+    expected = load_fixture("combined_oneway_expected.json")["Flights"]
+    page = _search(size=5)
+    flights = list(page["flights"])
+    while page["nextCursor"]:
+        page = _page(page["nextCursor"])
+        flights.extend(page["flights"])
+    assert flights == expected
+    assert provider_stub.calls["AirShopping"] == 1
+
+
+@pytest.mark.parametrize("other_worker", [False, True])
+def test_cursor_outlives_a_refresh(provider_stub, monkeypatch, other_worker):
+    first = _search(size=5)
+    provider_stub.responses["AirSearch"] = {"SearchId": None, "Results": [], "Error": None}
+    _refresh()
+    if other_worker:
+        _new_worker(monkeypatch)
+    assert _search(size=5)["total"] < first["total"]
+    # The issued cursor keeps paging the list it started on
+    assert _page(first["nextCursor"])["flights"] == load_fixture("combined_oneway_expected.json")["Flights"][5:10]
+
+
+@pytest.mark.parametrize("other_worker", [False, True])
+def test_cursor_outlives_late_results(provider_stub, monkeypatch, other_worker):
+    monkeypatch.setattr(combined_service, "SEARCH_SLA_SECONDS", 0.05)
+    provider_stub.delays["AirSearch"] = 0.1
+
+    async def partial_then_late():
+        first = await combined_search(search_payload(), size=2)
+        # Let the late FlyHub results replace the stored set
+        await asyncio.sleep(0.2)
+        if other_worker:
+            _new_worker(monkeypatch)
+        return first, await combined_search_page(first["nextCursor"]), await combined_search(search_payload(), size=2)
+
+    first, second_page, repeated = asyncio.run(partial_then_late())
+    assert first["partial"] is True and repeated["partial"] is False
+    assert repeated["total"] > first["total"]
+    assert second_page["total"] == first["total"]
+    assert {flight["Source"] for flight in second_page["flights"]} == {"bdfare"}
+
+
+def test_cursor_for_an_expired_set_is_rejected(provider_stub, monkeypatch):
+    cursor = _search(size=5)["nextCursor"]
+    _rerun()
+    _new_worker(monkeypatch)
+    with pytest.raises(HTTPException) as error:
+        _page(cursor)
+    assert error.value.status_code == 409
+    # The repeated search pages the new results
+    assert _page(_search(size=5)["nextCursor"])["flights"]
+
+
+def test_cursor_is_served_by_another_worker(provider_stub, monkeypatch):
+    first = _search(size=5)
+    _new_worker(monkeypatch)
+    assert _page(first["nextCursor"])["flights"] == load_fixture("combined_oneway_expected.json")["Flights"][5:10]
+
+
+def test_worker_with_an_older_set_rebuilds_it(provider_stub, monkeypatch):
+    first = _search(size=5)
+    cache_key = cache_key_for_handle(first["handle"])
+    older = results_store._sets.get(cache_key)
+    _rerun()
+    cursor = _search(size=5)["nextCursor"]
+    # This worker missed the new run; the shared cache has the new set
+    _new_worker(monkeypatch)
+    results_store.put(cache_key, older)
+    assert _page(cursor)["flights"]
+    assert results_store._sets.get(cache_key) is not older
+
+
+def test_malformed_cursor_is_rejected(provider_stub):
+    handle = _search(size=5)["handle"]
+    for cursor in ("not-a-cursor", base64.urlsafe_b64encode(f"{handle}:5:5".encode()).decode()):
+        with pytest.raises(HTTPException) as error:
+            _page(cursor)
+        assert error.value.status_code == 422
+
+
+def test_stream_summary_counts_the_stored_results(provider_stub):
+    _sell_first_bdfare_flight_on_flyhub(provider_stub)
+    frames = _stream()
+    summary = frames[-1]
+    streamed = sum(len(frame["flights"]) for frame in frames if frame["type"] == "flights")
+    assert summary["type"] == "summary" and summary["cached"] is False
+    assert streamed == 13
+    assert summary["total"] == 12
+    page = _search()
+    assert page["handle"] == summary["handle"]
+    assert page["total"] == summary["total"] == len(page["flights"])
+
+
+def test_concurrent_identical_searches_share_provider_calls(provider_stub):
+    provider_stub.delays.update(AirShopping=0.05, AirSearch=0.05)
+
+    async def searches():
+        return await asyncio.gather(*(combined_search(search_payload()) for _ in range(5)))
+
+    results = asyncio.run(searches())
+    assert all(result["flights"] == results[0]["flights"] for result in results)
+    assert provider_stub.calls["AirShopping"] == 1
+    assert provider_stub.calls["AirSearch"] == 1
+
+
+def test_streams_share_provider_calls_with_searches(provider_stub):
+    provider_stub.delays.update(AirShopping=0.05, AirSearch=0.05)
+
+    async def streams_and_search():
+        streams = [_collect(prepare_combined_search_stream(search_payload())) for _ in range(3)]
+        return await asyncio.gather(*streams, combined_search(search_payload()), combined_search(search_payload("bdfare")))
+
+    *streams, search, bdfare_only = asyncio.run(streams_and_search())
+    assert all(frames[-1]["total"] == search["total"] for frames in streams)
+    assert bdfare_only["providers"]["bdfare"]["count"] == search["providers"]["bdfare"]["count"]
+    assert provider_stub.calls["AirShopping"] == 1
+    assert provider_stub.calls["AirSearch"] == 1
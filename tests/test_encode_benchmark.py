@@ -0,0 +1,32 @@
+#tests\test_encode_benchmark.py
+"""
+Encode time of a 100-offer combined search response (pytest-benchmark):
+FastAPI's default path (jsonable_encoder + JSONResponse) against dumps().
+
+    pytest tests/test_encode_benchmark.py --benchmark-only
+"""
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.flight_services.adapters.combined_search import format_flight_data_with_ids
+from app.flight_services.utils.responses import dumps
+from conftest import scaled_responses
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture(scope="module")
+def search_response():
+    # 50 offers from each provider, as one page of /api/combined/search
+    flights = format_flight_data_with_ids(scaled_responses("oneway", 50))["Flights"]
+    assert len(flights) == 100
+    return {"page": 1, "size": 100, "total": len(flights), "flights": flights, "providers": {}, "partial": False}
+
+
+def test_encode_default_response(benchmark, search_response):
+    benchmark(lambda: JSONResponse(jsonable_encoder(search_response)).body)
+
+
+def test_encode_dumps(benchmark, search_response):
+    assert benchmark(dumps, search_response) == JSONResponse(jsonable_encoder(search_response)).body
@@ -0,0 +1,204 @@
+#tests\test_fare_rules_cache.py
+"""
+Fare rules cache and batch behaviour through air_rules_service, with the
+BDFare client replaced by a local stub and the cache on InMemoryRedis.
+"""
+import asyncio
+from collections import Counter
+
+import pytest
+from fastapi import HTTPException
+
+from app.cache import InMemoryRedis
+from app.flight_services.adapters import airrules_bdfare
+from app.flight_services.adapters.airrules_penalties import PenaltyIndex
+from app.flight_services.models.air_rules import AirRulesBatchRequest
+from app.flight_services.routes.airRules.air_rules_routes import get_fare_rules_batch_endpoint
+from app.flight_services.services import air_rules_service, fare_rules_cache as fare_rules_cache_module
+from app.flight_services.services.air_rules_service import (
+    FARE_RULES_BATCH_MAX_OFFERS,
+    get_fare_rules_batch,
+    get_fare_rules_from_provider,
+)
+from app.flight_services.services.fare_rules_cache import FareRulesCache, rule_key
+
+TRACE_ID = "80969b97-38a7-4f05-8253-b3cd4598aa5d"
+ROUTE = "DAC→CXB"
+PENALTIES_TEXT = "CHANGES\nBEFORE DEPARTURE CHARGE BDT 1200 FOR REISSUE.\nCANCELLATIONS\nCHARGE BDT 1500 FOR REFUND."
+
+# Offers of one search; the first two share their fare basis
+FARE_BASES = {"offer-1": "VOWBD", "offer-2": "VOWBD", "offer-3": "KOWBD"}
+
+
+class BDFareRulesStub:
+    """Stands in for the BDFare FareRules and MiniRule calls; counts calls per operation and offer."""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.fail = set()
+        self.delay = 0.0
+
+    async def farerules(self, trace_id, offer_id):
+        self.calls["FareRules"] += 1
+        self.calls[offer_id] += 1
+        await asyncio.sleep(self.delay)
+        if offer_id in self.fail:
+            raise HTTPException(status_code=504, detail="The BDFare API FareRules request timed out.")
+        fare_basis = FARE_BASES.get(offer_id, offer_id.upper())
+        return {
+            "success": True,
+            "response": {
+                "traceId": trace_id,
+                "fareRuleRouteInfos": [{
+                    "route": ROUTE,
+                    "fareRulePaxInfos": [{
+                        "paxType": "Adult",
+                        "fareBasisCode": fare_basis,
+                        "fareRuleInfos": [
+                            {"category": "Rule Application", "info": f"RULES FOR {fare_basis}. " * 200},
+                            {"category": "Penalties", "info": PENALTIES_TEXT},
+                        ],
+                    }],
+                }],
+            },
+        }
+
+    async def minirule(self, trace_id, offer_id):
+        self.calls["MiniRule"] += 1
+        if f"mini:{offer_id}" in self.fail:
+            raise RuntimeError("MiniRule failed")
+        return {"offerId": offer_id, "refundable": True}
+
+
+@pytest.fixture
+def bdfare(monkeypatch):
+    stub = BDFareRulesStub()
+    cache = FareRulesCache(InMemoryRedis())
+    index = PenaltyIndex()
+    monkeypatch.setattr(air_rules_service, "fare_rules_cache", cache)
+    monkeypatch.setattr(air_rules_service, "fetch_bdfare_farerules", stub.farerules)
+    monkeypatch.setattr(air_rules_service, "fetch_bdfare_minirule", stub.minirule)
+    monkeypatch.setattr(air_rules_service, "_batch_semaphore", None)
+    monkeypatch.setattr(airrules_bdfare, "penalty_index", index)
+    monkeypatch.setattr(fare_rules_cache_module, "penalty_index", index)
+    stub.cache = cache
+    stub.index = index
+    return stub
+
+
+def _evict_local(cache: FareRulesCache):
+    """Empties the worker's LRUs, as a different worker sharing Redis would see it."""
+    cache.offers.local.clear()
+    cache.rules.local.clear()
+
+
+def _batch(*offer_ids, **options) -> dict:
+    return asyncio.run(get_fare_rules_batch(TRACE_ID, list(offer_ids), **options))
+
+
+def test_second_fetch_is_served_from_the_cache(bdfare):
+    first = asyncio.run(get_fare_rules_from_provider(TRACE_ID, "offer-1"))
+    second = asyncio.run(get_fare_rules_from_provider(TRACE_ID, "offer-1"))
+    assert second == first
+    assert first[0]["pax_specific_rules"][0]["penalties"]["change_fees"][0]["amount"] == 1200.0
+    assert bdfare.calls["FareRules"] == 1
+    assert (bdfare.cache.hits, bdfare.cache.misses) == (1, 1)
+
+
+def test_both_levels_are_served_from_redis(bdfare):
+    first = asyncio.run(get_fare_rules_from_provider(TRACE_ID, "offer-1"))
+    _evict_local(bdfare.cache)
+    assert asyncio.run(get_fare_rules_from_provider(TRACE_ID, "offer-1")) == first
+    assert bdfare.calls["FareRules"] == 1
+
+
+def test_offers_sharing_a_fare_basis_store_one_text(bdfare):
+    for offer_id in FARE_BASES:
+        asyncio.run(get_fare_rules_from_provider(TRACE_ID, offer_id))
+    assert len(bdfare.cache.offers.local) == 3
+    assert len(bdfare.cache.rules.local) == 2
+    assert len([key for key in bdfare.cache.rules.redis._data if ":rule:" in key]) == 2
+
+
+def test_evicted_text_refetches_the_offer(bdfare):
+    first = asyncio.run(get_fare_rules_from_provider(TRACE_ID, "offer-1"))
+    key = rule_key(ROUTE, "Adult", "VOWBD")
+    bdfare.cache.rules.local.delete(key)
+    asyncio.run(bdfare.cache.rules.redis.delete(key))
+    # The layout is still cached, but without its text the offer is a miss
+    assert asyncio.run(bdfare.cache.get(TRACE_ID, "offer-1")) is None
+    assert asyncio.run(get_fare_rules_from_provider(TRACE_ID, "offer-1")) == first
+    assert bdfare.calls["FareRules"] == 2
+    assert asyncio.run(bdfare.cache.get(TRACE_ID, "offer-1")) == first
+
+
+def test_cached_penalties_skip_the_rule_texts(bdfare):
+    asyncio.run(get_fare_rules_from_provider(TRACE_ID, "offer-1"))
+    _evict_local(bdfare.cache)
+    bdfare.index._entries.clear()
+    summary = asyncio.run(bdfare.cache.get_penalties(TRACE_ID, "offer-1"))
+    assert [(entry["route"], entry["fare_basis_code"]) for entry in summary] == [(ROUTE, "VOWBD")]
+    assert summary[0]["penalties"]["cancel_fees"][0]["amount"] == 1500.0
+    assert bdfare.index.parses == 1
+
+
+def test_batch_shares_rules_and_fetches_duplicates_once(bdfare):
+    result = _batch("offer-1", "offer-2", "offer-3", "offer-1")
+    assert [entry["offerId"] for entry in result["results"]] == ["offer-1", "offer-2", "offer-3"]
+    assert bdfare.calls["FareRules"] == 3 and bdfare.calls["MiniRule"] == 3
+    ids = [entry["fareRulesId"] for entry in result["results"]]
+    assert ids[0] == ids[1] != ids[2]
+    assert set(result["fareRules"]) == set(ids)
+    assert all(entry["miniRule"]["offerId"] == entry["offerId"] for entry in result["results"])
+
+
+def test_batch_without_rule_texts_uses_the_penalty_index(bdfare):
+    _batch("offer-1", "offer-3")
+    result = _batch("offer-1", "offer-3", include_mini_rules=False, include_rule_texts=False)
+    assert bdfare.calls["FareRules"] == 2 and bdfare.calls["MiniRule"] == 2
+    assert result["fareRules"] == {}
+    assert all(entry["penalties"] and entry["miniRule"] is None for entry in result["results"])
+
+
+def test_batch_isolates_failed_offers(bdfare):
+    bdfare.fail |= {"offer-2", "mini:offer-3"}
+    result = _batch("offer-1", "offer-2", "offer-3")
+    offer_1, offer_2, offer_3 = result["results"]
+    assert offer_1["errors"] == {} and offer_1["fareRulesId"] in result["fareRules"]
+    assert offer_2["errors"] == {"fareRules": {"status_code": 504, "detail": "The BDFare API FareRules request timed out."}}
+    assert offer_2["fareRulesId"] is None and offer_2["miniRule"] is not None
+    assert offer_3["fareRulesId"] is not None and offer_3["miniRule"] is None
+    assert offer_3["errors"] == {"miniRule": {"status_code": 500, "detail": "MiniRule failed"}}
+    # A failed offer is not cached and is fetched again
+    bdfare.fail.clear()
+    assert _batch("offer-2")["results"][0]["errors"] == {}
+    assert bdfare.calls["offer-2"] == 2
+
+
+def test_batch_calls_run_concurrently(bdfare):
+    bdfare.delay = 0.05
+    offer_ids = [f"offer-{number}" for number in range(1, 17)]
+    loop_time = asyncio.run(_timed(get_fare_rules_batch(TRACE_ID, offer_ids, include_mini_rules=False)))
+    # 16 calls, at most FARE_RULES_BATCH_CONCURRENCY (8) at a time
+    assert loop_time < 0.05 * 16 / 2
+
+
+async def _timed(awaitable) -> float:
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await awaitable
+    return loop.time() - started
+
+
+def test_batch_route_caps_unique_offers(bdfare):
+    too_many = [f"offer-{number}" for number in range(FARE_RULES_BATCH_MAX_OFFERS + 1)]
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(get_fare_rules_batch_endpoint(AirRulesBatchRequest(traceId=TRACE_ID, offerIds=too_many)))
+    assert raised.value.status_code == 400
+    assert bdfare.calls["FareRules"] == 0
+
+    # Repeats do not count towards the cap
+    at_cap = too_many[:FARE_RULES_BATCH_MAX_OFFERS] * 2
+    result = asyncio.run(get_fare_rules_batch_endpoint(AirRulesBatchRequest(traceId=TRACE_ID, offerIds=at_cap)))
+    assert len(result["results"]) == FARE_RULES_BATCH_MAX_OFFERS
+    assert bdfare.calls["FareRules"] == FARE_RULES_BATCH_MAX_OFFERS
@@ -0,0 +1,60 @@
+#tests\test_flyhub_search_route.py
+import asyncio
+
+import httpx
+import pytest
+
+from app.flight_services.clients.http_pool import provider_pool
+from app.flight_services.clients.flyhub_auth import flyhub_token_manager
+from app.flight_services.routes.flyhub.search import FlightSearchRequest, search_flights
+
+REQUEST = FlightSearchRequest(
+    AdultQuantity=1,
+    ChildQuantity=0,
+    InfantQuantity=0,
+    EndUserIp="103.124.251.147",
+    JourneyType="1",
+    Segments=[{"Origin": "DAC", "Destination": "CXB", "CabinClass": "1", "DepartureDateTime": "2025-03-15"}],
+)
+
+
+@pytest.fixture
+def token_manager(monkeypatch):
+    """The shared FlyHub TokenManager, starting without a token."""
+    monkeypatch.setattr(flyhub_token_manager, "_token", None)
+    monkeypatch.setattr(flyhub_token_manager, "_expires_at", 0.0)
+    monkeypatch.setattr(flyhub_token_manager, "_refresh_task", None)
+    return flyhub_token_manager
+
+
+def _search_many(count: int) -> list:
+    async def searches():
+        return await asyncio.gather(*(search_flights(REQUEST) for _ in range(count)))
+
+    return asyncio.run(searches())
+
+
+def test_concurrent_searches_authenticate_once(provider_stub, token_manager):
+    provider_stub.delays["Authenticate"] = 0.05
+    results = _search_many(5)
+    assert all(result["SearchId"] == results[0]["SearchId"] for result in results)
+    assert provider_stub.calls["Authenticate"] == 1
+    assert provider_stub.calls["AirSearch"] == 5
+    assert token_manager.cached_token == "test-token"
+
+
+def test_rejected_token_is_refreshed(provider_stub, token_manager, monkeypatch):
+    monkeypatch.setattr(token_manager, "_token", "expired-token")
+    monkeypatch.setattr(token_manager, "_expires_at", 2 ** 40)
+
+    async def reject_expired(request):
+        if request.headers.get("Authorization") == "Bearer expired-token":
+            provider_stub.calls["rejected"] += 1
+            return httpx.Response(401, json={"message": "Unauthorized"})
+        return await provider_stub.handle(request)
+
+    monkeypatch.setitem(provider_pool._clients, "flyhub", httpx.AsyncClient(transport=httpx.MockTransport(reject_expired)))
+    assert _search_many(1)[0]["Results"]
+    assert provider_stub.calls["rejected"] == 1
+    assert provider_stub.calls["Authenticate"] == 1
+    assert token_manager.cached_token == "test-token"
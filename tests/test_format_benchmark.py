@@ -0,0 +1,36 @@
+#tests\test_format_benchmark.py
+"""
+Formatting benchmarks over the recorded payloads (pytest-benchmark).
+
+    pytest tests/test_format_benchmark.py --benchmark-only
+
+The large case repeats the one-way offers up to SEARCH_FETCH_SIZE-like
+volumes, where per-offer cost dominates.
+"""
+import pytest
+
+from app.flight_services.adapters.combined_search import format_flight_data_with_ids, normalize_flight_data
+from conftest import SEARCH_CASES, provider_responses, scaled_responses
+
+pytest.importorskip("pytest_benchmark")
+
+LARGE_OFFERS = 500
+
+
+@pytest.mark.parametrize("case", sorted(SEARCH_CASES))
+def test_format_recorded(benchmark, case):
+    data = provider_responses(case)
+    result = benchmark(format_flight_data_with_ids, data)
+    assert result["Flights"]
+
+
+@pytest.mark.parametrize("case", sorted(SEARCH_CASES))
+def test_normalize_recorded(benchmark, case):
+    data = provider_responses(case)
+    assert benchmark(normalize_flight_data, data)
+
+
+def test_format_large_oneway(benchmark):
+    data = scaled_responses("oneway", LARGE_OFFERS)
+    result = benchmark(format_flight_data_with_ids, data)
+    assert len(result["Flights"]) == 2 * LARGE_OFFERS
@@ -0,0 +1,160 @@
+#tests\test_price_cache.py
+"""
+Price cache behaviour through the airprice, prebook and book services, with
+the provider calls replaced by a local stub and the cache on InMemoryRedis.
+"""
+import asyncio
+from collections import Counter
+
+import pytest
+
+from app.cache import InMemoryRedis
+from app.flight_services.models.airbook.airbook_request import UnifiedAirBookRequest
+from app.flight_services.models.airprebook.airprebook_request import UnifiedAirPrebookRequest
+from app.flight_services.models.airprice.airprice_request import UnifiedAirPriceRequest
+from app.flight_services.services import airbook_service, airprebook_service, airprice_service
+from app.flight_services.services.airbook_service import fetch_airbook
+from app.flight_services.services.airprebook_service import fetch_airprebook
+from app.flight_services.services.airprice_service import fetch_airprice
+from app.flight_services.services.price_cache import PriceCache
+
+TRACE_ID = "cd0cd824-c6bd-4025-893c-ccf4577dd454"
+OFFER_ID = "7e3edac9-33f6-4db9-a5b5-53662072270c"
+OTHER_OFFER_ID = "05566b88-55b7-41f5-bda0-6ed2cff67f55"
+
+PASSENGERS = {
+    "contactInfo": {"phone": {"phoneNumber": "1711000000", "countryDialingCode": "880"}, "emailAddress": "rahim@example.com"},
+    "paxList": [{
+        "ptc": "Adult",
+        "individual": {
+            "givenName": "RAHIM",
+            "surname": "UDDIN",
+            "gender": "Male",
+            "birthdate": "1990-01-31",
+            "nationality": "BD",
+            "identityDoc": {"identityDocType": "Passport", "identityDocID": "BX1234567", "expiryDate": "2030-05-01"},
+        },
+    }],
+}
+
+
+class ProviderPriceStub:
+    """Stands in for the BDFare and FlyHub clients; counts calls per operation."""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.fail = set()
+
+    def _answer(self, operation: str, offer_id: str) -> dict:
+        self.calls[operation] += 1
+        if operation in self.fail:
+            return {"success": False, "error": {"errorMessage": "Offer expired"}}
+        return {"success": True, "response": {"offerId": offer_id, "total": 4219.0 + self.calls[operation]}}
+
+    async def bdfare_airprice(self, trace_id, offer_ids):
+        return self._answer("OfferPrice", offer_ids[0])
+
+    async def flyhub_airprice(self, search_id, result_id):
+        return self._answer("AirPrice", result_id)
+
+    async def bdfare_order(self, trace_id, offer_ids, request):
+        return self._answer("Order", offer_ids[0])
+
+    async def flyhub_order(self, search_id, result_id, passengers):
+        return self._answer("Order", result_id)
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    stub = ProviderPriceStub()
+    cache = PriceCache(InMemoryRedis())
+    for module in (airprice_service, airprebook_service, airbook_service):
+        monkeypatch.setattr(module, "price_cache", cache)
+    monkeypatch.setattr(airprice_service, "fetch_bdfare_airprice", stub.bdfare_airprice)
+    monkeypatch.setattr(airprice_service, "fetch_flyhub_airprice", stub.flyhub_airprice)
+    monkeypatch.setattr(airprebook_service, "fetch_bdfare_airprebook", stub.bdfare_order)
+    monkeypatch.setattr(airprebook_service, "fetch_flyhub_airprebook", stub.flyhub_order)
+    monkeypatch.setattr(airbook_service, "fetch_bdfare_airbook", stub.bdfare_order)
+    monkeypatch.setattr(airbook_service, "fetch_flyhub_airbook", stub.flyhub_order)
+    stub.cache = cache
+    return stub
+
+
+def _price(source: str, offer_id: str = OFFER_ID) -> dict:
+    return asyncio.run(fetch_airprice(UnifiedAirPriceRequest(source=source, traceId=TRACE_ID, offerId=[offer_id])))
+
+
+def _operation(source: str) -> str:
+    return "OfferPrice" if source == "bdfare" else "AirPrice"
+
+
+@pytest.mark.parametrize("source", ["bdfare", "flyhub"])
+def test_repeat_price_is_a_hit(providers, source):
+    first = _price(source)
+    assert _price(source) == first
+    assert providers.calls[_operation(source)] == 1
+    stats = providers.cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hitRatio"]) == (1, 1, 0.5)
+
+
+@pytest.mark.parametrize("source", ["bdfare", "flyhub"])
+def test_other_offer_is_a_miss(providers, source):
+    _price(source)
+    other = _price(source, OTHER_OFFER_ID)
+    assert other["response"]["offerId"] == OTHER_OFFER_ID
+    assert providers.calls[_operation(source)] == 2
+
+
+def test_sources_do_not_share_entries(providers):
+    _price("bdfare")
+    _price("flyhub")
+    assert providers.calls["OfferPrice"] == providers.calls["AirPrice"] == 1
+
+
+def test_failed_price_is_not_cached(providers):
+    providers.fail.add("OfferPrice")
+    _price("bdfare")
+    _price("bdfare")
+    assert providers.calls["OfferPrice"] == 2
+
+
+def _prebook(payload):
+    return fetch_airprebook(UnifiedAirPrebookRequest(**payload))
+
+
+def _book(payload):
+    return fetch_airbook(UnifiedAirBookRequest(**payload))
+
+
+# The FlyHub book path feeds the unified payload through the FlyHub-to-BDFare
+# adapter and never reaches the client, so only BDFare is booked here.
+@pytest.mark.parametrize("order, source", [
+    (_prebook, "bdfare"),
+    (_prebook, "flyhub"),
+    (_book, "bdfare"),
+], ids=["prebook-bdfare", "prebook-flyhub", "book-bdfare"])
+def test_prebook_and_book_invalidate(providers, source, order):
+    _price(source)
+    _price(source, OTHER_OFFER_ID)
+    asyncio.run(order({"source": source, "traceId": TRACE_ID, "offerId": [OFFER_ID], "request": PASSENGERS}))
+    assert providers.calls["Order"] == 1
+
+    _price(source)
+    assert providers.calls[_operation(source)] == 3
+    # Only the offer acted on is dropped
+    _price(source, OTHER_OFFER_ID)
+    assert providers.calls[_operation(source)] == 3
+    assert providers.cache.stats()["invalidations"] == 1
+
+
+def test_failed_book_still_invalidates(providers, monkeypatch):
+    _price("bdfare")
+
+    async def failing_book(trace_id, offer_ids, request):
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(airbook_service, "fetch_bdfare_airbook", failing_book)
+    with pytest.raises(RuntimeError):
+        asyncio.run(_book({"source": "bdfare", "traceId": TRACE_ID, "offerId": [OFFER_ID], "request": PASSENGERS}))
+    _price("bdfare")
+    assert providers.calls["OfferPrice"] == 2
@@ -0,0 +1,95 @@
+#tests\test_provider_log.py
+import json
+
+from app.flight_services.utils.provider_log import REDACTED, _LazyBody, redact, redact_text
+
+PASSPORT = "BX1234567"
+
+# OrderSell / OrderCreate passenger, as built by adapters/airbook_bdfare.py
+BDFARE_PAYLOAD = {
+    "traceId": "2480d029-02c0-48e2-8d9a-dfe859ceb49a",
+    "offerId": ["7e3edac9-33f6-4db9-a5b5-53662072270c"],
+    "request": {
+        "contactInfo": {"phone": {"phoneNumber": "1711000000", "countryDialingCode": "880"}, "emailAddress": "a@example.com"},
+        "paxList": [{
+            "ptc": "Adult",
+            "individual": {
+                "givenName": "RAHIM",
+                "surname": "UDDIN",
+                "gender": "Male",
+                "birthdate": "1990-01-31",
+                "nationality": "BD",
+                "identityDoc": {"identityDocType": "Passport", "identityDocID": PASSPORT, "expiryDate": "2030-05-01"},
+            },
+        }],
+    },
+}
+
+# AirPreBook / AirBook passenger, as built by adapters/airprebook_flyhub.py
+FLYHUB_PAYLOAD = {
+    "SearchID": "b0f6c0c8-9a62-4c1e-8d2e-1f6f0f6b0c11",
+    "ResultID": "347223ac-354b-45ba-baa9-b264ba98c5a5",
+    "Passengers": [{
+        "Title": "Mr",
+        "FirstName": "RAHIM",
+        "LastName": "UDDIN",
+        "PaxType": "Adult",
+        "DateOfBirth": "1990-01-31",
+        "Gender": "Male",
+        "PassportNumber": PASSPORT,
+        "PassportExpiryDate": "2030-05-01",
+        "PassportNationality": "BD",
+        "Nationality": "BD",
+    }],
+    "PromotionCode": "",
+}
+
+PRIVATE_VALUES = (PASSPORT, "2030-05-01", "1990-01-31")
+
+
+def _assert_private_values_masked(text: str):
+    for value in PRIVATE_VALUES:
+        assert value not in text
+
+
+def test_redact_bdfare_passenger():
+    redacted = redact(BDFARE_PAYLOAD)
+    individual = redacted["request"]["paxList"][0]["individual"]
+    assert individual["identityDoc"] == REDACTED
+    assert individual["birthdate"] == REDACTED
+    assert individual["givenName"] == "RAHIM"
+    assert redacted["traceId"] == BDFARE_PAYLOAD["traceId"]
+    _assert_private_values_masked(json.dumps(redacted))
+    # The payload sent to the provider is left as it was
+    assert BDFARE_PAYLOAD["request"]["paxList"][0]["individual"]["identityDoc"]["identityDocID"] == PASSPORT
+
+
+def test_redact_flyhub_passenger():
+    passenger = redact(FLYHUB_PAYLOAD)["Passengers"][0]
+    for key in ("PassportNumber", "PassportExpiryDate", "PassportNationality", "DateOfBirth"):
+        assert passenger[key] == REDACTED
+    assert passenger["Nationality"] == "BD"
+
+
+def test_redact_text_bdfare_passenger():
+    for text in (json.dumps(BDFARE_PAYLOAD), json.dumps(BDFARE_PAYLOAD, indent=2)):
+        redacted = redact_text(text)
+        _assert_private_values_masked(redacted)
+        assert json.loads(redacted)["request"]["paxList"][0]["individual"]["identityDoc"]["identityDocID"] == REDACTED
+
+
+def test_redact_text_flyhub_passenger():
+    redacted = redact_text(json.dumps(FLYHUB_PAYLOAD))
+    _assert_private_values_masked(redacted)
+    assert json.loads(redacted)["Passengers"][0]["Nationality"] == "BD"
+
+
+def test_redact_text_truncated_body():
+    text = json.dumps(FLYHUB_PAYLOAD)
+    cut = text[: text.index(PASSPORT) + 3]
+    assert PASSPORT[:3] not in redact_text(cut)
+
+
+def test_lazy_body_masks_raw_response_text():
+    body = str(_LazyBody(json.dumps({"Passengers": FLYHUB_PAYLOAD["Passengers"]}).encode(), 4096))
+    _assert_private_values_masked(body)
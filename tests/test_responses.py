@@ -0,0 +1,103 @@
+#tests\test_responses.py
+"""
+dumps() must produce the bytes FastAPI's default response would send:
+jsonable_encoder followed by JSONResponse.render.
+"""
+import dataclasses
+import datetime
+import enum
+import math
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.flight_services.adapters.combined_search import format_flight_data_with_ids
+from app.flight_services.utils import responses
+from app.flight_services.utils.responses import FastJSONResponse, dumps
+from conftest import SEARCH_CASES, provider_responses
+
+
+class Cabin(str, enum.Enum):
+    ECONOMY = "Economy"
+
+
+class Stops(enum.IntEnum):
+    DIRECT = 0
+
+
+@dataclasses.dataclass
+class Money:
+    amount: float
+    currency: str
+
+
+CONTENT = {
+    "exponent floats": [1e16, 1.5e300, 1.2345678901234568e17, -1e-7, 1e-05, 0.00001, 2.5e-10],
+    "exponent float at top level": 1e-05,
+    "plain floats": [0.0001, 1.0, -0.0, 1e15, 12345.678, 4219.5],
+    "64-bit ints": [2 ** 63 - 1, -2 ** 63, 2 ** 63, 2 ** 64 - 1],
+    "very large ints": [2 ** 64, -2 ** 63 - 1, 10 ** 40],
+    "very large int at top level": 10 ** 30,
+    "int keys": {1: "a", 2: "b"},
+    "mixed keys": {1: "a", "1": "b", True: "c", None: "d"},
+    "float keys": {1.5: "a", 1e16: "b", 1e-05: "c", 0.0001: "d"},
+    "non-ascii text": {"city": "Zürich", "name": "Ürümqi Diwopu", "note": "☃ 😀", "ar": "مطار"},
+    "control characters": "\x00\x1f\x7f  \"\\/",
+    "hex-like ids": {"offerId": "1e5a0c2e-0000-4e1f-8e00-00000e000001", "code": "0.00001"},
+    "nulls": {"Terminal": None, "list": [None, 1], "nested": {"a": None}},
+    "null at top level": None,
+    "empty containers": {"a": {}, "b": [], "c": ""},
+    "tuples and sets": {"t": (1, 2), "s": {3}},
+    "enums": {"cabin": Cabin.ECONOMY, "stops": Stops.DIRECT, Cabin.ECONOMY: 1},
+    "datetimes": {"at": datetime.datetime(2025, 3, 15, 10, 5), "on": datetime.date(2025, 3, 15)},
+    "dataclass": {"price": Money(4219.0, "BDT")},
+}
+
+NON_FINITE = [float("nan"), float("inf"), float("-inf")]
+
+
+def _default_body(content) -> bytes:
+    """What a route returning `content` sends without a response_class."""
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+@pytest.mark.parametrize("name", sorted(CONTENT))
+def test_dumps_matches_json_response(name):
+    assert dumps(CONTENT[name]) == _default_body(CONTENT[name])
+
+
+@pytest.mark.parametrize("name", sorted(CONTENT))
+def test_dumps_matches_json_response_without_orjson(name, monkeypatch):
+    monkeypatch.setattr(responses, "orjson", None)
+    assert dumps(CONTENT[name]) == _default_body(CONTENT[name])
+
+
+def test_plain_content_matches_json_response_directly():
+    content = {"flights": [{"Price": 4219.0, "Code": "DAC", "Name": "Zürich"}], "total": 1, "partial": False}
+    assert dumps(content) == JSONResponse(content).body
+    assert FastJSONResponse(content).body == JSONResponse(content).body
+
+
+@pytest.mark.parametrize("value", NON_FINITE, ids=["nan", "inf", "-inf"])
+@pytest.mark.parametrize("wrap", [lambda v: v, lambda v: {"Price": v}, lambda v: [1, v], lambda v: {v: 1}], ids=["top", "value", "list", "key"])
+def test_non_finite_floats_raise_like_json_response(value, wrap):
+    content = wrap(value)
+    with pytest.raises(ValueError) as expected:
+        _default_body(content)
+    with pytest.raises(ValueError) as raised:
+        dumps(content)
+    assert str(raised.value) == str(expected.value)
+
+
+def test_random_floats_match():
+    values = [math.ldexp(1.0 + i / 997, exponent) for i in range(997) for exponent in range(-40, 70, 7)]
+    content = {"values": values, "negative": [-value for value in values]}
+    assert dumps(content) == _default_body(content)
+
+
+@pytest.mark.parametrize("case", sorted(SEARCH_CASES))
+def test_search_response_matches_json_response(case):
+    flights = format_flight_data_with_ids(provider_responses(case))["Flights"]
+    content = {"page": 1, "size": 100, "flights": flights, "providers": {}, "partial": False}
+    assert dumps(content) == _default_body(content)
@@ -0,0 +1,198 @@
+#tests\test_results_engine.py
+import pytest
+
+from app.flight_services.adapters.combined_search import normalize_flight_data
+from app.flight_services.services.results_engine import (
+    MAX_PAGE_SIZE,
+    PRICE_BUCKETS,
+    ResultRow,
+    ResultSet,
+    decode_cursor,
+    encode_cursor,
+    rows_from_itineraries,
+)
+from conftest import SEARCH_CASES, provider_responses
+
+KEYS = [key for key in ResultRow.__slots__ if key != "flight"]
+HANDLE = "ab" * 32
+
+
+def _itineraries(case: str = "oneway"):
+    return normalize_flight_data(provider_responses(case))
+
+
+@pytest.fixture
+def result_set():
+    return ResultSet(rows_from_itineraries(_itineraries()), providers={"bdfare": {"status": "ok"}})
+
+
+def _row(price=None, duration=None, departure=None, stops=0, carrier="BG", refundable=False, name=""):
+    return ResultRow({"name": name}, price, duration, departure, stops, carrier, refundable)
+
+
+def _names(result: dict) -> list:
+    return [flight["name"] for flight in result["flights"]]
+
+
+def _keys(row: ResultRow) -> dict:
+    return {key: getattr(row, key) for key in KEYS}
+
+
+@pytest.mark.parametrize("case", sorted(SEARCH_CASES))
+def test_rows_rebuilt_from_flights_match(case):
+    for itinerary in _itineraries(case):
+        assert _keys(ResultRow.from_flight(itinerary.to_dict())) == _keys(ResultRow.from_itinerary(itinerary))
+
+
+@pytest.mark.parametrize("case", sorted(SEARCH_CASES))
+def test_cached_result_set_answers_queries_alike(case):
+    built = ResultSet(rows_from_itineraries(_itineraries(case)), providers={}, partial=True)
+    cached = ResultSet.from_cached({"flights": built.flights, "providers": {}, "partial": True, "generation": built.generation})
+    assert cached.generation == built.generation
+    for sort in (None, "price", "-price", "duration", "-departure"):
+        assert cached.query(sort=sort) == built.query(sort=sort)
+
+
+def test_row_keys(result_set):
+    connection = next(row for row in result_set.rows if row.stops)
+    assert (connection.price, connection.duration, connection.stops, connection.carrier) == (6171.0, 90, 1, "BS")
+    assert (connection.departure, connection.window) == (8 * 60 + 5, "morning")
+
+
+@pytest.mark.parametrize("sort, key, reverse", [
+    ("price", "price", False),
+    ("-price", "price", True),
+    ("duration", "duration", False),
+    ("-duration", "duration", True),
+    ("departure", "departure", False),
+    ("-departure", "departure", True),
+])
+def test_sort_orders(result_set, sort, key, reverse):
+    flights = result_set.query(sort=sort)["flights"]
+    rows = {id(row.flight): row for row in result_set.rows}
+    values = [getattr(rows[id(flight)], key) for flight in flights]
+    assert values == sorted(values, reverse=reverse)
+    assert len(flights) == len(result_set)
+
+
+def test_rows_without_the_key_sort_last():
+    rows = [
+        _row(price=200.0, name="a"),
+        _row(price=None, name="b"),
+        _row(price=100.0, name="c"),
+        _row(price=200.0, name="d"),
+        _row(price=None, name="e"),
+    ]
+    result_set = ResultSet(rows)
+    assert _names(result_set.query(sort="price")) == ["c", "a", "d", "b", "e"]
+    assert _names(result_set.query(sort="-price")) == ["d", "a", "c", "b", "e"]
+    assert _names(result_set.query()) == ["a", "b", "c", "d", "e"]
+
+
+def test_invalid_sort_key(result_set):
+    with pytest.raises(ValueError):
+        result_set.query(sort="seats")
+
+
+@pytest.mark.parametrize("filters, expected", [
+    ({}, 13),
+    ({"airlines": ["bs"]}, 5),
+    ({"airlines": ["BG", "2A"]}, 8),
+    ({"max_stops": 0}, 12),
+    ({"refundable": True}, 9),
+    ({"refundable": False}, 4),
+    ({"min_price": 6000}, 4),
+    ({"max_price": 5000}, 3),
+    ({"min_price": 5000, "max_price": 6000}, 6),
+    ({"departure_windows": ["evening"]}, 2),
+    ({"departure_windows": ["night"]}, 0),
+    ({"airlines": ["BG"], "refundable": True, "departure_windows": ["morning", "afternoon"]}, 4),
+])
+def test_filters(result_set, filters, expected):
+    result = result_set.query(**filters)
+    assert result["total"] == len(result["flights"]) == expected
+    rows = {id(row.flight): row for row in result_set.rows}
+    for flight in result["flights"]:
+        row = rows[id(flight)]
+        if "airlines" in filters:
+            assert row.carrier in {code.upper() for code in filters["airlines"]}
+        if "max_stops" in filters:
+            assert row.stops <= filters["max_stops"]
+        if "refundable" in filters:
+            assert row.refundable is filters["refundable"]
+        if "min_price" in filters:
+            assert row.price >= filters["min_price"]
+        if "max_price" in filters:
+            assert row.price <= filters["max_price"]
+        if "departure_windows" in filters:
+            assert row.window in filters["departure_windows"]
+
+
+def test_price_filter_drops_rows_without_a_price():
+    result_set = ResultSet([_row(price=100.0, name="a"), _row(price=None, name="b")])
+    assert _names(result_set.query(max_price=500)) == ["a"]
+    assert _names(result_set.query()) == ["a", "b"]
+
+
+def test_paging(result_set):
+    everything = result_set.query(sort="price")["flights"]
+    pages = [result_set.query(sort="price", page=page, size=5) for page in (1, 2, 3)]
+    assert [len(page["flights"]) for page in pages] == [5, 5, 3]
+    assert [flight for page in pages for flight in page["flights"]] == everything
+    assert all(page["total"] == 13 for page in pages)
+    assert result_set.query(page=4, size=5)["flights"] == []
+
+
+def test_facets(result_set):
+    facets = result_set.query()["facets"]
+    assert [(entry["code"], entry["count"], entry["minPrice"]) for entry in facets["airlines"]] == [
+        ("BG", 5, 4719.0), ("BS", 5, 4440.0), ("2A", 3, 5652.0),
+    ]
+    assert facets["stops"] == [{"stops": 0, "count": 12}, {"stops": 1, "count": 1}]
+    assert {entry["window"]: entry["count"] for entry in facets["departureWindows"]} == {
+        "night": 0, "morning": 7, "afternoon": 4, "evening": 2,
+    }
+    assert facets["departureWindows"][1]["from"] == "06:00" and facets["departureWindows"][1]["to"] == "12:00"
+    assert facets["refundable"] == {"refundable": 9, "nonRefundable": 4}
+
+
+def test_facets_count_the_filtered_rows(result_set):
+    facets = result_set.query(airlines=["2A"])["facets"]
+    assert [entry["code"] for entry in facets["airlines"]] == ["2A"]
+    assert sum(bucket["count"] for bucket in facets["priceBuckets"]) == 3
+    # Bucket bounds stay those of the whole search
+    bounds = [(bucket["min"], bucket["max"]) for bucket in facets["priceBuckets"]]
+    assert bounds == [(bucket["min"], bucket["max"]) for bucket in result_set.facets()["priceBuckets"]]
+
+
+def test_price_buckets(result_set):
+    buckets = result_set.facets()["priceBuckets"]
+    assert len(buckets) == PRICE_BUCKETS
+    assert buckets[0]["min"] == 4440.0 and buckets[-1]["max"] == 6897.0
+    assert all(earlier["max"] == later["min"] for earlier, later in zip(buckets, buckets[1:]))
+    assert [bucket["count"] for bucket in buckets] == [2, 3, 3, 3, 2]
+
+
+def test_price_buckets_edge_cases():
+    assert ResultSet([_row(price=None)]).facets()["priceBuckets"] == []
+    same = ResultSet([_row(price=100.0), _row(price=100.0)]).facets()["priceBuckets"]
+    assert [bucket["count"] for bucket in same] == [2, 0, 0, 0, 0]
+
+
+def test_page_and_cursor(result_set):
+    page = result_set.page(HANDLE, 10, 5)
+    assert len(page["flights"]) == 3 and page["nextCursor"] is None
+    page = result_set.page(HANDLE, 0, 5)
+    assert decode_cursor(page["nextCursor"]) == (HANDLE, result_set.generation, 5, 5)
+
+
+@pytest.mark.parametrize("handle, generation, offset, size", [
+    ("short", "1", 0, 5),
+    (HANDLE, "not-hex", 0, 5),
+    (HANDLE, "1", -1, 5),
+    (HANDLE, "1", 0, 0),
+    (HANDLE, "1", 0, MAX_PAGE_SIZE + 1),
+])
+def test_invalid_cursors(handle, generation, offset, size):
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(handle, generation, offset, size))
@@ -0,0 +1,131 @@
+#tests\test_retry.py
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from app.flight_services.clients import retry
+from app.flight_services.clients.http_pool import ProviderPool, get_operation_timeout
+from app.flight_services.clients.retry import RetryBudget, RetryPolicy, RetryState, clip_timeout, is_retryable
+
+
+class Clock:
+    """Stands in for time.monotonic in clients/retry.py."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(retry.time, "monotonic", clock)
+    return clock
+
+
+def test_backoff_stays_within_jitter_bounds():
+    policy = RetryPolicy(base_delay=0.2, max_delay=1.0)
+    random.seed(3)
+    for attempt, cap in [(1, 0.2), (2, 0.4), (3, 0.8), (4, 1.0), (8, 1.0)]:
+        delays = [policy.backoff(attempt) for _ in range(500)]
+        assert all(0 <= delay <= cap for delay in delays)
+        # Full jitter: the spread covers most of the window
+        assert max(delays) - min(delays) > cap * 0.8
+
+
+def test_budget_is_spent_and_refilled():
+    budget = RetryBudget(ratio=0.5, capacity=2.0)
+    assert budget.try_spend() and budget.try_spend()
+    assert not budget.try_spend()
+    budget.record_request()
+    assert not budget.try_spend()
+    budget.record_request()
+    assert budget.try_spend()
+
+
+def test_exhausted_budget_stops_retries(clock):
+    budget = RetryBudget(ratio=0.0, capacity=1.0)
+    first = RetryState(RetryPolicy(max_attempts=5), budget)
+    assert first.next_delay() is not None
+    assert first.next_delay() is None
+    assert RetryState(RetryPolicy(max_attempts=5), budget).next_delay() is None
+
+
+def test_attempts_are_capped(clock):
+    state = RetryState(RetryPolicy(max_attempts=3), RetryBudget())
+    assert state.next_delay() is not None
+    assert state.next_delay() is not None
+    assert state.next_delay() is None
+    assert state.attempt == 3
+
+
+@pytest.mark.parametrize("operation, outcome, expected", [
+    ("AirShopping", httpx.ReadError("reset"), True),
+    ("AirShopping", httpx.ReadTimeout("slow"), True),
+    ("AirShopping", httpx.ConnectError("refused"), True),
+    ("OrderCreate", httpx.ReadError("reset"), False),
+    ("OrderCreate", httpx.ReadTimeout("slow"), False),
+    ("OrderCreate", httpx.RemoteProtocolError("closed"), False),
+    ("OrderCreate", httpx.ConnectError("refused"), True),
+    ("AirBook", httpx.PoolTimeout("busy"), True),
+    ("AirShopping", ValueError("bad json"), False),
+    ("AirShopping", 503, True),
+    ("AirShopping", 429, True),
+    ("AirShopping", 500, False),
+    ("AirShopping", 200, False),
+    ("OrderCreate", 503, False),
+])
+def test_is_retryable(operation, outcome, expected):
+    if isinstance(outcome, int):
+        assert is_retryable(operation, response=httpx.Response(outcome)) is expected
+    else:
+        assert is_retryable(operation, error=outcome) is expected
+
+
+def test_deadline_cuts_off_retries(clock):
+    state = RetryState(RetryPolicy(max_attempts=10, base_delay=1.0, max_delay=1.0, deadline=5.0), RetryBudget())
+    random.seed(1)
+    clock.now += 3.0
+    assert state.next_delay() is not None
+    clock.now += 2.0
+    assert state.remaining() == 0
+    assert state.next_delay() is None
+
+
+def test_attempt_timeout_is_clipped_to_the_deadline(clock):
+    state = RetryState(RetryPolicy(deadline=30.0), RetryBudget())
+    fare_rules = get_operation_timeout("FareRules")
+    assert fare_rules.read == 60.0
+    assert state.attempt_timeout(fare_rules).read == 30.0
+    clock.now += 29.0
+    clipped = state.attempt_timeout(fare_rules)
+    assert (clipped.connect, clipped.read, clipped.write, clipped.pool) == (1.0, 1.0, 1.0, 1.0)
+
+
+def test_clip_timeout_keeps_shorter_phases():
+    clipped = clip_timeout(httpx.Timeout(10.0, connect=2.0, pool=None), 4.0)
+    assert (clipped.connect, clipped.read, clipped.write, clipped.pool) == (2.0, 4.0, 4.0, 4.0)
+
+
+def test_pool_retries_within_the_deadline(monkeypatch):
+    """Every attempt of a slow, failing call gets at most the time left on the deadline."""
+    monkeypatch.setitem(retry.retry_policies, "bdfare", RetryPolicy(max_attempts=5, base_delay=0.01, max_delay=0.01, deadline=0.3))
+    monkeypatch.setitem(retry.retry_budgets, "bdfare", RetryBudget())
+    timeouts = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        timeouts.append(request.extensions["timeout"]["read"])
+        await asyncio.sleep(0.1)
+        return httpx.Response(503)
+
+    pool = ProviderPool()
+    pool._clients["bdfare"] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    response = asyncio.run(pool.post("bdfare", "FareRules", "https://bdfare.test/FareRules", json={}))
+    assert response.status_code == 503
+    assert 1 < len(timeouts) < 5
+    assert timeouts[0] <= 0.3
+    assert all(later < earlier for earlier, later in zip(timeouts, timeouts[1:]))
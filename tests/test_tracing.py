@@ -0,0 +1,84 @@
+#tests\test_tracing.py
+import asyncio
+
+import pytest
+
+from app.flight_services.routes.combined.combined_search import search_flights
+from app.flight_services.utils.tracing import memory_exporter, tracer
+from conftest import load_fixture, search_payload
+
+pytestmark = pytest.mark.usefixtures("search_state")
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    """Record every span of the test in memory_exporter."""
+    monkeypatch.setattr(tracer, "exporter", memory_exporter)
+    monkeypatch.setattr(tracer, "sample_rate", 1.0)
+    memory_exporter.clear()
+    yield memory_exporter
+    memory_exporter.clear()
+
+
+def _search_trace(spans) -> dict:
+    """Run one search through the route and return its spans by id."""
+    asyncio.run(search_flights(search_payload(), page=1, size=10))
+    (root,) = spans.finished("route.search_flights")
+    return {span.span_id: span for span in spans.finished() if span.trace_id == root.trace_id}
+
+
+def _ancestors(span, by_id) -> list:
+    names = []
+    while span.parent_id is not None:
+        span = by_id[span.parent_id]
+        names.append(span.name)
+    return names
+
+
+def test_search_span_tree(provider_stub, spans):
+    by_id = _search_trace(spans)
+    root = next(span for span in by_id.values() if span.parent_id is None)
+    assert root.name == "route.search_flights"
+    assert root.attributes == {"page": 1, "size": 10}
+
+    (service,) = [span for span in by_id.values() if span.name == "service.combined_search"]
+    assert service.parent_id == root.span_id
+    assert service.attributes["cache"] == "miss"
+
+    searches = {span.attributes["provider"]: span for span in by_id.values() if span.name == "provider.search"}
+    assert set(searches) == {"bdfare", "flyhub"}
+    for search in searches.values():
+        assert search.parent_id == service.span_id
+        assert search.status == "ok"
+
+    requests = [span for span in by_id.values() if span.name == "http.request"]
+    assert {span.attributes["operation"] for span in requests} >= {"AirShopping", "AirSearch"}
+    for request in requests:
+        assert _ancestors(request, by_id) == ["provider.search", "service.combined_search", "route.search_flights"]
+        assert by_id[request.parent_id].attributes["provider"] == request.attributes["provider"]
+        assert request.attributes["http.status_code"] == 200
+
+
+def test_provider_spans_carry_provider_ids(provider_stub, spans):
+    by_id = _search_trace(spans)
+    searches = {span.attributes["provider"]: span for span in by_id.values() if span.name == "provider.search"}
+    assert searches["bdfare"].attributes["bdfare.traceId"] == load_fixture("bdfare_oneway.json")["response"]["traceId"]
+    assert searches["flyhub"].attributes["flyhub.SearchId"] == load_fixture("flyhub_oneway.json")["SearchId"]
+
+
+def test_cache_hit_has_no_provider_spans(provider_stub, spans):
+    asyncio.run(search_flights(search_payload(), page=1, size=10))
+    spans.clear()
+    by_id = _search_trace(spans)
+    assert sorted(span.name for span in by_id.values()) == ["route.search_flights", "service.combined_search"]
+    (service,) = [span for span in by_id.values() if span.name == "service.combined_search"]
+    assert service.attributes["cache"] == "hit"
+
+
+def test_failed_provider_marks_its_span(provider_stub, spans):
+    del provider_stub.responses["AirSearch"]
+    by_id = _search_trace(spans)
+    searches = {span.attributes["provider"]: span for span in by_id.values() if span.name == "provider.search"}
+    assert searches["bdfare"].status == "ok"
+    assert searches["flyhub"].status == "error"
+    assert searches["flyhub"].error